@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Protocol
+
+from .config import settings
+from .schemas import BrandContext
+from .utils import normalize_url
+
+Loader = Callable[[], Awaitable[BrandContext]]
+
+
+@dataclass
+class CacheEntry:
+    value: BrandContext
+    stored_at: float
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> CacheEntry | None: ...
+
+    async def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """LRU of BrandContext objects bounded by entry count and age."""
+
+    def __init__(self, max_entries: int, max_age: float):
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    async def get(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.stored_at >= self.max_age:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """On-disk cache that survives restarts; rows hold the BrandContext as JSON."""
+
+    def __init__(self, path: str, max_entries: int, max_age: float):
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS insights_cache ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, used_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+
+    def _get(self, key: str) -> CacheEntry | None:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT stored_at, payload FROM insights_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[0] >= self.max_age:
+                self._conn.execute("DELETE FROM insights_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE insights_cache SET used_at = ? WHERE key = ?", (now, key))
+        return CacheEntry(value=BrandContext.model_validate_json(row[1]), stored_at=row[0])
+
+    def _set(self, key: str, entry: CacheEntry) -> None:
+        payload = entry.value.model_dump_json()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO insights_cache (key, stored_at, used_at, payload) VALUES (?, ?, ?, ?)",
+                (key, entry.stored_at, time.time(), payload),
+            )
+            self._conn.execute("DELETE FROM insights_cache WHERE stored_at < ?", (time.time() - self.max_age,))
+            self._conn.execute(
+                "DELETE FROM insights_cache WHERE key IN ("
+                "SELECT key FROM insights_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    async def get(self, key: str) -> CacheEntry | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await asyncio.to_thread(self._set, key, entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM insights_cache").fetchone()[0]
+
+
+class ResultCache:
+    """Stale-while-revalidate cache in front of ``get_insights``.
+
+    Entries younger than ``ttl`` are served as is. Entries within the following
+    ``stale`` seconds are served immediately while one background task refreshes
+    them. Concurrent misses for the same key share a single in-flight scrape.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, stale: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale = stale
+        self._inflight: dict[str, asyncio.Task[BrandContext]] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_load(self, key: str, loader: Loader) -> BrandContext:
+        entry = await self.backend.get(key)
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.ttl + self.stale:
+                self.stale_hits += 1
+                self._load(key, loader)
+                return entry.value
+        self.misses += 1
+        # shield: a client disconnect must not cancel a scrape other callers await
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: str, loader: Loader) -> asyncio.Task[BrandContext]:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.create_task(self._run(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(self._done(key))
+        return task
+
+    def _done(self, key: str) -> Callable[[asyncio.Task[BrandContext]], None]:
+        def callback(task: asyncio.Task[BrandContext]) -> None:
+            self._inflight.pop(key, None)
+            if not task.cancelled():
+                # background refreshes have no awaiter; mark their errors as retrieved
+                task.exception()
+
+        return callback
+
+    async def _run(self, key: str, loader: Loader) -> BrandContext:
+        value = await loader()
+        await self.put(key, value)
+        return value
+
+    async def put(self, key: str, value: BrandContext) -> None:
+        """Store a result produced elsewhere (e.g. a background recrawl)."""
+        # results cut short (deadline, failed section, truncated catalog) are served once but never
+        # cached: the same rule persistence follows, so a retry gets a fresh chance at the whole store
+        if not value.partial() and not any(e.startswith("catalog_incomplete:") for e in value.errors):
+            await self.backend.set(key, CacheEntry(value=value, stored_at=time.time()))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+def cache_key(url: str, sections: Iterable[str] | None = None, max_products: int | None = None) -> str:
+    key = normalize_url(url).rstrip("/")
+    if sections:
+        key += "|" + ",".join(sorted(sections))
+    if max_products:
+        key += f"|max={max_products}"
+    return key
+
+
+_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache | None:
+    """The process-wide insights cache, or None when INSIGHTS_CACHE_BACKEND=none."""
+    global _cache
+    kind = settings.insights_cache_backend
+    if kind == "none":
+        return None
+    if _cache is None:
+        ttl = settings.insights_cache_ttl_seconds
+        stale = settings.insights_cache_stale_seconds
+        backend: CacheBackend
+        if kind == "sqlite":
+            backend = SQLiteBackend(settings.insights_cache_path, settings.insights_cache_max_entries, ttl + stale)
+        elif kind == "memory":
+            backend = MemoryBackend(settings.insights_cache_max_entries, ttl + stale)
+        else:
+            raise ValueError(f"Unknown insights cache backend: {kind}")
+        _cache = ResultCache(backend, ttl=ttl, stale=stale)
+    return _cache
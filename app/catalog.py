@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urljoin
+
+import orjson
+
+from .catalog_stats import VariantColumns
+from .config import settings
+from .schemas import CatalogFetchStats, Product
+from .utils import unique
+
+if TYPE_CHECKING:
+    from .scraper import ShopifyScraper
+
+PAGINATION_MODES = ("page", "since_id")
+
+PageCallback = Callable[[list[Product]], Awaitable[None]]
+
+
+def _interned(value: Any) -> str | None:
+    # vendors, types and tags repeat across a catalog; one copy of each is kept
+    return sys.intern(value) if isinstance(value, str) else None
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    """The fields of a /products.json entry that ``Product`` needs, and nothing else.
+
+    Entries carry variants, options and ``body_html``; a fetcher walking without
+    ``on_page`` keeps these records instead, and builds ``Product`` models only
+    when they are handed out. Scrapes take pages through ``on_page`` as
+    ``Product`` models, since the ``BrandContext`` they build holds those anyway.
+    """
+
+    id: int | str | None
+    handle: str | None
+    title: str
+    price: float | None
+    # any variant in stock; None when the store does not say
+    available: bool | None
+    vendor: str | None
+    product_type: str | None
+    images: tuple[str, ...]
+    tags: tuple[str, ...]
+
+    @classmethod
+    def from_json(cls, p: dict[str, Any]) -> ProductRecord:
+        tags = p.get("tags")
+        tags = tags.split(", ") if isinstance(tags, str) else (tags or [])
+        price = None
+        # try to extract price from variants
+        variants = p.get("variants") or []
+        if variants:
+            try:
+                price = float(variants[0].get("price")) if variants[0].get("price") is not None else None
+            except (ValueError, TypeError):
+                price = None
+        flags = [v.get("available") for v in variants if isinstance(v.get("available"), bool)]
+        return cls(
+            id=p.get("id"),
+            handle=p.get("handle"),
+            title=p.get("title") or p.get("handle") or "",
+            price=price,
+            available=any(flags) if flags else None,
+            vendor=_interned(p.get("vendor")),
+            product_type=_interned(p.get("product_type")),
+            images=tuple(img.get("src") for img in (p.get("images") or []) if img.get("src")),
+            tags=tuple(_interned(t) or "" for t in unique(tags)),
+        )
+
+    def to_product(self, root: str, currency: str | None = None) -> Product:
+        return Product(
+            id=self.id,
+            handle=self.handle,
+            title=self.title,
+            url=urljoin(root + "/", f"/products/{self.handle}") if self.handle else None,
+            price=self.price,
+            currency=currency,
+            images=list(self.images),
+            tags=list(self.tags),
+            vendor=self.vendor,
+            product_type=self.product_type,
+            available=self.available,
+        )
+
+
+def product_from_json(p: dict[str, Any], root: str, currency: str | None = None) -> Product:
+    return ProductRecord.from_json(p).to_product(root, currency)
+
+
+class CatalogFetcher:
+    """Walks /products.json for one store.
+
+    ``page`` mode fetches offset pages in concurrent windows. ``since_id`` walks the
+    id cursor serially, which stays cheap for the store on deep catalogs, and falls
+    back to offset pages when the store ignores the cursor. Both stop at the first
+    short page.
+    """
+
+    def __init__(
+        self,
+        scraper: ShopifyScraper,
+        *,
+        page_size: int | None = None,
+        concurrency: int | None = None,
+        mode: str | None = None,
+        max_products: int | None = None,
+        on_page: PageCallback | None = None,
+        keep_raw: bool = False,
+        retain: bool = True,
+        variants: VariantColumns | None = None,
+    ):
+        self.scraper = scraper
+        self.on_page = on_page
+        self.max_products = max_products
+        self.page_size = max(1, min(250, page_size or settings.catalog_page_size, max_products or 250))
+        self.concurrency = max(1, concurrency or settings.catalog_concurrency)
+        self.mode = mode or settings.catalog_pagination
+        if self.mode not in PAGINATION_MODES:
+            raise ValueError(f"Unknown catalog pagination mode: {self.mode}")
+        self.stats = CatalogFetchStats(mode=self.mode)
+        # full entries are only kept for callers that need more than Product's fields (catalog sync)
+        self.keep_raw = keep_raw
+        # without on_page, whether products are kept at all (not when only ``variants`` is wanted)
+        self.retain = retain
+        self.raw: list[dict[str, Any]] = []
+        self.records: list[ProductRecord] = []
+        self.variants = variants
+        self.count = 0
+        self.failed = False
+        # a page after the first failed, so the walk stopped short of the catalog's end
+        self.incomplete = False
+
+    async def fetch_all(self) -> list[Product]:
+        await self.walk()
+        return self.products()
+
+    async def walk(self) -> int:
+        """Walk the catalog; with ``on_page`` each page is handed over instead of kept."""
+        started = time.perf_counter()
+        try:
+            if self.mode == "page":
+                await self._walk_pages()
+            else:
+                await self._walk_cursor()
+            self.stats.complete = not self.failed and not self._full()
+        finally:
+            self.stats.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.stats.products = self.count
+        return self.count
+
+    def products(self) -> list[Product]:
+        currency = self.scraper.currency
+        if self.keep_raw:
+            return [product_from_json(p, self.scraper.root, currency) for p in self.raw]
+        return [r.to_product(self.scraper.root, currency) for r in self.records]
+
+    async def _accept(self, items: list[dict[str, Any]]) -> None:
+        if self.max_products is not None:
+            items = items[: self.max_products - self.count]
+        self.count += len(items)
+        if self.variants is not None:
+            for p in items:
+                self.variants.add(p)
+        if self.on_page is not None:
+            if items:
+                currency = self.scraper.currency
+                await self.on_page([product_from_json(p, self.scraper.root, currency) for p in items])
+        elif self.keep_raw:
+            self.raw.extend(items)
+        elif self.retain:
+            self.records.extend(ProductRecord.from_json(p) for p in items)
+
+    def _full(self) -> bool:
+        return self.max_products is not None and self.count >= self.max_products
+
+    def _window(self) -> int:
+        if self.max_products is None:
+            return self.concurrency
+        # no point requesting pages past the product cap
+        missing = self.max_products - self.count
+        return max(1, min(self.concurrency, math.ceil(missing / self.page_size)))
+
+    async def _fetch_page(self, query: str) -> list[dict[str, Any]] | None:
+        res = await self.scraper.fetch(f"/products.json?limit={self.page_size}&{query}")
+        self.stats.pages_fetched += 1
+        if res.status != 200:
+            reason = f"HTTP {res.status}" if res.status else f"body {res.cut}" if res.cut else "request failed"
+            self._fail(reason, query)
+            return None
+        try:
+            data = orjson.loads(res.text)
+        except orjson.JSONDecodeError:
+            self._fail("invalid JSON", query)
+            return None
+        if not isinstance(data, dict):
+            self._fail("unexpected JSON", query)
+            return None
+        return data.get("products") or []
+
+    def _fail(self, reason: str, query: str) -> None:
+        self.failed = True
+        # the first page failing just means no catalog (not a Shopify store, or it is closed);
+        # any later page means a catalog cut short, which persistence, sync and search must not take as whole
+        if self.count or self.stats.pages_fetched > 1:
+            self.incomplete = True
+            self.scraper.errors.append(f"catalog_incomplete: {reason} for {query}")
+
+    async def _walk_pages(self, start: int = 1) -> None:
+        self.stats.mode = "page"
+        page = start
+        # the first page goes alone so small stores cost a single request
+        window = 1
+        while True:
+            pages = await asyncio.gather(*(self._fetch_page(f"page={n}") for n in range(page, page + window)))
+            for items in pages:
+                if not items:
+                    return
+                await self._accept(items)
+                if len(items) < self.page_size or self._full():
+                    return
+            page += window
+            window = self._window()
+
+    async def _walk_cursor(self) -> None:
+        self.stats.mode = "since_id"
+        cursor = 0
+        pages = 0
+        while True:
+            items = await self._fetch_page(f"since_id={cursor}")
+            if not items:
+                return
+            ids = [p.get("id") for p in items]
+            if not all(isinstance(i, int) and i > cursor for i in ids):
+                # the store ignored since_id and served its default ordering
+                if pages == 0:
+                    await self._walk_pages()
+                elif pages == 1:
+                    # page 1 is already in hand; continue with offsets from page 2
+                    await self._walk_pages(start=2)
+                return
+            await self._accept(items)
+            pages += 1
+            if len(items) < self.page_size or self._full():
+                return
+            cursor = max(p["id"] for p in items)
@@ -0,0 +1,166 @@
+"""Variant-level catalog columns and the aggregates computed over them, vectorized with NumPy."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from .schemas import CatalogStats, DiscountStats, GroupStats, PriceStats
+
+QUANTILES = (0.25, 0.5, 0.75, 0.9)
+UNKNOWN = -1
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class VariantColumns:
+    """Every variant of a catalog in parallel typed arrays.
+
+    ``price`` and ``compare_at`` are float64 with NaN when missing;
+    ``available`` is 1, 0 or -1 (unknown); ``product`` indexes the owning
+    product, whose vendor and type are dictionary-encoded per product.
+    """
+
+    def __init__(self) -> None:
+        self.price = array("d")
+        self.compare_at = array("d")
+        self.available = array("b")
+        self.product = array("q")
+        self.sku: list[str | None] = []
+        self.vendor = array("q")
+        self.product_type = array("q")
+        self.vendors: list[str] = []
+        self.product_types: list[str] = []
+        self._vendor_codes: dict[str, int] = {}
+        self._type_codes: dict[str, int] = {}
+
+    @staticmethod
+    def _code(names: list[str], codes: dict[str, int], value: Any) -> int:
+        if not isinstance(value, str) or not value:
+            return UNKNOWN
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def add(self, p: dict[str, Any]) -> None:
+        """Append one /products.json entry and its variants."""
+        index = len(self.vendor)
+        self.vendor.append(self._code(self.vendors, self._vendor_codes, p.get("vendor")))
+        self.product_type.append(self._code(self.product_types, self._type_codes, p.get("product_type")))
+        for v in p.get("variants") or []:
+            self.price.append(_float(v.get("price")))
+            self.compare_at.append(_float(v.get("compare_at_price")))
+            available = v.get("available")
+            self.available.append(1 if available is True else 0 if available is False else UNKNOWN)
+            self.product.append(index)
+            self.sku.append(v.get("sku") or None)
+
+    @property
+    def products(self) -> int:
+        return len(self.vendor)
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+
+def _ratio(part: float, whole: float) -> float | None:
+    return round(part / whole, 4) if whole else None
+
+
+def _round(value: Any) -> float | None:
+    return None if value is None or math.isnan(value) else round(float(value), 4)
+
+
+def price_stats(prices: npt.ArrayLike) -> PriceStats:
+    """Quantiles (linear interpolation, as ``numpy.quantile``), extremes and mean of ``prices``; NaN is skipped."""
+    values = np.asarray(prices, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return PriceStats()
+    p25, median, p75, p90 = np.quantile(values, QUANTILES)
+    return PriceStats(
+        min=_round(values.min()),
+        p25=_round(p25),
+        median=_round(median),
+        p75=_round(p75),
+        p90=_round(p90),
+        max=_round(values.max()),
+        mean=_round(values.mean()),
+    )
+
+
+def _columns(cols: VariantColumns, name: str, dtype: type[np.generic]) -> npt.NDArray[Any]:
+    data = getattr(cols, name)
+    return np.frombuffer(data, dtype=dtype) if len(data) else np.empty(0, dtype=dtype)
+
+
+def catalog_stats(cols: VariantColumns, currency: str | None = None) -> CatalogStats:
+    """Price distribution, discount depth, stock and per-vendor/type breakdowns of a catalog."""
+    price = _columns(cols, "price", np.float64)
+    compare = _columns(cols, "compare_at", np.float64)
+    available = _columns(cols, "available", np.int8)
+    product = _columns(cols, "product", np.int64)
+    priced = ~np.isnan(price)
+    in_stock = available == 1
+    discounted = priced & (compare > price)
+    depth = 1 - price[discounted] / compare[discounted]
+
+    def groups(per_product: npt.NDArray[np.int64], names: list[str]) -> dict[str, GroupStats]:
+        if not names:
+            return {}
+        k = len(names)
+        codes = per_product[product]
+        known = codes >= 0
+        products = np.bincount(per_product[per_product >= 0], minlength=k)
+        variants = np.bincount(codes[known], minlength=k)
+        stocked = np.bincount(codes[known], weights=in_stock[known], minlength=k)
+        rated = np.bincount(codes[known], weights=(available >= 0)[known], minlength=k)
+        sale = np.bincount(codes[known], weights=discounted[known], minlength=k)
+        # medians: sort by (code, price) once and read the middle of each code's run
+        with_price = known & priced
+        order = np.lexsort((price[with_price], codes[with_price]))
+        sorted_codes = codes[with_price][order]
+        sorted_prices = price[with_price][order]
+        starts = np.searchsorted(sorted_codes, np.arange(k), side="left")
+        ends = np.searchsorted(sorted_codes, np.arange(k), side="right")
+        out = {}
+        for code, name in enumerate(names):
+            start, end = int(starts[code]), int(ends[code])
+            median = None
+            if end > start:
+                median = (sorted_prices[(start + end - 1) // 2] + sorted_prices[(start + end) // 2]) / 2
+            out[name] = GroupStats(
+                products=int(products[code]),
+                variants=int(variants[code]),
+                median_price=_round(median),
+                in_stock_ratio=_ratio(float(stocked[code]), float(rated[code])),
+                discounted_ratio=_ratio(float(sale[code]), float(variants[code])),
+            )
+        return out
+
+    return CatalogStats(
+        currency=currency,
+        products=cols.products,
+        variants=len(cols),
+        price=price_stats(price),
+        in_stock_ratio=_ratio(float(in_stock.sum()), float((available >= 0).sum())),
+        discounted_ratio=_ratio(float(discounted.sum()), float(priced.sum())),
+        discount_depth=DiscountStats(
+            mean=_round(depth.mean()) if len(depth) else None,
+            median=_round(np.median(depth)) if len(depth) else None,
+            max=_round(depth.max()) if len(depth) else None,
+        ),
+        by_vendor=groups(_columns(cols, "vendor", np.int64), cols.vendors),
+        by_product_type=groups(_columns(cols, "product_type", np.int64), cols.product_types),
+    )
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Protocol
+
+import orjson
+
+from .catalog import CatalogFetcher, product_from_json
+from .config import settings
+from .http_pool import HttpPool
+from .schemas import CatalogDiff
+from .scraper import ShopifyScraper
+
+# newest first; stores that ignore it serve their default ordering
+UPDATED_ORDER = "order=updated_at+desc"
+
+
+# bumped by stores without any visible change, on the product and on its variants and
+# images alike; not part of the content hash at any depth
+VOLATILE_FIELDS = frozenset({"updated_at"})
+
+
+def _stable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _stable(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_stable(v) for v in value]
+    return value
+
+
+def content_hash(product: dict[str, Any]) -> str:
+    content = _stable(product)
+    return hashlib.blake2b(orjson.dumps(content, option=orjson.OPT_SORT_KEYS), digest_size=12).hexdigest()
+
+
+def parse_updated_at(value: Any) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+@dataclass
+class CatalogSnapshot:
+    # product id -> (updated_at, content hash)
+    items: dict[str, tuple[str | None, str]] = field(default_factory=dict)
+    high_water: str | None = None
+    synced_at: float = 0.0
+    full_synced_at: float = 0.0
+    # whether the store honours UPDATED_ORDER; None until probed
+    ordered: bool | None = None
+
+    def dumps(self) -> bytes:
+        return orjson.dumps(self.__dict__)
+
+    @classmethod
+    def loads(cls, data: bytes | str) -> CatalogSnapshot:
+        raw = orjson.loads(data)
+        raw["items"] = {k: tuple(v) for k, v in raw["items"].items()}
+        return cls(**raw)
+
+
+class SnapshotStore(Protocol):
+    async def get(self, key: str) -> CatalogSnapshot | None: ...
+
+    async def set(self, key: str, snapshot: CatalogSnapshot) -> None: ...
+
+
+class MemorySnapshotStore:
+    def __init__(self) -> None:
+        self._snapshots: dict[str, CatalogSnapshot] = {}
+
+    async def get(self, key: str) -> CatalogSnapshot | None:
+        return self._snapshots.get(key)
+
+    async def set(self, key: str, snapshot: CatalogSnapshot) -> None:
+        self._snapshots[key] = snapshot
+
+
+class SQLiteSnapshotStore:
+    """Snapshots kept on disk so incremental syncs survive restarts."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS catalog_snapshots (key TEXT PRIMARY KEY, payload BLOB NOT NULL)"
+            )
+
+    def _get(self, key: str) -> CatalogSnapshot | None:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM catalog_snapshots WHERE key = ?", (key,)).fetchone()
+        return CatalogSnapshot.loads(row[0]) if row else None
+
+    def _set(self, key: str, snapshot: CatalogSnapshot) -> None:
+        payload = snapshot.dumps()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog_snapshots (key, payload) VALUES (?, ?)", (key, payload)
+            )
+
+    async def get(self, key: str) -> CatalogSnapshot | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, snapshot: CatalogSnapshot) -> None:
+        await asyncio.to_thread(self._set, key, snapshot)
+
+
+class CatalogSync:
+    """Diffs a store's catalog against the snapshot taken by its previous sync.
+
+    When the store honours ``order=updated_at desc``, pages are read newest first
+    and the walk stops at the first product older than the snapshot's high-water
+    mark, so an unchanged catalog costs a page. Removals are only visible when the
+    whole catalog is read: on the first sync, for stores that ignore the ordering,
+    and once every ``CATALOG_FULL_SYNC_SECONDS``.
+    """
+
+    def __init__(self, scraper: ShopifyScraper, store: SnapshotStore, *, full: bool = False):
+        self.scraper = scraper
+        self.store = store
+        self.full = full
+        self.fetcher = CatalogFetcher(scraper, keep_raw=True)
+
+    async def run(self) -> CatalogDiff:
+        started = time.perf_counter()
+        key = self.scraper.root
+        previous = await self.store.get(key)
+        full = (
+            self.full
+            or previous is None
+            or previous.ordered is False
+            or time.time() - previous.full_synced_at >= settings.catalog_full_sync_seconds
+        )
+        ordered = previous.ordered if previous else None
+        if full:
+            raw, complete = await self._walk_all(), True
+        else:
+            assert previous is not None
+            raw, complete, ordered = await self._walk_recent(previous)
+        diff, snapshot = self._diff(raw, previous, complete)
+        diff.mode = "full" if full or ordered is False else "updated_at"
+        diff.pages_fetched = self.fetcher.stats.pages_fetched
+        diff.errors = list(self.scraper.errors)
+        if self.fetcher.failed:
+            # a partial read would mark the unread products as removed, or skip changes for good
+            diff.complete = False
+            diff.removed = []
+            diff.errors.append("catalog_sync_failed: snapshot not updated")
+        else:
+            snapshot.ordered = ordered
+            await self.store.set(key, snapshot)
+        diff.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        return diff
+
+    async def _walk_all(self) -> list[dict[str, Any]]:
+        await self.fetcher.walk()
+        return self.fetcher.raw
+
+    async def _walk_recent(self, previous: CatalogSnapshot) -> tuple[list[dict[str, Any]], bool, bool]:
+        """Read newest-first pages down to the previous high-water mark.
+
+        Returns the products read, whether that was the whole catalog, and whether
+        the store honoured the ordering (if not, the whole catalog was read).
+        """
+        mark = parse_updated_at(previous.high_water)
+        seen: list[dict[str, Any]] = []
+        page = 1
+        while True:
+            items = await self.fetcher._fetch_page(f"{UPDATED_ORDER}&page={page}")
+            if not items:
+                return seen, items is not None, True
+            if page == 1 and not _newest_first(items):
+                return await self._walk_all(), True, False
+            for item in items:
+                updated = parse_updated_at(item.get("updated_at"))
+                if mark is not None and updated is not None and updated < mark:
+                    return seen, False, True
+                seen.append(item)
+            if len(items) < self.fetcher.page_size:
+                return seen, True, True
+            page += 1
+
+    def _diff(
+        self, raw: list[dict[str, Any]], previous: CatalogSnapshot | None, complete: bool
+    ) -> tuple[CatalogDiff, CatalogSnapshot]:
+        now = time.time()
+        old = previous.items if previous else {}
+        # an incremental read only touches what changed; everything else carries over
+        items = {} if complete else dict(old)
+        high_water = previous.high_water if previous and not complete else None
+        diff = CatalogDiff(site_url=self.scraper.root, mode="full", complete=complete)
+        for p in raw:
+            if p.get("id") is None:
+                continue
+            pid = str(p["id"])
+            digest = content_hash(p)
+            before = old.get(pid)
+            if before is None:
+                diff.added.append(product_from_json(p, self.scraper.root))
+            elif before[1] != digest:
+                diff.changed.append(product_from_json(p, self.scraper.root))
+            updated_at = p.get("updated_at")
+            items[pid] = (updated_at, digest)
+            if _later(updated_at, high_water):
+                high_water = updated_at
+        if complete:
+            diff.removed = sorted(set(old) - set(items))
+        diff.unchanged = len(items) - len(diff.added) - len(diff.changed)
+        full_synced_at = previous.full_synced_at if previous else 0.0
+        if complete:
+            full_synced_at = now
+        snapshot = CatalogSnapshot(items=items, high_water=high_water, synced_at=now, full_synced_at=full_synced_at)
+        return diff, snapshot
+
+
+def _later(value: str | None, than: str | None) -> bool:
+    candidate = parse_updated_at(value)
+    if candidate is None:
+        return False
+    current = parse_updated_at(than)
+    return current is None or candidate > current
+
+
+def _newest_first(items: list[dict[str, Any]]) -> bool:
+    stamps: list[datetime] = []
+    for p in items:
+        stamp = parse_updated_at(p.get("updated_at"))
+        if stamp is None:
+            return False
+        stamps.append(stamp)
+    return all(a >= b for a, b in zip(stamps, stamps[1:], strict=False))
+
+
+_store: SnapshotStore | None = None
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _store
+    if _store is None:
+        kind = settings.catalog_snapshot_backend
+        if kind == "sqlite":
+            _store = SQLiteSnapshotStore(settings.catalog_snapshot_path)
+        elif kind == "memory":
+            _store = MemorySnapshotStore()
+        else:
+            raise ValueError(f"Unknown catalog snapshot backend: {kind}")
+    return _store
+
+
+async def sync_catalog(
+    url: str, http: HttpPool | None = None, store: SnapshotStore | None = None, full: bool = False
+) -> CatalogDiff:
+    scraper = ShopifyScraper(url, http=http)
+    return await CatalogSync(scraper, store or get_snapshot_store(), full=full).run()
@@ -0,0 +1,149 @@
+"""Comparison matrix over a brand and its competitors.
+
+Each store is reduced to a profile: its sorted prices, a MinHash sketch of
+its catalog (normalized product titles and tags), its product types and the
+policies it publishes. Pairwise figures are then computed over all profiles
+at once as NumPy array operations.
+
+The sketch is a one-permutation MinHash: each feature's 64-bit hash picks
+one of ``SKETCH_BINS`` bins by its top bits and the bin keeps the smallest
+remainder. Two catalogs' Jaccard similarity is estimated as the share of
+bins holding the same value among the bins not empty in both, so a pair of
+stores costs ``SKETCH_BINS`` comparisons whatever the catalog sizes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import statistics
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from .catalog_stats import price_stats
+from .schemas import BrandContext, ComparisonMatrix, StoreComparison
+from .scraper import POLICY_KEYWORDS
+
+SKETCH_BINS = 256
+_BIN_BITS = 8  # log2(SKETCH_BINS)
+_VALUE_BITS = 64 - _BIN_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+EMPTY = 1 << _VALUE_BITS  # above every remainder
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+# variant-ish words that make the same product look different across stores
+_NOISE = frozenset(["xs", "s", "m", "l", "xl", "xxl", "pack", "set", "of", "the", "and", "with", "new"])
+
+
+def normalize_title(title: str) -> str:
+    """Lowercased words without digits, sizes or filler, sorted: "Shirt - Linen (M)" -> "linen shirt"."""
+    return " ".join(sorted({w for w in _WORD.findall(title.lower()) if w not in _NOISE}))
+
+
+def _hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+def minhash(features: set[str]) -> list[int]:
+    sketch = [EMPTY] * SKETCH_BINS
+    for feature in features:
+        h = _hash(feature)
+        b, value = h >> _VALUE_BITS, h & _VALUE_MASK
+        if value < sketch[b]:
+            sketch[b] = value
+    return sketch
+
+
+@dataclass(slots=True)
+class StoreProfile:
+    store: str
+    products: int
+    prices: list[float]  # sorted
+    features: int
+    sketch: list[int]
+    product_types: frozenset[str]
+    policies: frozenset[str]
+
+    @classmethod
+    def from_context(cls, ctx: BrandContext) -> StoreProfile:
+        features: set[str] = set()
+        types = set()
+        for p in ctx.products:
+            if title := normalize_title(p.title):
+                features.add("t:" + title)
+            features.update("g:" + tag.strip().lower() for tag in p.tags if tag.strip())
+            if p.product_type and p.product_type.strip():
+                types.add(p.product_type.strip().lower())
+        names = [pol.name.lower() for pol in ctx.policies]
+        policies = frozenset(title for title, key in POLICY_KEYWORDS if any(key in name for name in names))
+        return cls(
+            store=ctx.domain or str(ctx.site_url),
+            products=len(ctx.products),
+            prices=sorted(p.price for p in ctx.products if p.price is not None and not math.isnan(p.price)),
+            features=len(features),
+            sketch=minhash(features),
+            product_types=frozenset(types),
+            policies=policies,
+        )
+
+
+def compare_stores(contexts: Sequence[BrandContext], baseline: int | None = 0) -> ComparisonMatrix:
+    """Comparison of ``contexts``; prices are relative to the median of ``contexts[baseline]``.
+
+    With ``baseline=None`` (the brand could not be scraped) there is no relative price.
+    """
+    profiles = [StoreProfile.from_context(ctx) for ctx in contexts]
+    n = len(profiles)
+    sketches = np.array([p.sketch for p in profiles], dtype=np.int64).reshape(n, SKETCH_BINS)
+    filled = sketches != EMPTY
+    same = ((sketches[:, None, :] == sketches[None, :, :]) & filled[:, None, :]).sum(axis=2)
+    either = (filled[:, None, :] | filled[None, :, :]).sum(axis=2)
+    catalog = np.divide(same, either, out=np.zeros((n, n)), where=either > 0)
+
+    vocabulary = sorted({t for p in profiles for t in p.product_types})
+    column = {t: k for k, t in enumerate(vocabulary)}
+    incidence = np.zeros((n, len(vocabulary)))
+    for i, p in enumerate(profiles):
+        incidence[i, [column[t] for t in p.product_types]] = 1
+    shared = incidence @ incidence.T
+    sizes = incidence.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - shared
+    types = np.divide(shared, union, out=np.zeros((n, n)), where=union > 0)
+
+    medians = [statistics.median(p.prices) if p.prices else None for p in profiles]
+    base = medians[baseline] if baseline is not None and medians else None
+    stores = [
+        StoreComparison(
+            store=p.store,
+            products=p.products,
+            price=price_stats(p.prices),
+            relative_median_price=_round(median / base) if median is not None and base else None,
+            catalog_features=p.features,
+            product_types=len(p.product_types),
+            policies=[title for title, _ in POLICY_KEYWORDS if title in p.policies],
+        )
+        for p, median in zip(profiles, medians, strict=True)
+    ]
+    type_counts = Counter(t for p in profiles for t in p.product_types)
+    coverage = {title: _round(sum(title in p.policies for p in profiles) / n) if profiles else 0.0 for title, _ in POLICY_KEYWORDS}
+    return ComparisonMatrix(
+        baseline=profiles[baseline].store if baseline is not None and profiles else None,
+        stores=stores,
+        catalog_overlap=_rounded(catalog),
+        product_type_overlap=_rounded(types),
+        shared_product_types={t: count for t, count in sorted(type_counts.items(), key=lambda item: (-item[1], item[0])) if count > 1},
+        policy_coverage=coverage,
+    )
+
+
+def _round(value: float) -> float:
+    return round(float(value), 4)
+
+
+def _rounded(matrix: npt.NDArray[np.float64]) -> list[list[float]]:
+    return [[_round(x) for x in row] for row in matrix.tolist()]
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import urllib.parse
+from typing import Any
 
-import httpx
-
+from .compare import compare_stores
 from .config import settings
+from .http_pool import get_http_pool
+from .jobs import get_scheduler
+from .schemas import ComparisonMatrix
 from .scraper import get_insights
 
 
@@ -29,11 +32,10 @@ async def _discover_bing(website_url: str, limit: int = 5) -> list[str]:
     q = f"competitors of {domain}"
     headers = {"Ocp-Apim-Subscription-Key": settings.bing_search_api_key}
     params = {"q": q, "count": max(10, limit * 3)}
-    async with httpx.AsyncClient(timeout=settings.request_timeout_seconds) as client:
-        r = await client.get("https://api.bing.microsoft.com/v7.0/search", headers=headers, params=params)
-        if r.status_code != 200:
-            return []
-        data = r.json()
+    r = await get_http_pool().get("https://api.bing.microsoft.com/v7.0/search", headers=headers, params=params)
+    if r.status_code != 200:
+        return []
+    data = r.json()
     urls = []
     for item in (data.get("webPages", {}).get("value", []) if isinstance(data, dict) else []):
         u = item.get("url")
@@ -74,11 +76,10 @@ async def _discover_gemini(website_url: str, limit: int = 5) -> list[str]:
             {"parts": [{"text": prompt}]}
         ]
     }
-    async with httpx.AsyncClient(timeout=settings.request_timeout_seconds) as client:
-        r = await client.post(endpoint, headers=headers, params=params, json=body)
-        if r.status_code != 200:
-            return []
-        data = r.json()
+    r = await get_http_pool().post(endpoint, headers=headers, params=params, json=body)
+    if r.status_code != 200:
+        return []
+    data = r.json()
     # Parse text candidates
     text = ""
     try:
@@ -111,15 +112,35 @@ async def _discover_gemini(website_url: str, limit: int = 5) -> list[str]:
     return cleaned
 
 
+async def fetch_competitors(urls: list[str]) -> list[dict]:
+    # through the shared batch scheduler, so a long list cannot open every store at once
+    results = await get_scheduler().run(urls, get_insights)
+    out: list[dict[str, Any]] = []
+    for url, res in zip(urls, results, strict=True):
+        if res is None or res.error is not None:
+            out.append({"url": url, "error": res.error if res else "cancelled"})
+        else:
+            out.append({"url": url, "data": res.data})
+    return out
+
+
+async def fetch_and_compare(website_url: str, urls: list[str]) -> tuple[list[dict], ComparisonMatrix]:
+    """Competitor results and the comparison matrix of the brand (first) and every competitor scraped.
+
+    When the brand itself fails, the competitors are still compared with each
+    other but no relative price is given, and ``baseline_error`` says why.
+    """
+    # the brand goes through the same batch, so it is scraped alongside its competitors
+    results = await fetch_competitors([website_url, *urls])
+    scraped = [r["data"] for r in results if "data" in r]
+    brand = results[0]
+    comparison = await asyncio.to_thread(compare_stores, scraped, 0 if "data" in brand else None)
+    comparison.baseline_error = brand.get("error")
+    return results[1:], comparison
+
+
 async def discover_and_fetch(website_url: str, limit: int = 5) -> list[dict]:
     comps = await discover_competitors(website_url, limit)
     if not comps:
         return []
-    results = await asyncio.gather(*[get_insights(u) for u in comps], return_exceptions=True)
-    out = []
-    for url, res in zip(comps, results, strict=True):
-        if isinstance(res, Exception):
-            out.append({"url": url, "error": str(res)})
-        else:
-            out.append({"url": url, "data": res})
-    return out
+    return await fetch_competitors(comps)
@@ -3,14 +3,72 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     request_timeout_seconds: int = 12
+    scrape_deadline_seconds: float | None = None
+    stream_queue_size: int = 4
     max_pages_to_scan: int = 3
+    subpage_concurrency: int = 6
+    catalog_page_size: int = 250
+    catalog_concurrency: int = 4
+    catalog_pagination: str = "page"  # "page" (concurrent offsets) or "since_id" (cursor)
+    catalog_snapshot_backend: str = "memory"  # "memory" or "sqlite"
+    catalog_snapshot_path: str = "catalog_snapshots.sqlite3"
+    catalog_full_sync_seconds: float = 24 * 3600
+    sitemap_discovery: bool = True  # find policy/FAQ/about pages through /sitemap.xml
+    sitemap_max_urls: int = 50_000
+    sitemap_wait_seconds: float = 1.0  # how long linked-page sections wait for it after the home page
+    parse_executor: str = "thread"  # "none", "thread" or "process"
+    parse_workers: int | None = None
+    parse_inline_max_bytes: int = 20_000
+    html_parser: str = "lxml"  # "lxml" or "bs4"
+    http_max_connections: int = 100
+    http_max_keepalive: int = 40
+    http_keepalive_expiry_seconds: float = 30.0
+    http_max_per_host: int = 8
+    http2: bool = False
+    http_cache_max_bytes: int = 64 * 1024 * 1024  # 0 disables conditional revalidation
+    rate_limit_per_host: float = 10.0  # requests/second a host starts at; 0 disables limiting
+    rate_limit_burst: float = 20
+    rate_limit_min: float = 0.5
+    rate_limit_max: float = 50.0
+    rate_limit_increase: float = 0.5  # added to a host's rate per successful request
+    fetch_max_retries: int = 3
+    fetch_backoff_base_seconds: float = 0.25
+    fetch_backoff_max_seconds: float = 10.0
+    fetch_max_html_bytes: int = 2_000_000  # bodies are read up to these caps, by content kind
+    fetch_max_json_bytes: int = 16_000_000
+    fetch_excerpt_bytes: int = 65_536  # read into an excerpt page's main content (policies, about)
     user_agent: str = (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
         "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
     )
 
+    batch_concurrency: int = 8  # stores scraped at once across every batch
+    batch_per_host: int = 1
+    batch_max_urls: int = 500
+    batch_max_jobs: int = 100  # finished jobs kept for polling
+    batch_job_ttl_seconds: float = 3600
+    batch_result_ttl_seconds: float = 300  # finished jobs drop their scraped data after this
+
+    recrawl_enabled: bool = False
+    recrawl_workers: int = 4
+    recrawl_min_interval_seconds: float = 3600
+    recrawl_max_interval_seconds: float = 7 * 24 * 3600
+    recrawl_db_path: str = "recrawl.sqlite3"
+
+    search_enabled: bool = True
+    search_index_path: str = "search_index.json"
+    search_save_interval_seconds: float = 60
+
+    insights_cache_backend: str = "memory"  # "memory", "sqlite" or "none"
+    insights_cache_ttl_seconds: float = 300
+    insights_cache_stale_seconds: float = 900
+    insights_cache_max_entries: int = 512
+    insights_cache_path: str = "insights_cache.sqlite3"
+
     database_url: str | None = None
     persist_enabled: bool = False
+    persist_batch_size: int = 500  # rows per multi-row upsert statement
+    persist_queue_size: int = 100  # stores waiting to be written before new results are dropped
 
     bing_search_api_key: str | None = None
     gemini_api_key: str | None = None
@@ -0,0 +1,188 @@
+"""HTML documents behind one small interface, on lxml or BeautifulSoup.
+
+The extractors in ``parsing.py`` only ask a ``Document`` for CSS selections,
+text and attributes. ``LxmlDocument`` answers from a raw lxml tree,
+running hand-written XPath equivalents of the selectors in ``XPATH``;
+``Bs4Document`` is the original BeautifulSoup path. ``HTML_PARSER`` picks
+the backend, and BeautifulSoup still parses what lxml cannot: documents it
+rejects and selectors without an XPath equivalent.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from .config import settings
+
+BACKENDS = ("lxml", "bs4")
+
+
+def _class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_MAIN = f"descendant::*[self::main or self::article or {_class('rte')} or {_class('content')}]"
+
+# CSS selectors the extractors use -> XPath from the node selected from, in document order
+XPATH: dict[str, str] = {
+    "a[href]": "descendant::a[@href]",
+    "details": "descendant::details",
+    "summary": "descendant::summary",
+    "title": "descendant::title",
+    "img": "descendant::img",
+    ".accordion__title, .faq__question, h3, h4": (
+        f"descendant::*[{_class('accordion__title')} or {_class('faq__question')} or self::h3 or self::h4]"
+    ),
+    "meta[property='og:price:currency'], meta[itemprop='priceCurrency']": (
+        "descendant::meta[@property='og:price:currency' or @itemprop='priceCurrency']"
+    ),
+    "section a[href*='/products/'], .hero a[href*='/products/']": (
+        f"descendant::a[contains(@href, '/products/')][ancestor::section or ancestor::*[{_class('hero')}]]"
+    ),
+    "main, .rte, .content, article": _MAIN,
+    "main, article, .rte, .content": _MAIN,
+    ".grid-product": f"descendant::*[{_class('grid-product')}]",
+    ".product-card": f"descendant::*[{_class('product-card')}]",
+    ".product-item": f"descendant::*[{_class('product-item')}]",
+    ".product-grid-item": f"descendant::*[{_class('product-grid-item')}]",
+    "[data-product]": "descendant::*[@data-product]",
+    "article.product": f"descendant::article[{_class('product')}]",
+    ".product-title, .card__heading, .grid-product__title, a[title]": (
+        f"descendant::*[{_class('product-title')} or {_class('card__heading')} or {_class('grid-product__title')}"
+        " or (self::a and @title)]"
+    ),
+}
+_COMPILED = {css: etree.XPath(xpath) for css, xpath in XPATH.items()}
+
+# BeautifulSoup's get_text leaves out what these hold (and comments), but lxml keeps them as text
+_NO_TEXT = frozenset(["script", "style", "template", "rt", "rp"])
+
+
+def _collapse(strings: Iterable[str], limit: int | None) -> str:
+    # " ".join(text.split()) over the strings, stopping once ``limit`` characters are in
+    if limit is None:
+        return " ".join(" ".join(strings).split())
+    words: list[str] = []
+    size = -1
+    for s in strings:
+        for word in s.split():
+            words.append(word)
+            size += len(word) + 1
+        if size >= limit:
+            break
+    return " ".join(words)[:limit]
+
+
+class Document(ABC):
+    backend: str
+    root: Any
+
+    @abstractmethod
+    def select(self, css: str, node: Any = None) -> list[Any]: ...
+
+    def select_one(self, css: str, node: Any = None) -> Any | None:
+        found = self.select(css, node)
+        return found[0] if found else None
+
+    @abstractmethod
+    def text(self, node: Any, limit: int | None = None) -> str:
+        """Whitespace-collapsed text of ``node`` ("" for None), cut at ``limit`` characters."""
+
+    @abstractmethod
+    def attr(self, node: Any, name: str) -> str | None: ...
+
+    @abstractmethod
+    def next_element(self, node: Any) -> Any | None: ...
+
+    @abstractmethod
+    def parent(self, node: Any) -> Any | None: ...
+
+
+class Bs4Document(Document):
+    backend = "bs4"
+
+    def __init__(self, html: str | BeautifulSoup):
+        self.root = html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, "lxml")
+
+    def select(self, css: str, node: Any = None) -> list[Any]:
+        return (self.root if node is None else node).select(css)
+
+    def text(self, node: Any, limit: int | None = None) -> str:
+        if node is None:
+            return ""
+        return _collapse(node.stripped_strings, limit)
+
+    def attr(self, node: Any, name: str) -> str | None:
+        value = node.get(name)
+        return " ".join(value) if isinstance(value, list) else value
+
+    def next_element(self, node: Any) -> Any | None:
+        return node.find_next_sibling()
+
+    def parent(self, node: Any) -> Any | None:
+        return node.parent
+
+
+class LxmlDocument(Document):
+    backend = "lxml"
+
+    def __init__(self, html: str):
+        # plain etree elements: lxml.html's element classes cost a lookup per node
+        root = etree.HTML(html)  # lxml's default parser is per thread
+        if root is None:
+            raise ValueError("empty document")
+        self.root = root
+        # script and style hold no elements, so dropping them only drops their text
+        etree.strip_elements(self.root, "script", "style", etree.ProcessingInstruction, with_tail=False)
+        self._plain = next(self.root.iter("template", "rt", "rp"), None) is None
+
+    def select(self, css: str, node: Any = None) -> list[Any]:
+        return _COMPILED[css](self.root if node is None else node)
+
+    def text(self, node: Any, limit: int | None = None) -> str:
+        if node is None:
+            return ""
+        return _collapse(node.itertext() if self._plain else _strings(node), limit)
+
+    def attr(self, node: Any, name: str) -> str | None:
+        return node.get(name)
+
+    def next_element(self, node: Any) -> Any | None:
+        sibling = node.getnext()
+        while sibling is not None and not isinstance(sibling.tag, str):
+            sibling = sibling.getnext()
+        return sibling
+
+    def parent(self, node: Any) -> Any | None:
+        return node.getparent()
+
+
+def _strings(node: Any) -> Iterator[str]:
+    # itertext() without the subtrees BeautifulSoup leaves out of get_text
+    if not isinstance(node.tag, str) or node.tag in _NO_TEXT:
+        return
+    if node.text:
+        yield node.text
+    for child in node:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def parse_document(html: str, selectors: Iterable[str] = (), backend: str | None = None) -> Document:
+    """Parse ``html`` with ``backend`` (default ``HTML_PARSER``); ``selectors`` are any used beyond ``XPATH``'s."""
+    backend = backend or settings.html_parser
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser: {backend}")
+    if backend == "lxml" and all(css in XPATH for css in selectors):
+        try:
+            return LxmlDocument(html)
+        except (etree.ParserError, ValueError):
+            # empty documents, and str input with an XML encoding declaration
+            pass
+    return Bs4Document(html)
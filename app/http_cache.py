@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import httpx
+
+from .config import settings
+
+
+@dataclass
+class CachedResponse:
+    text: str
+    size: int
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = 0.0
+    partial: bool = False  # an excerpt: only answers excerpt fetches
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Bodies of validator-carrying 200 responses, LRU-evicted within a byte budget.
+
+    Shared by every scrape in the process so a recrawl can revalidate with
+    ``If-None-Match`` / ``If-Modified-Since`` and reuse the body on 304.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def get(self, url: str) -> CachedResponse | None:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def store(
+        self, url: str, response: httpx.Response, text: str | None = None, size: int | None = None, partial: bool = False
+    ) -> None:
+        """Keep a 200 response with a validator; ``text``/``size`` for a streamed body (else read off ``response``).
+
+        ``partial`` marks a body read only up to an excerpt.
+        """
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.status_code != 200 or not (etag or last_modified):
+            self.discard(url)
+            return
+        if size is None:
+            size = len(response.content)
+        if size > self.max_bytes:
+            self.discard(url)
+            return
+        self.discard(url)
+        self._entries[url] = CachedResponse(
+            text=(response.text if text is None else text) or "",
+            size=size,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.time(),
+            partial=partial,
+        )
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+
+    def discard(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """The process-wide response cache, or None when HTTP_CACHE_MAX_BYTES is 0."""
+    global _cache
+    if settings.http_cache_max_bytes <= 0:
+        return None
+    if _cache is None:
+        _cache = ResponseCache(settings.http_cache_max_bytes)
+    return _cache
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+
+class _HostSlot:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class HttpPool:
+    """One keep-alive ``httpx.AsyncClient`` shared by every scrape in the process.
+
+    Requests to the same host are capped at ``HTTP_MAX_PER_HOST`` in flight so a
+    single large store cannot take every pooled connection.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        http2 = settings.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            log.warning("HTTP2=true but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+        self.client = httpx.AsyncClient(
+            headers={
+                "User-Agent": settings.user_agent,
+                "Accept": "text/html,application/json,application/xhtml+xml",
+            },
+            timeout=settings.request_timeout_seconds,
+            follow_redirects=True,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+            transport=transport,
+        )
+        self.per_host = max(1, settings.http_max_per_host)
+        self._hosts: dict[str, _HostSlot] = {}
+        self.requests = 0
+        self.connections_opened = 0
+        self.in_flight = 0
+
+    async def _trace(self, name: str, info: dict[str, Any]) -> None:  # noqa: ARG002
+        if name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        host = urlsplit(url).netloc.lower()
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = _HostSlot(self.per_host)
+        slot.users += 1
+        try:
+            async with slot.semaphore:
+                self.in_flight += 1
+                try:
+                    yield
+                finally:
+                    self.in_flight -= 1
+        finally:
+            slot.users -= 1
+            if not slot.users:
+                self._hosts.pop(host, None)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        extensions = {**kwargs.pop("extensions", {}), "trace": self._trace}
+        async with self._host_slot(url):
+            self.requests += 1
+            return await self.client.request(method, url, extensions=extensions, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """``request`` with the body left unread, for callers that consume it incrementally."""
+        extensions = {**kwargs.pop("extensions", {}), "trace": self._trace}
+        async with self._host_slot(url):
+            self.requests += 1
+            async with self.client.stream(method, url, extensions=extensions, **kwargs) as response:
+                yield response
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(0, self.requests - self.connections_opened),
+            "in_flight": self.in_flight,
+            "active_hosts": len(self._hosts),
+        }
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_pool: HttpPool | None = None
+_pool_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_pool() -> HttpPool:
+    """The shared pool for the running event loop, created on first use."""
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        # a client cannot outlive the loop it was created on (e.g. asyncio.run per CLI call)
+        _pool = HttpPool()
+        _pool_loop = loop
+    return _pool
+
+
+def use_http_pool(pool: HttpPool) -> None:
+    """Install ``pool`` as the shared pool for the running loop (tests, benchmarks)."""
+    global _pool, _pool_loop
+    _pool = pool
+    _pool_loop = asyncio.get_running_loop()
+
+
+async def close_http_pool() -> None:
+    global _pool, _pool_loop
+    if _pool is not None:
+        pool, _pool, _pool_loop = _pool, None, None
+        await pool.aclose()
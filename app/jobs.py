@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import Counter, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from .config import settings
+from .schemas import BatchJobStatus, BatchResult, BrandContext, JobState
+from .utils import normalize_url
+
+log = logging.getLogger(__name__)
+
+Runner = Callable[[str], Awaitable[BrandContext]]
+
+
+def _host(url: str) -> str | None:
+    try:
+        return normalize_url(url).split("://", 1)[-1].split("/", 1)[0].lower()
+    except ValueError:
+        return None
+
+
+class Job:
+    """One batch of store URLs and the results gathered so far."""
+
+    def __init__(self, urls: list[str], runner: Runner):
+        self.id = uuid.uuid4().hex
+        self.urls = urls
+        self.runner = runner
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        self.cancelled = False
+        self.hosts = [_host(url) for url in urls]
+        # indexes into ``urls`` not yet started, in submission order
+        self.queued: deque[int] = deque(i for i, host in enumerate(self.hosts) if host is not None)
+        self.running = 0
+        self.results: list[BatchResult | None] = [None] * len(urls)
+        # completion order, for streaming
+        self.completed: list[BatchResult] = []
+        self._changed = asyncio.Condition()
+        # URLs without a host fail up front instead of reaching a worker
+        for i, host in enumerate(self.hosts):
+            if host is None:
+                result = BatchResult(index=i, url=urls[i], error="invalid URL")
+                self.results[i] = result
+                self.completed.append(result)
+        if not self.queued:
+            self.finished_at = self.created_at
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def take(self, has_room: Callable[[str], bool]) -> int | None:
+        """The first queued URL whose host has room, skipping (not reordering) the rest."""
+        for position, index in enumerate(self.queued):
+            host = self.hosts[index]
+            if host is not None and has_room(host):
+                del self.queued[position]
+                return index
+        return None
+
+    async def record(self, result: BatchResult) -> None:
+        self.results[result.index] = result
+        self.completed.append(result)
+        if not self.queued and not self.running:
+            self.finished_at = time.time()
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def cancel(self) -> None:
+        self.cancelled = True
+        self.queued.clear()
+        if not self.running:
+            self.finished_at = self.finished_at or time.time()
+        async with self._changed:
+            self._changed.notify_all()
+
+    def expire(self) -> None:
+        """Drop the scraped contexts, keeping each result's outcome."""
+        for position, result in enumerate(self.completed):
+            if result.data is not None:
+                # a copy: results already handed out keep their data
+                expired = result.model_copy(update={"data": None, "expired": True})
+                self.completed[position] = self.results[result.index] = expired
+
+    async def follow(self) -> AsyncIterator[BatchResult]:
+        """Results in completion order: those already in, then each new one until the job ends."""
+        seen = 0
+        while True:
+            while seen < len(self.completed):
+                yield self.completed[seen]
+                seen += 1
+            if self.finished:
+                return
+            async with self._changed:
+                if seen == len(self.completed) and not self.finished:
+                    await self._changed.wait()
+
+    async def wait(self) -> list[BatchResult | None]:
+        async for _ in self.follow():
+            pass
+        return self.results
+
+    def status(self, include_results: bool = True) -> BatchJobStatus:
+        failed = sum(1 for r in self.completed if r.error is not None)
+        state: JobState
+        if self.cancelled:
+            state = "cancelled"
+        elif self.finished:
+            state = "done"
+        else:
+            state = "running" if self.completed or self.running else "queued"
+        return BatchJobStatus(
+            id=self.id,
+            status=state,
+            total=len(self.urls),
+            completed=len(self.completed),
+            failed=failed,
+            running=self.running,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            results=[r for r in self.results if r is not None] if include_results else None,
+        )
+
+
+class JobScheduler:
+    """A fixed pool of workers shared by every batch in the process.
+
+    Workers take jobs round-robin, so a small batch is not stuck behind a large
+    one, and never run more than ``per_host`` scrapes of the same store at once.
+    """
+
+    def __init__(self, concurrency: int | None = None, per_host: int | None = None):
+        self.concurrency = max(1, concurrency or settings.batch_concurrency)
+        self.per_host = max(1, per_host or settings.batch_per_host)
+        self.jobs: dict[str, Job] = {}
+        self._ring: deque[Job] = deque()
+        self._host_active: Counter[str] = Counter()
+        self._wakeup = asyncio.Condition()
+        self._workers: list[asyncio.Task[None]] = []
+
+    async def submit(self, urls: list[str], runner: Runner) -> Job:
+        self._prune()
+        job = Job(urls, runner)
+        self.jobs[job.id] = job
+        if job.finished:
+            return job
+        self._ring.append(job)
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        await self._notify()
+        return job
+
+    async def run(self, urls: list[str], runner: Runner) -> list[BatchResult | None]:
+        """Submit a batch and wait for all of it."""
+        job = await self.submit(urls, runner)
+        try:
+            return await job.wait()
+        except asyncio.CancelledError:
+            await job.cancel()
+            raise
+
+    def get(self, job_id: str) -> Job | None:
+        self._prune()
+        return self.jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Job | None:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished:
+            await job.cancel()
+            await self._notify()
+        return job
+
+    async def _notify(self) -> None:
+        async with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _has_room(self, host: str) -> bool:
+        return self._host_active[host] < self.per_host
+
+    def _next(self) -> tuple[Job, int] | None:
+        for _ in range(len(self._ring)):
+            job = self._ring[0]
+            self._ring.rotate(-1)
+            if not job.queued:
+                self._ring.remove(job)
+                continue
+            index = job.take(self._has_room)
+            if index is not None:
+                if not job.queued:
+                    self._ring.remove(job)
+                return job, index
+        return None
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                await self._work_one()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # a worker that died would leave its share of every queue unserved
+                log.exception("batch worker failed; continuing")
+
+    async def _work_one(self) -> None:
+        async with self._wakeup:
+            picked = self._next()
+            while picked is None:
+                await self._wakeup.wait()
+                picked = self._next()
+            job, index = picked
+            host = job.hosts[index]
+            assert host is not None
+            self._host_active[host] += 1
+            job.running += 1
+        started = time.perf_counter()
+        url = job.urls[index]
+        try:
+            data = await job.runner(url)
+            result = BatchResult(index=index, url=url, data=data)
+        except FileNotFoundError:
+            result = BatchResult(index=index, url=url, error="website not found or unreachable")
+        except Exception as e:  # noqa: BLE001
+            result = BatchResult(index=index, url=url, error=str(e) or type(e).__name__)
+        finally:
+            async with self._wakeup:
+                self._host_active[host] -= 1
+                if not self._host_active[host]:
+                    del self._host_active[host]
+                job.running -= 1
+                self._wakeup.notify_all()
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        await job.record(result)
+
+    def _prune(self) -> None:
+        now = time.time()
+        horizon = now - settings.batch_job_ttl_seconds
+        data_horizon = now - settings.batch_result_ttl_seconds
+        done = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.finished_at or 0)
+        excess = len(done) - settings.batch_max_jobs
+        for i, job in enumerate(done):
+            if i < excess or (job.finished_at or 0) < horizon:
+                del self.jobs[job.id]
+            elif (job.finished_at or 0) < data_horizon:
+                # statuses are small; whole contexts, products included, are not
+                job.expire()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": len(self._workers),
+            "busy": sum(self._host_active.values()),
+            "jobs": len(self.jobs),
+            "queued": sum(len(j.queued) for j in self._ring),
+        }
+
+    async def aclose(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+_scheduler: JobScheduler | None = None
+_scheduler_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_scheduler() -> JobScheduler:
+    """The batch scheduler for the running loop, created on first use."""
+    global _scheduler, _scheduler_loop
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler_loop is not loop:
+        _scheduler = JobScheduler()
+        _scheduler_loop = loop
+    return _scheduler
+
+
+async def close_scheduler() -> None:
+    global _scheduler, _scheduler_loop
+    if _scheduler is not None:
+        scheduler, _scheduler, _scheduler_loop = _scheduler, None, None
+        await scheduler.aclose()
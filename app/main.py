@@ -1,22 +1,55 @@
 from __future__ import annotations
 
-import asyncio
-import contextlib
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+from typing import Any, Literal
 
-from fastapi import FastAPI, HTTPException, Request
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, ORJSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic_core import to_jsonable_python
 
-from .competitors import discover_and_fetch
+from .cache import cache_key, get_result_cache
+from .catalog_sync import sync_catalog
+from .competitors import discover_competitors, fetch_and_compare, fetch_competitors
 from .config import settings
-from .schemas import InsightsRequest, InsightsResponse
-from .scraper import get_insights
+from .http_cache import get_response_cache
+from .http_pool import close_http_pool, get_http_pool
+from .jobs import Job, close_scheduler, get_scheduler
+from .metrics import REGISTRY
+from .ratelimit import get_rate_limiter
+from .recrawl import (
+    RecrawlScheduler,
+    get_recrawl_scheduler,
+    start_recrawl_scheduler,
+    stop_recrawl_scheduler,
+)
+from .schemas import (
+    BatchJobStatus,
+    BatchRequest,
+    BrandContext,
+    CatalogDiff,
+    CatalogSyncRequest,
+    CatalogSyncResponse,
+    InsightsRequest,
+    InsightsResponse,
+    Product,
+    RecrawlRequest,
+    SearchKind,
+    SearchResponse,
+)
+from .scraper import ShopifyScraper, get_insights
+from .search import close_search_index, get_search_index, index_context
+from .workers import shutdown_executor
 
 try:
     from .persistence.db import Base, get_engine
-    from .persistence.save import save_brand_context
+    from .persistence.load import load_brand_context, query_products
+    from .persistence.writer import get_persist_writer
     _persistence_available = True
 except Exception:  # pragma: no cover - optional
     _persistence_available = False
@@ -38,66 +71,338 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/stats")
+async def stats() -> dict[str, Any]:
+    cache = get_result_cache()
+    rcache = get_response_cache()
+    limiter = get_rate_limiter()
+    recrawl = get_recrawl_scheduler()
+    search = get_search_index()
+    return {
+        "http_pool": get_http_pool().stats(),
+        "insights_cache": cache.stats() if cache is not None else None,
+        "response_cache": {"entries": len(rcache), "bytes": rcache.bytes} if rcache is not None else None,
+        "rate_limiter": limiter.stats() if limiter is not None else None,
+        "persistence": get_persist_writer().stats() if _persist_enabled() else None,
+        "batch": get_scheduler().stats(),
+        "recrawl": recrawl.stats() if recrawl is not None else None,
+        "search": search.stats() if search is not None else None,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of scrape, fetch and parse metrics plus pool/cache gauges."""
+    gauges: dict[str, float] = {f"http_pool_{k}": v for k, v in get_http_pool().stats().items()}
+    cache = get_result_cache()
+    if cache is not None:
+        gauges.update({f"insights_cache_{k}": v for k, v in cache.stats().items()})
+    rcache = get_response_cache()
+    if rcache is not None:
+        gauges.update({"response_cache_entries": len(rcache), "response_cache_bytes": rcache.bytes})
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        gauges.update({f"rate_limiter_{k}": v for k, v in limiter.stats().items()})
+    if _persist_enabled():
+        gauges.update({f"persist_{k}": v for k, v in get_persist_writer().stats().items()})
+    gauges.update({f"batch_{k}": v for k, v in get_scheduler().stats().items()})
+    recrawl = get_recrawl_scheduler()
+    if recrawl is not None:
+        gauges.update({f"recrawl_{k}": v for k, v in recrawl.stats().items()})
+    search = get_search_index()
+    if search is not None:
+        gauges.update({f"search_index_{k}": v for k, v in search.stats().items()})
+    return PlainTextResponse(REGISTRY.render(gauges), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     return templates.TemplateResponse("index_standalone.html", {"request": request})
 
 
+def _persist_enabled() -> bool:
+    return bool(settings.persist_enabled and settings.database_url and _persistence_available)
+
+
+async def _scrape_and_persist(req: InsightsRequest) -> BrandContext:
+    ctx = await get_insights(
+        str(req.website_url),
+        deadline=req.deadline_seconds,
+        sections=req.sections,
+        max_products=req.max_products,
+        include_timings=req.include_timings,
+    )
+    # optional persistence; section-limited, capped or cut-short results would overwrite the stored store
+    complete = not req.sections and not req.max_products and not ctx.partial()
+    if complete and _persist_enabled():
+        # written behind the response; the request never waits on the database
+        get_persist_writer().submit(ctx)
+    # section-limited scrapes only replace the kinds of documents they cover
+    await index_context(ctx, req.sections)
+    return ctx
+
+
+async def _cached_insights(req: InsightsRequest) -> BrandContext:
+    cache = get_result_cache()
+    # timings describe one scrape, so a cached result would report someone else's
+    if cache is None or req.include_timings:
+        return await _scrape_and_persist(req)
+    key = cache_key(str(req.website_url), req.sections, req.max_products)
+    return await cache.get_or_load(key, lambda: _scrape_and_persist(req))
+
+
 @app.post("/api/insights", response_model=InsightsResponse)
 async def insights(req: InsightsRequest):
     try:
-        ctx = await get_insights(req.website_url)
-        # optional persistence
-        if settings.persist_enabled and settings.database_url and _persistence_available:
-            with contextlib.suppress(Exception):
-                await save_brand_context(ctx)
-        return {"data": ctx}
+        return {"data": await _cached_insights(req)}
     except FileNotFoundError as e:
         raise HTTPException(status_code=401, detail="website not found or unreachable") from e
     except Exception as e:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+def _encode_event(field: str, value: object, fmt: str) -> bytes:
+    data = orjson.dumps(to_jsonable_python(value))
+    if fmt == "sse":
+        return b"event: " + field.encode() + b"\ndata: " + data + b"\n\n"
+    return orjson.dumps({"event": field, "data": orjson.Fragment(data)}) + b"\n"
+
+
+@app.post("/api/insights/stream")
+async def insights_stream(req: InsightsRequest, format: Literal["ndjson", "sse"] = "ndjson") -> StreamingResponse:
+    """Streams sections as they finish and products one catalog page at a time."""
+    events = ShopifyScraper(
+        str(req.website_url),
+        deadline=req.deadline_seconds,
+        sections=req.sections,
+        max_products=req.max_products,
+        include_timings=req.include_timings,
+    ).stream()
+    try:
+        # pull the first event up front so an unreachable store is still a plain 401
+        first = await anext(events)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=401, detail="website not found or unreachable") from e
+
+    async def body() -> AsyncIterator[bytes]:
+        yield _encode_event(*first, format)
+        async for field, value in events:
+            yield _encode_event(field, value, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+@app.get("/api/stores/{domain}", response_model=InsightsResponse)
+async def stored_insights(domain: str) -> dict[str, BrandContext]:
+    """The last persisted scrape of a store, served from the database without touching the store."""
+    if not _persist_enabled():
+        raise HTTPException(status_code=503, detail="persistence is not enabled")
+    ctx = await load_brand_context(domain)
+    if ctx is None:
+        raise HTTPException(status_code=404, detail="store not found")
+    return {"data": ctx}
+
+
+@app.get("/api/stores/{domain}/products", response_model=list[Product])
+async def stored_products(
+    domain: str,
+    vendor: str | None = None,
+    product_type: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+) -> list[Product]:
+    """Persisted products of a store, filtered on the indexed vendor, type and price columns."""
+    if not _persist_enabled():
+        raise HTTPException(status_code=503, detail="persistence is not enabled")
+    products = await query_products(
+        domain,
+        vendor=vendor,
+        product_type=product_type,
+        min_price=min_price,
+        max_price=max_price,
+        limit=limit,
+        offset=offset,
+    )
+    if products is None:
+        raise HTTPException(status_code=404, detail="store not found")
+    return products
+
+
+@app.post("/api/batch", response_model=BatchJobStatus, status_code=202)
+async def batch_submit(req: BatchRequest) -> BatchJobStatus:
+    """Queue many stores on the shared scheduler; poll or stream the job for results."""
+    if len(req.urls) > settings.batch_max_urls:
+        raise HTTPException(status_code=422, detail=f"at most {settings.batch_max_urls} urls per batch")
+
+    async def run(url: str) -> BrandContext:
+        return await _cached_insights(
+            InsightsRequest(
+                website_url=url,
+                deadline_seconds=req.deadline_seconds,
+                sections=req.sections,
+                max_products=req.max_products,
+            )
+        )
+
+    job = await get_scheduler().submit([str(u) for u in req.urls], run)
+    return job.status(include_results=False)
+
+
+def _job(job_id: str) -> Job:
+    job = get_scheduler().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@app.get("/api/batch/{job_id}", response_model=BatchJobStatus)
+async def batch_status(job_id: str, results: bool = True) -> BatchJobStatus:
+    return _job(job_id).status(include_results=results)
+
+
+@app.get("/api/batch/{job_id}/stream")
+async def batch_stream(job_id: str, format: Literal["ndjson", "sse"] = "ndjson") -> StreamingResponse:
+    """Per-store results as they complete (finished ones first), then a final ``done`` status."""
+    job = _job(job_id)
+
+    async def body() -> AsyncIterator[bytes]:
+        async for result in job.follow():
+            yield _encode_event("result", result, format)
+        yield _encode_event("done", job.status(include_results=False), format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+@app.delete("/api/batch/{job_id}", response_model=BatchJobStatus)
+async def batch_cancel(job_id: str) -> BatchJobStatus:
+    """Drop the stores not started yet; those already running finish and are kept."""
+    _job(job_id)
+    job = await get_scheduler().cancel(job_id)
+    assert job is not None
+    return job.status(include_results=False)
+
+
+@app.post("/api/catalog/sync", response_model=CatalogSyncResponse)
+async def catalog_sync(req: CatalogSyncRequest) -> dict[str, CatalogDiff]:
+    """Products added, changed and removed since this store's previous sync."""
+    try:
+        return {"data": await sync_catalog(str(req.website_url), full=req.full)}
+    except Exception as e:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+def _recrawler() -> RecrawlScheduler:
+    scheduler = get_recrawl_scheduler()
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail="recrawling is disabled (RECRAWL_ENABLED)")
+    return scheduler
+
+
+@app.post("/api/recrawl/stores")
+async def recrawl_track(req: RecrawlRequest) -> dict[str, list[dict[str, Any]]]:
+    """Track stores for background recrawls; new ones are crawled straight away."""
+    scheduler = _recrawler()
+    return {"tracked": [asdict(await scheduler.track(str(url))) for url in req.urls]}
+
+
+@app.delete("/api/recrawl/stores")
+async def recrawl_untrack(url: str) -> dict[str, str]:
+    if not await _recrawler().untrack(url):
+        raise HTTPException(status_code=404, detail="store is not tracked")
+    return {"removed": url}
+
+
+@app.get("/api/recrawl/stats")
+async def recrawl_stats() -> dict[str, float]:
+    return _recrawler().stats()
+
+
+async def _recrawled(ctx: BrandContext) -> None:
+    # a recrawl is a full scrape, so it refreshes the cache and the database like a request would
+    cache = get_result_cache()
+    if cache is not None:
+        await cache.put(cache_key(str(ctx.site_url)), ctx)
+    if _persist_enabled() and not ctx.partial():
+        get_persist_writer().submit(ctx)
+    await index_context(ctx)
+
+
+@app.get("/api/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    kind: SearchKind | None = None,
+    store: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+) -> SearchResponse:
+    """Products, FAQs and policies of every scraped store, best BM25 match first."""
+    index = get_search_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="search is disabled (SEARCH_ENABLED)")
+    started = time.perf_counter()
+    total, hits = index.search(q, kind=kind, store=store.lower() if store else None, limit=limit)
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+    return SearchResponse(query=q, total=total, took_ms=took_ms, hits=hits)
+
+
 @app.on_event("startup")
 async def _startup():  # pragma: no cover - side-effectful
-    if settings.persist_enabled and settings.database_url and _persistence_available:
+    get_http_pool()
+    if _persist_enabled():
         # initialize tables
         engine = get_engine()
         Base.metadata.create_all(bind=engine)
+    # loads the saved index before the first request needs it
+    get_search_index()
+    if settings.recrawl_enabled:
+        await start_recrawl_scheduler(on_result=_recrawled)
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:  # pragma: no cover - side-effectful
+    # stopped first: its results feed the persist writer
+    await stop_recrawl_scheduler()
+    if _persist_enabled():
+        await get_persist_writer().close()
+    await close_scheduler()
+    await close_search_index()
+    shutdown_executor()
+    await close_http_pool()
 
 
 @app.post("/api/insights/competitors", response_model=dict)
 async def insights_competitors(payload: dict):
-    """Bonus: Accepts { website_url: str, competitor_urls?: [str], auto_discover?: bool, limit?: int }
+    """Bonus: Accepts { website_url: str, competitor_urls?: [str], auto_discover?: bool, limit?: int, compare?: bool }
     - If competitor_urls provided, uses them.
     - Else if auto_discover true and Bing or Gemini key set, discovers via Bing/Gemini and fetches.
     - Else returns empty with a note.
+    - With compare, the brand is scraped too and a ``comparison`` matrix is added.
     """
     website_url = payload.get("website_url")
     competitor_urls = payload.get("competitor_urls") or []
     auto_discover = bool(payload.get("auto_discover"))
+    compare = bool(payload.get("compare"))
     limit = int(payload.get("limit") or 5)
     if not website_url:
         raise HTTPException(status_code=422, detail="website_url required")
 
-    results = []
+    body: dict = {"website_url": website_url}
     if not competitor_urls:
-        if auto_discover and (settings.bing_search_api_key or settings.gemini_api_key):
-            results = await discover_and_fetch(website_url, limit=limit)
-            return {"website_url": website_url, "competitors": results, "discovered": True}
-        return {"website_url": website_url, "competitors": results, "note": "Provide competitor_urls or set auto_discover=true with Bing or Gemini key."}
+        if not (auto_discover and (settings.bing_search_api_key or settings.gemini_api_key)):
+            return {**body, "competitors": [], "note": "Provide competitor_urls or set auto_discover=true with Bing or Gemini key."}
+        competitor_urls = await discover_competitors(website_url, limit)
+        body["discovered"] = True
+        if not competitor_urls:
+            return {**body, "competitors": []}
 
-    # fetch in parallel
-    tasks = [get_insights(u) for u in competitor_urls]
     try:
-        contexts = await asyncio.gather(*tasks, return_exceptions=True)
+        if compare:
+            results, body["comparison"] = await fetch_and_compare(website_url, competitor_urls)
+        else:
+            results = await fetch_competitors(competitor_urls)
     except Exception as e:  # defensive
         raise HTTPException(status_code=500, detail=str(e)) from e
-
-    for url, ctx in zip(competitor_urls, contexts, strict=True):
-        if isinstance(ctx, Exception):
-            results.append({"url": url, "error": str(ctx)})
-        else:
-            results.append({"url": url, "data": ctx})
-
-    return {"website_url": website_url, "competitors": results}
+    return {**body, "competitors": results}
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import bisect
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from .schemas import FetchTiming, ParseTiming, ScrapeTimings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # per label set: bucket counts (last one is +Inf), sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._values.items()):
+            running = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                running += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total[0]:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Histogram:
+        metric = Histogram(name, help, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, gauges: dict[str, float] | None = None) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, value in (gauges or {}).items():
+            lines.extend([f"# TYPE {name} gauge", f"{name} {value:g}"])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+SCRAPES = REGISTRY.counter("scraper_scrapes_total", "Scrapes finished, by outcome.", ("outcome",))
+SCRAPE_SECONDS = REGISTRY.histogram("scraper_scrape_seconds", "Wall time of whole scrapes.")
+STAGE_SECONDS = REGISTRY.histogram("scraper_stage_seconds", "Wall time per scrape stage.", ("stage",))
+FETCH_SECONDS = REGISTRY.histogram("scraper_fetch_seconds", "Duration of storefront fetches.", ("kind",))
+FETCHES = REGISTRY.counter("scraper_fetches_total", "Storefront fetches by kind and status.", ("kind", "status"))
+FETCH_BYTES = REGISTRY.counter("scraper_fetch_bytes_total", "Response bytes received.", ("kind",))
+FETCH_RETRIES = REGISTRY.counter("scraper_fetch_retries_total", "Fetch retries.", ("kind",))
+FETCH_CUT = REGISTRY.counter(
+    "scraper_fetch_cut_total", "Bodies not read in full, by reason (content_type, max_bytes, excerpt).", ("kind", "reason")
+)
+PARSE_SECONDS = REGISTRY.histogram("scraper_parse_seconds", "HTML parse/extract duration.", ("fn",))
+
+
+def fetch_kind(url: str, root: str) -> str:
+    path = url[len(root) :] if url.startswith(root) else url
+    if path in ("", "/"):
+        return "home"
+    if path.startswith("/products.json"):
+        return "catalog"
+    if "/sitemap" in path.split("?", 1)[0]:
+        return "sitemap"
+    return "page"
+
+
+class ScrapeTrace:
+    """Timings of one scrape; every record also feeds the process-wide metrics."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.fetches: list[FetchTiming] = []
+        self.parses: list[ParseTiming] = []
+
+    def fetch(
+        self,
+        url: str,
+        status: int,
+        size: int,
+        ms: float,
+        retries: int = 0,
+        revalidated: bool = False,
+        cut: str | None = None,
+    ) -> None:
+        kind = fetch_kind(url, self.root)
+        self.fetches.append(
+            FetchTiming(
+                url=url, kind=kind, status=status, bytes=size, ms=round(ms, 2), retries=retries, revalidated=revalidated, cut=cut
+            )
+        )
+        FETCH_SECONDS.observe(ms / 1000, kind=kind)
+        FETCHES.inc(kind=kind, status=str(status))
+        FETCH_BYTES.inc(size, kind=kind)
+        if retries:
+            FETCH_RETRIES.inc(retries, kind=kind)
+        if cut:
+            FETCH_CUT.inc(kind=kind, reason=cut)
+
+    def parse(self, fn: str, size: int, ms: float) -> None:
+        self.parses.append(ParseTiming(fn=fn, bytes=size, ms=round(ms, 2)))
+        PARSE_SECONDS.observe(ms / 1000, fn=fn)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages[name] = round(elapsed * 1000, 2)
+            STAGE_SECONDS.observe(elapsed, stage=name)
+
+    def finish(self, outcome: str) -> None:
+        SCRAPES.inc(outcome=outcome)
+        SCRAPE_SECONDS.observe(time.perf_counter() - self.started)
+
+    def timings(self) -> ScrapeTimings:
+        return ScrapeTimings(
+            total_ms=round((time.perf_counter() - self.started) * 1000, 2),
+            requests=len(self.fetches),
+            bytes=sum(f.bytes for f in self.fetches),
+            stages=dict(self.stages),
+            fetches=list(self.fetches),
+            parses=list(self.parses),
+        )
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import urllib.parse
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from .dom import Document
+from .utils import absolutize, social_network
+
+
+@dataclass(frozen=True, slots=True)
+class Anchor:
+    text: str
+    text_lower: str
+    href: str
+    href_lower: str
+    url: str | None
+    host: str
+
+
+def _root_relative(href: str) -> bool:
+    # "/path?query#fragment" with no dot segments to resolve and nothing urlsplit would strip
+    return href.startswith("/") and not href.startswith("//") and "/." not in href and "\\" not in href and href.isprintable()
+
+
+class LinkIndex:
+    """Every ``a[href]`` of a document, normalized once and queried by keyword."""
+
+    def __init__(self, anchors: list[Anchor]):
+        self.anchors = anchors
+        self._candidates: dict[tuple[str, bool, bool], list[Anchor]] = {}
+
+    @classmethod
+    def from_document(cls, doc: Document, base: str) -> LinkIndex:
+        anchors = []
+        split = urllib.parse.urlsplit(base)
+        origin, base_host = f"{split.scheme}://{split.netloc}", split.netloc.lower()
+        for a in doc.select("a[href]"):
+            href = doc.attr(a, "href") or ""
+            text = doc.text(a)
+            target = href.strip()
+            if _root_relative(target):
+                # what urljoin would return, without parsing the URL twice per anchor
+                url: str | None = origin + target
+                host = base_host
+            else:
+                url = absolutize(base, target)
+                host = urllib.parse.urlparse(url).netloc.lower() if url else ""
+            anchors.append(
+                Anchor(
+                    text=text,
+                    text_lower=text.lower(),
+                    href=href,
+                    href_lower=href.lower(),
+                    url=url,
+                    host=host,
+                )
+            )
+        return cls(anchors)
+
+    def __len__(self) -> int:
+        return len(self.anchors)
+
+    def candidates(self, key: str, *, in_text: bool = True, in_href: bool = True) -> list[Anchor]:
+        """Anchors whose text and/or href contain ``key``, in document order."""
+        memo_key = (key, in_text, in_href)
+        found = self._candidates.get(memo_key)
+        if found is None:
+            found = [
+                a
+                for a in self.anchors
+                if (in_href and key in a.href_lower) or (in_text and key in a.text_lower)
+            ]
+            self._candidates[memo_key] = found
+        return found
+
+    def first(self, key: str, *, in_text: bool = True, in_href: bool = True) -> Anchor | None:
+        found = self.candidates(key, in_text=in_text, in_href=in_href)
+        return found[0] if found else None
+
+    def matching(self, keys: Iterable[str], *, in_text: bool = True, in_href: bool = True) -> list[Anchor]:
+        """Anchors matching any of ``keys``, in document order and without repeats."""
+        hits: set[int] = set()
+        for key in keys:
+            hits.update(id(a) for a in self.candidates(key, in_text=in_text, in_href=in_href))
+        return [a for a in self.anchors if id(a) in hits]
+
+    def socials(self) -> dict[str, str]:
+        socials: dict[str, str] = {}
+        for a in self.anchors:
+            if not a.url:
+                continue
+            name = social_network(a.host)
+            if name:
+                socials.setdefault(name, a.url)
+        return socials
+
+
+@dataclass
+class Page:
+    """Compact, picklable result of parsing one document off the event loop."""
+
+    url: str
+    links: LinkIndex
+    title: str | None = None
+    currency: str | None = None
+    hero_products: list[str] = field(default_factory=list)
+    faqs: list[tuple[str, str | None]] = field(default_factory=list)
+    emails: list[str] = field(default_factory=list)
+    phones: list[str] = field(default_factory=list)
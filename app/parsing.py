@@ -0,0 +1,118 @@
+"""Synchronous parse/extract functions.
+
+Everything here takes raw HTML and returns plain, picklable values so it can run in
+the worker pool from ``workers.py`` without handing parsed trees across. Documents
+are read through ``dom.Document``, so every extractor runs on either backend.
+"""
+
+from __future__ import annotations
+
+import re
+
+from .dom import Document, parse_document
+from .page import LinkIndex, Page
+from .schemas import Product
+from .utils import absolutize, find_emails, find_phones, unique
+
+# themes set ``Shopify.currency = {"active":"EUR","rate":"1.0"}`` in an inline script
+SHOPIFY_CURRENCY_RE = re.compile(r'Shopify\.currency\s*=\s*\{[^}]*"active"\s*:\s*"([A-Z]{3})"')
+
+
+def _faqs(doc: Document) -> list[tuple[str, str | None]]:
+    faqs: list[tuple[str, str | None]] = []
+    # Common FAQ patterns: details/summary, accordions, headings followed by content
+    for d in doc.select("details"):  # native disclosure
+        q = doc.text(doc.select_one("summary", d))
+        a = doc.text(d)
+        if q:
+            faqs.append((q, a))
+    # accordions
+    for qel in doc.select(".accordion__title, .faq__question, h3, h4"):
+        q = doc.text(qel)
+        if not q or len(q) > 160:
+            continue
+        # answer might be the next sibling or within parent
+        ans_candidates = [doc.next_element(qel), doc.parent(qel)]
+        answer = None
+        for c in ans_candidates:
+            if c is None:
+                continue
+            t = doc.text(c)
+            if t and len(t) > len(q) + 10:
+                answer = t
+                break
+        if q and answer:
+            faqs.append((q, answer))
+    return faqs
+
+
+def _currency(doc: Document, html: str) -> str | None:
+    match = SHOPIFY_CURRENCY_RE.search(html)
+    if match:
+        return match.group(1)
+    meta = doc.select_one("meta[property='og:price:currency'], meta[itemprop='priceCurrency']")
+    content = (doc.attr(meta, "content") or "").strip().upper() if meta is not None else ""
+    return content if len(content) == 3 and content.isalpha() else None
+
+
+def parse_home(html: str, url: str) -> Page:
+    doc = parse_document(html)
+    hero = []
+    for a in doc.select("section a[href*='/products/'], .hero a[href*='/products/']"):
+        href = absolutize(url, doc.attr(a, "href"))
+        if href:
+            hero.append(href)
+    text = doc.text(doc.root)
+    return Page(
+        url=url,
+        links=LinkIndex.from_document(doc, url),
+        title=doc.text(doc.select_one("title")) or None,
+        currency=_currency(doc, html),
+        hero_products=unique(hero),
+        faqs=_faqs(doc),
+        emails=find_emails(text),
+        phones=find_phones(text),
+    )
+
+
+def parse_faq_page(html: str, url: str) -> Page:
+    doc = parse_document(html)
+    return Page(url=url, links=LinkIndex.from_document(doc, url), faqs=_faqs(doc))
+
+
+def parse_excerpt(html: str, selector: str, limit: int, whole_page_fallback: bool = False) -> str:
+    doc = parse_document(html, (selector,))
+    # only the first ``limit`` characters are collected, not the text of the whole subtree
+    content = doc.text(doc.select_one(selector), limit)
+    if not content and whole_page_fallback:
+        content = doc.text(doc.root, limit)
+    return content
+
+
+def parse_html_products(html: str, root: str) -> list[Product]:
+    doc = parse_document(html)
+    products: list[Product] = []
+    selectors = [
+        ".grid-product", ".product-card", ".product-item", ".product-grid-item",
+        "[data-product]", "article.product"
+    ]
+    for sel in selectors:
+        for card in doc.select(sel):
+            title_el = doc.select_one(".product-title, .card__heading, .grid-product__title, a[title]", card)
+            title = doc.text(title_el)
+            url = doc.attr(title_el, "href") if title_el is not None else doc.attr(card, "href")
+            url = absolutize(root, url)
+            if not title and not url:
+                continue
+            img_el = doc.select_one("img", card)
+            img = doc.attr(img_el, "src") or doc.attr(img_el, "data-src") if img_el is not None else None
+            products.append(Product(title=title or url or "", url=img and url, images=[img] if img else []))
+    # de-duplicate by url/title
+    seen = set()
+    deduped = []
+    for p in products:
+        key = (p.url or "", p.title)
+        if key not in seen:
+            seen.add(key)
+            deduped.append(p)
+    return deduped
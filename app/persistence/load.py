@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+
+from ..schemas import BrandContext, ContactInfo, FAQItem, Link, Policy, Product
+from .db import get_engine
+from .models import ProductORM, Store
+
+
+def _product(row: ProductORM) -> Product:
+    return Product(
+        id=row.external_id,
+        handle=row.handle,
+        title=row.title or "",
+        url=row.url,
+        price=row.price,
+        currency=row.currency,
+        images=row.images or [],
+        tags=row.tags or [],
+        available=row.available,
+        vendor=row.vendor,
+        product_type=row.product_type,
+    )
+
+
+def _store_id(session: Session, domain: str) -> int | None:
+    # domain is not unique (http:// and https:// rows of one store): the last scraped row wins
+    return session.scalar(
+        select(Store.id)
+        .where(Store.domain == domain.lower())
+        .order_by(Store.scraped_at.desc(), Store.id.desc())
+        .limit(1)
+    )
+
+
+def load_brand_context_sync(domain: str, engine: Engine | None = None) -> BrandContext | None:
+    """The last stored scrape of ``domain``, rebuilt from the normalized tables."""
+    with Session(engine or get_engine()) as session:
+        store_id = _store_id(session, domain)
+        if store_id is None:
+            return None
+        store = session.execute(
+            select(Store)
+            .where(Store.id == store_id)
+            .options(
+                selectinload(Store.policies),
+                selectinload(Store.faqs),
+                selectinload(Store.contacts),
+                selectinload(Store.socials),
+                selectinload(Store.links),
+            )
+        ).scalar_one()
+        products = session.scalars(
+            select(ProductORM).where(ProductORM.store_id == store.id).order_by(ProductORM.id)
+        ).all()
+        return BrandContext(
+            site_url=store.site_url,
+            site_name=store.site_name,
+            domain=store.domain,
+            catalog_count=store.catalog_count,
+            products=[_product(p) for p in products],
+            hero_products=[link.url for link in store.links if link.kind == "hero"],
+            policies=[Policy(name=p.name, url=p.url, content_excerpt=p.content_excerpt) for p in store.policies],
+            faqs=[FAQItem(question=f.question, answer=f.answer) for f in store.faqs],
+            social_handles={s.network: s.url for s in store.socials},
+            contact=ContactInfo(
+                emails=[c.value for c in store.contacts if c.kind == "email"],
+                phones=[c.value for c in store.contacts if c.kind == "phone"],
+                address=store.contact_address,
+                contact_page_url=store.contact_page_url,
+            ),
+            about_text=store.about_text,
+            important_links=[Link(title=link.title or "", url=link.url) for link in store.links if link.kind == "important"],
+        )
+
+
+def query_products_sync(
+    domain: str,
+    *,
+    vendor: str | None = None,
+    product_type: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    engine: Engine | None = None,
+) -> list[Product] | None:
+    """Stored products of ``domain`` filtered on the indexed columns; None for an unknown store."""
+    with Session(engine or get_engine()) as session:
+        store_id = _store_id(session, domain)
+        if store_id is None:
+            return None
+        query = select(ProductORM).where(ProductORM.store_id == store_id)
+        if vendor is not None:
+            query = query.where(ProductORM.vendor == vendor)
+        if product_type is not None:
+            query = query.where(ProductORM.product_type == product_type)
+        if min_price is not None:
+            query = query.where(ProductORM.price >= min_price)
+        if max_price is not None:
+            query = query.where(ProductORM.price <= max_price)
+        rows = session.scalars(query.order_by(ProductORM.price, ProductORM.id).limit(limit).offset(offset)).all()
+        return [_product(row) for row in rows]
+
+
+async def load_brand_context(domain: str, engine: Engine | None = None) -> BrandContext | None:
+    return await asyncio.to_thread(load_brand_context_sync, domain, engine)
+
+
+async def query_products(domain: str, **filters: Any) -> list[Product] | None:
+    return await asyncio.to_thread(query_products_sync, domain, **filters)
@@ -1,34 +1,109 @@
 from __future__ import annotations
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
 
 
 class Store(Base):
     __tablename__ = "stores"
-    id = Column(Integer, primary_key=True)
-    site_url = Column(String(500), unique=True, nullable=False)
-    site_name = Column(String(255))
-    domain = Column(String(255))
-    about_text = Column(Text)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    site_url: Mapped[str] = mapped_column(String(500), unique=True)
+    site_name: Mapped[str | None] = mapped_column(String(255))
+    domain: Mapped[str | None] = mapped_column(String(255), index=True)
+    about_text: Mapped[str | None] = mapped_column(Text)
+    catalog_count: Mapped[int | None] = mapped_column(Integer)
+    contact_address: Mapped[str | None] = mapped_column(Text)
+    contact_page_url: Mapped[str | None] = mapped_column(String(1000))
+    scraped_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    # digest of every non-product section; they are only rewritten when it changes
+    sections_hash: Mapped[str | None] = mapped_column(String(32))
 
-    products = relationship("ProductORM", back_populates="store", cascade="all, delete-orphan")
+    products: Mapped[list[ProductORM]] = relationship("ProductORM", back_populates="store", cascade="all, delete-orphan")
+    policies: Mapped[list[PolicyORM]] = relationship("PolicyORM", cascade="all, delete-orphan", order_by="PolicyORM.position")
+    faqs: Mapped[list[FAQORM]] = relationship("FAQORM", cascade="all, delete-orphan", order_by="FAQORM.position")
+    contacts: Mapped[list[ContactORM]] = relationship("ContactORM", cascade="all, delete-orphan", order_by="ContactORM.position")
+    socials: Mapped[list[SocialORM]] = relationship("SocialORM", cascade="all, delete-orphan")
+    links: Mapped[list[LinkORM]] = relationship("LinkORM", cascade="all, delete-orphan", order_by="LinkORM.position")
 
 
 class ProductORM(Base):
     __tablename__ = "products"
-    id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"))
-    external_id = Column(String(255))
-    handle = Column(String(255))
-    title = Column(String(512))
-    url = Column(String(1000))
-    price = Column(String(64))
-    currency = Column(String(16))
-    available = Column(Boolean)
-    vendor = Column(String(255))
-    product_type = Column(String(255))
-
-    store = relationship("Store", back_populates="products")
+    # upserts are keyed on this; see save.py
+    __table_args__ = (UniqueConstraint("store_id", "external_id", name="uq_products_store_external"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("stores.id"))
+    external_id: Mapped[str | None] = mapped_column(String(255))
+    handle: Mapped[str | None] = mapped_column(String(255))
+    title: Mapped[str | None] = mapped_column(String(512))
+    url: Mapped[str | None] = mapped_column(String(1000))
+    price: Mapped[float | None] = mapped_column(Numeric(14, 4, asdecimal=False), index=True)
+    currency: Mapped[str | None] = mapped_column(String(16))
+    available: Mapped[bool | None] = mapped_column(Boolean)
+    vendor: Mapped[str | None] = mapped_column(String(255), index=True)
+    product_type: Mapped[str | None] = mapped_column(String(255), index=True)
+    images: Mapped[list[str] | None] = mapped_column(JSON)
+    tags: Mapped[list[str] | None] = mapped_column(JSON)
+    # digest of the columns above; rows whose digest is unchanged are not rewritten
+    content_hash: Mapped[str | None] = mapped_column(String(32))
+
+    store: Mapped[Store] = relationship("Store", back_populates="products")
+
+
+class PolicyORM(Base):
+    __tablename__ = "policies"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, ForeignKey("stores.id"), index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    name: Mapped[str] = mapped_column(String(255))
+    url: Mapped[str | None] = mapped_column(String(1000))
+    content_excerpt: Mapped[str | None] = mapped_column(Text)
+
+
+class FAQORM(Base):
+    __tablename__ = "faqs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, ForeignKey("stores.id"), index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    question: Mapped[str] = mapped_column(Text)
+    answer: Mapped[str | None] = mapped_column(Text)
+
+
+class ContactORM(Base):
+    __tablename__ = "contact_points"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, ForeignKey("stores.id"), index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    kind: Mapped[str] = mapped_column(String(16))  # "email" or "phone"
+    value: Mapped[str] = mapped_column(String(255))
+
+
+class SocialORM(Base):
+    __tablename__ = "social_handles"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, ForeignKey("stores.id"), index=True)
+    network: Mapped[str] = mapped_column(String(64))
+    url: Mapped[str] = mapped_column(String(1000))
+
+
+class LinkORM(Base):
+    __tablename__ = "store_links"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    store_id: Mapped[int] = mapped_column(Integer, ForeignKey("stores.id"), index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    kind: Mapped[str] = mapped_column(String(16))  # "important" or "hero"
+    title: Mapped[str | None] = mapped_column(String(255))
+    url: Mapped[str] = mapped_column(String(1000))
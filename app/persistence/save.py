@@ -1,42 +1,189 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+import asyncio
+import hashlib
+from collections.abc import Iterator, Sequence
+from datetime import UTC, datetime
+from typing import Any
 
+import orjson
+from sqlalchemy import Executable, Table, delete, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..config import settings
 from ..schemas import BrandContext
-from .db import get_session
-from .models import ProductORM, Store
+from .db import get_engine
+from .models import FAQORM, ContactORM, LinkORM, PolicyORM, ProductORM, SocialORM, Store
+
+PRODUCT_COLUMNS = (
+    "handle",
+    "title",
+    "url",
+    "price",
+    "currency",
+    "available",
+    "vendor",
+    "product_type",
+    "images",
+    "tags",
+)
+
+
+def _product_rows(ctx: BrandContext, store_id: int) -> dict[str, dict[str, Any]]:
+    rows: dict[str, dict[str, Any]] = {}
+    for p in ctx.products:
+        key = str(p.id) if p.id is not None else p.handle
+        if not key:
+            continue
+        row = {
+            "handle": p.handle,
+            "title": p.title,
+            "url": str(p.url) if p.url else None,
+            "price": p.price,
+            "currency": p.currency,
+            "available": p.available,
+            "vendor": p.vendor,
+            "product_type": p.product_type,
+            "images": p.images,
+            "tags": p.tags,
+        }
+        digest = _digest([row[c] for c in PRODUCT_COLUMNS])
+        # a repeated id keeps its last occurrence; one statement may not touch a row twice
+        rows[key] = {**row, "store_id": store_id, "external_id": key, "content_hash": digest}
+    return rows
+
+
+def _digest(value: Any) -> str:
+    return hashlib.blake2b(orjson.dumps(value), digest_size=16).hexdigest()
+
+
+SectionModel = type[PolicyORM] | type[FAQORM] | type[ContactORM] | type[SocialORM] | type[LinkORM]
+
+
+def _section_rows(ctx: BrandContext) -> dict[SectionModel, list[dict[str, Any]]]:
+    contacts = [("email", e) for e in ctx.contact.emails] + [("phone", p) for p in ctx.contact.phones]
+    links = [("hero", None, url) for url in ctx.hero_products] + [
+        ("important", link.title, str(link.url)) for link in ctx.important_links
+    ]
+    return {
+        PolicyORM: [
+            {"position": i, "name": p.name, "url": str(p.url) if p.url else None, "content_excerpt": p.content_excerpt}
+            for i, p in enumerate(ctx.policies)
+        ],
+        FAQORM: [{"position": i, "question": f.question, "answer": f.answer} for i, f in enumerate(ctx.faqs)],
+        ContactORM: [{"position": i, "kind": kind, "value": value} for i, (kind, value) in enumerate(contacts)],
+        SocialORM: [{"network": network, "url": url} for network, url in ctx.social_handles.items()],
+        LinkORM: [
+            {"position": i, "kind": kind, "title": title, "url": url} for i, (kind, title, url) in enumerate(links)
+        ],
+    }
+
+
+def _save_sections(session: Session, store: Store, ctx: BrandContext) -> bool:
+    """Replace the store's policies, FAQs, contacts, socials and links if any of them changed."""
+    sections = _section_rows(ctx)
+    digest = _digest([[m.__tablename__, rows] for m, rows in sections.items()])
+    if store.sections_hash == digest:
+        return False
+    for model, rows in sections.items():
+        session.execute(delete(model).where(model.store_id == store.id))
+        if rows:
+            session.execute(insert(model), [{**row, "store_id": store.id} for row in rows])
+    store.sections_hash = digest
+    return True
 
 
-async def save_brand_context(ctx: BrandContext):
-    # Using a sync session inside async path; simple demo. For production, use async engine.
-    session = get_session()
-    try:
+def _chunks(rows: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def upsert(session: Session, table: Table, rows: Sequence[dict[str, Any]], keys: Sequence[str], batch_size: int) -> None:
+    """INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE, executed for ``batch_size`` rows at a time.
+
+    One compiled statement runs as an executemany per batch, which the drivers
+    send as multi-row inserts (pymysql rewrites, SQLAlchemy's insertmanyvalues).
+    Raises ValueError on a dialect other than SQLite, PostgreSQL, MySQL or MariaDB.
+    """
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    columns = [c for c in rows[0] if c not in keys]
+    stmt: Executable
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        lite = sqlite_insert(table)
+        stmt = lite.on_conflict_do_update(index_elements=list(keys), set_={c: lite.excluded[c] for c in columns})
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        pg = pg_insert(table)
+        stmt = pg.on_conflict_do_update(index_elements=list(keys), set_={c: pg.excluded[c] for c in columns})
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        my = mysql_insert(table)
+        stmt = my.on_duplicate_key_update({c: my.inserted[c] for c in columns})
+    else:
+        raise ValueError(f"No upsert support for the {dialect} dialect")
+    for batch in _chunks(rows, max(1, batch_size)):
+        session.execute(stmt, list(batch))
+
+
+def save_brand_context_sync(ctx: BrandContext, engine: Engine | None = None) -> dict[str, int]:
+    """Write a complete scrape; only new or changed product rows are sent to the database.
+
+    Partial results are excluded: a context whose sections were cut at the
+    deadline or failed is not written at all (its missing sections would
+    replace the stored ones), and callers must not pass section-limited
+    scrapes. Stored products missing from ``ctx`` are only deleted when it
+    holds the full catalog; a capped or interrupted walk just upserts what
+    it read.
+    """
+    if ctx.partial():
+        return {"skipped": 1}
+    batch_size = settings.persist_batch_size
+    with Session(engine or get_engine()) as session:
         store = session.execute(select(Store).where(Store.site_url == str(ctx.site_url))).scalar_one_or_none()
         if not store:
-            store = Store(site_url=str(ctx.site_url), site_name=ctx.site_name, domain=ctx.domain, about_text=ctx.about_text)
+            store = Store(site_url=str(ctx.site_url))
             session.add(store)
-            session.flush()
-        else:
-            store.site_name = ctx.site_name
-            store.domain = ctx.domain
-            store.about_text = ctx.about_text
-        # naive replace of products for demo
-        session.query(ProductORM).filter(ProductORM.store_id == store.id).delete()
-        for p in ctx.products[:1000]:  # limit
-            session.add(
-                ProductORM(
-                    store_id=store.id,
-                    external_id=str(p.id) if p.id is not None else None,
-                    handle=p.handle,
-                    title=p.title,
-                    url=str(p.url) if p.url else None,
-                    price=str(p.price) if p.price is not None else None,
-                    currency=p.currency,
-                    available=p.available,
-                    vendor=p.vendor,
-                    product_type=p.product_type,
-                )
+        store.site_name = ctx.site_name
+        store.domain = ctx.domain.lower() if ctx.domain else None
+        store.about_text = ctx.about_text
+        store.catalog_count = ctx.catalog_count
+        store.contact_address = ctx.contact.address
+        store.contact_page_url = str(ctx.contact.contact_page_url) if ctx.contact.contact_page_url else None
+        store.scraped_at = datetime.now(UTC)
+        session.flush()
+        sections_written = _save_sections(session, store, ctx)
+
+        existing = dict(
+            session.execute(
+                select(ProductORM.external_id, ProductORM.content_hash).where(ProductORM.store_id == store.id)
+            ).tuples().all()
+        )
+        rows = _product_rows(ctx, store.id)
+        changed = [row for key, row in rows.items() if existing.get(key) != row["content_hash"]]
+        removed = [key for key in existing if key not in rows] if ctx.full_catalog() else []
+        upsert(session, ProductORM.__table__, changed, ("store_id", "external_id"), batch_size)
+        for batch in _chunks(removed, batch_size):
+            session.execute(
+                delete(ProductORM).where(ProductORM.store_id == store.id, ProductORM.external_id.in_(batch))
             )
         session.commit()
-    finally:
-        session.close()
+    inserted = sum(1 for row in changed if row["external_id"] not in existing)
+    return {
+        "inserted": inserted,
+        "updated": len(changed) - inserted,
+        "unchanged": len(rows) - len(changed),
+        "deleted": len(removed),
+        "sections_written": int(sections_written),
+    }
+
+
+async def save_brand_context(ctx: BrandContext, engine: Engine | None = None) -> dict[str, int]:
+    # the driver is synchronous; keep its round trips off the event loop
+    return await asyncio.to_thread(save_brand_context_sync, ctx, engine)
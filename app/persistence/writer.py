@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from ..config import settings
+from ..schemas import BrandContext
+from .save import save_brand_context
+
+log = logging.getLogger(__name__)
+
+Saver = Callable[[BrandContext], Awaitable[dict[str, int]]]
+
+
+class PersistWriter:
+    """Write-behind queue between request handlers and the database.
+
+    ``submit`` never waits: a store already waiting to be written has its pending
+    context replaced by the newer one, and when ``maxsize`` distinct stores are
+    queued the new context is dropped and counted. One worker drains the queue.
+    """
+
+    def __init__(self, maxsize: int | None = None, saver: Saver | None = None):
+        self.maxsize = max(1, maxsize or settings.persist_queue_size)
+        self.saver = saver or save_brand_context
+        self._pending: dict[str, BrandContext] = {}
+        self._ready: asyncio.Queue[str] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rows: dict[str, int] = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+
+    def submit(self, ctx: BrandContext) -> bool:
+        key = str(ctx.site_url)
+        if key in self._pending:
+            self._pending[key] = ctx
+            self.coalesced += 1
+            return True
+        if len(self._pending) >= self.maxsize:
+            self.dropped += 1
+            return False
+        ready = self._start()
+        self._pending[key] = ctx
+        ready.put_nowait(key)
+        return True
+
+    def _start(self) -> asyncio.Queue[str]:
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Queue()
+            for key in self._pending:
+                self._ready.put_nowait(key)
+            self._task = asyncio.create_task(self._run())
+        assert self._ready is not None
+        return self._ready
+
+    async def _run(self) -> None:
+        assert self._ready is not None
+        while True:
+            key = await self._ready.get()
+            # taken out before the write, so a newer context submitted meanwhile is queued again
+            ctx = self._pending.pop(key)
+            try:
+                counts = await self.saver(ctx)
+            except Exception:
+                self.failed += 1
+                log.exception("persisting %s failed", key)
+            else:
+                self.written += 1
+                for name, value in counts.items():
+                    self.rows[name] = self.rows.get(name, 0) + value
+            finally:
+                self._ready.task_done()
+
+    async def flush(self, timeout: float | None = None) -> None:
+        """Wait until everything submitted so far is written."""
+        if self._ready is not None and self._task is not None and not self._task.done():
+            await asyncio.wait_for(self._ready.join(), timeout)
+
+    async def close(self, timeout: float | None = 10.0) -> None:
+        try:
+            await self.flush(timeout)
+        except TimeoutError:
+            log.warning("dropping %d unwritten store contexts at shutdown", len(self._pending))
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self._pending),
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            **{f"rows_{name}": value for name, value in self.rows.items()},
+        }
+
+
+_writer: PersistWriter | None = None
+
+
+def get_persist_writer() -> PersistWriter:
+    global _writer
+    if _writer is None:
+        _writer = PersistWriter()
+    return _writer
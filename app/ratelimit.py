@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import random
+import time
+from urllib.parse import urlsplit
+
+from .config import settings
+
+# statuses a store uses to say "slow down"; they lower the host's rate
+THROTTLE_STATUSES = frozenset({429, 503})
+RETRY_STATUSES = THROTTLE_STATUSES | {500, 502, 504}
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Parse a ``Retry-After`` header given as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_seconds(attempt: int, retry_after: float | None = None) -> float:
+    """Delay before retry ``attempt`` (0-based): the server's hint, else full-jitter exponential."""
+    if retry_after is not None:
+        return min(retry_after, settings.fetch_backoff_max_seconds)
+    ceiling = min(settings.fetch_backoff_max_seconds, settings.fetch_backoff_base_seconds * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+class TokenBucket:
+    """Request budget for one host; the refill rate adapts AIMD-style to throttling."""
+
+    def __init__(self, rate: float, burst: float, min_rate: float, max_rate: float, increase: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min_rate
+        self.max_rate = max(rate, max_rate)
+        self.increase = increase
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled_count = 0
+        self.waited = 0.0
+        # waiters are served in arrival order
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """The host pushed back: halve the rate and pause it for ``retry_after``."""
+        self.throttled_count += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def succeeded(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class HostRateLimiter:
+    """Per-host token buckets shared by every scrape in the process.
+
+    Concurrent scrapes of one store draw from the same bucket, so a 429 seen by
+    one of them slows all of them down.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: float | None = None,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+        increase: float | None = None,
+        max_hosts: int = 4096,
+    ):
+        self.rate = rate or settings.rate_limit_per_host
+        self.burst = burst or settings.rate_limit_burst
+        self.min_rate = min_rate or settings.rate_limit_min
+        self.max_rate = max_rate or settings.rate_limit_max
+        self.increase = settings.rate_limit_increase if increase is None else increase
+        self.max_hosts = max_hosts
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            if len(self._buckets) >= self.max_hosts:
+                self._prune()
+            bucket = self._buckets[host] = TokenBucket(
+                self.rate, self.burst, self.min_rate, self.max_rate, self.increase
+            )
+        return bucket
+
+    def _prune(self) -> None:
+        # drop idle hosts that are back at full budget; they would be recreated identically
+        now = time.monotonic()
+        for host, bucket in list(self._buckets.items()):
+            bucket._refill(now)
+            if bucket.tokens >= bucket.burst and not bucket._lock.locked() and bucket.blocked_until <= now:
+                del self._buckets[host]
+
+    def stats(self) -> dict[str, float]:
+        buckets = self._buckets.values()
+        return {
+            "hosts": len(self._buckets),
+            "throttled": sum(b.throttled_count for b in buckets),
+            "waited_seconds": round(sum(b.waited for b in buckets), 3),
+            "min_rate": min((b.rate for b in buckets), default=self.rate),
+        }
+
+
+_limiter: HostRateLimiter | None = None
+_limiter_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_rate_limiter() -> HostRateLimiter | None:
+    """The limiter shared by scrapes on the running loop, or None when RATE_LIMIT_PER_HOST is 0."""
+    global _limiter, _limiter_loop
+    if settings.rate_limit_per_host <= 0:
+        return None
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter_loop is not loop:
+        # bucket locks belong to the loop they were created on
+        _limiter = HostRateLimiter()
+        _limiter_loop = loop
+    return _limiter
@@ -0,0 +1,330 @@
+"""Background recrawls of tracked stores.
+
+Runs inside the API when ``RECRAWL_ENABLED=true`` or on its own:
+
+    python -m app.recrawl add https://store-a.com https://store-b.com
+    python -m app.recrawl run --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import orjson
+
+from .config import settings
+from .schemas import BrandContext
+from .scraper import get_insights
+from .utils import normalize_url
+
+log = logging.getLogger(__name__)
+
+Runner = Callable[[str], Awaitable[BrandContext]]
+ResultHook = Callable[[BrandContext], Awaitable[None]]
+
+# weight of the latest visit in a store's change rate
+CHANGE_ALPHA = 0.3
+THROUGHPUT_WINDOW = 300.0
+
+
+def recrawl_interval(change_rate: float, min_interval: float, max_interval: float) -> float:
+    """Geometric slide from ``max_interval`` (never changes) to ``min_interval`` (changes every visit)."""
+    return min_interval * (max_interval / min_interval) ** (1 - change_rate)
+
+
+def context_digest(ctx: BrandContext) -> str:
+    """Digest of what a scrape found, ignoring how it was fetched."""
+    data = ctx.model_dump(mode="json", exclude={"catalog_fetch", "fetch_cache", "timings", "errors"})
+    return hashlib.blake2b(orjson.dumps(data, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+@dataclass
+class TrackedStore:
+    url: str
+    next_due: float
+    interval: float
+    change_rate: float = 0.5
+    last_crawled: float | None = None
+    last_digest: str | None = None
+    failures: int = 0
+
+
+class TrackedStoreDB:
+    """The tracked set and each store's schedule, kept in SQLite across restarts."""
+
+    COLUMNS = ("url", "next_due", "interval", "change_rate", "last_crawled", "last_digest", "failures")
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tracked_stores (url TEXT PRIMARY KEY, next_due REAL NOT NULL, "
+                "interval REAL NOT NULL, change_rate REAL NOT NULL, last_crawled REAL, last_digest TEXT, "
+                "failures INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def load(self) -> list[TrackedStore]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM tracked_stores").fetchall()
+        return [TrackedStore(*row) for row in rows]
+
+    def save(self, store: TrackedStore) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO tracked_stores ({', '.join(self.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                tuple(getattr(store, c) for c in self.COLUMNS),
+            )
+
+    def delete(self, url: str) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM tracked_stores WHERE url = ?", (url,)).rowcount > 0
+
+
+class RecrawlScheduler:
+    """Recrawls tracked stores when they fall due, with a bounded pool of workers.
+
+    Stores sit in a heap keyed by next-due time, then by change rate, so among
+    overdue stores the ones that change most go first. Each visit updates an
+    exponentially weighted change rate, and the next interval slides
+    geometrically between ``min_interval`` (changes on every visit) and
+    ``max_interval`` (never changes). Failures back off exponentially.
+    """
+
+    def __init__(
+        self,
+        db: TrackedStoreDB,
+        runner: Runner | None = None,
+        on_result: ResultHook | None = None,
+        workers: int | None = None,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+    ):
+        self.db = db
+        self.runner = runner or get_insights
+        self.on_result = on_result
+        self.workers = max(1, workers or settings.recrawl_workers)
+        self.min_interval = min_interval or settings.recrawl_min_interval_seconds
+        self.max_interval = max(self.min_interval, max_interval or settings.recrawl_max_interval_seconds)
+        self.stores: dict[str, TrackedStore] = {}
+        self._heap: list[tuple[float, float, int, str]] = []
+        self._seq = itertools.count()
+        self._in_flight: set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._ready: asyncio.Queue[TrackedStore] = asyncio.Queue(maxsize=self.workers)
+        self._tasks: list[asyncio.Task[None]] = []
+        self._finished: deque[float] = deque()
+        self.crawled = 0
+        self.changed = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        for store in await asyncio.to_thread(self.db.load):
+            self.stores[store.url] = store
+            self._push(store)
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def track(self, url: str) -> TrackedStore:
+        key = normalize_url(url).rstrip("/")
+        store = self.stores.get(key)
+        if store is None:
+            # new stores are due now and start halfway between the interval bounds
+            store = self.stores[key] = TrackedStore(url=key, next_due=time.time(), interval=self._interval(0.5))
+            await asyncio.to_thread(self.db.save, store)
+            self._push(store)
+        return store
+
+    async def untrack(self, url: str) -> bool:
+        key = normalize_url(url).rstrip("/")
+        self.stores.pop(key, None)
+        return await asyncio.to_thread(self.db.delete, key)
+
+    def _interval(self, change_rate: float) -> float:
+        return recrawl_interval(change_rate, self.min_interval, self.max_interval)
+
+    def _push(self, store: TrackedStore) -> None:
+        # superseded entries stay in the heap and are skipped when popped
+        heapq.heappush(self._heap, (store.next_due, -store.change_rate, next(self._seq), store.url))
+        self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        while True:
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                due, _, _, key = heapq.heappop(self._heap)
+                store = self.stores.get(key)
+                if store is None or store.next_due != due or key in self._in_flight:
+                    continue
+                self._in_flight.add(key)
+                # blocks while every worker is busy: the heap, not the queue, holds the backlog
+                await self._ready.put(store)
+                continue
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    async def _work(self) -> None:
+        while True:
+            store = await self._ready.get()
+            try:
+                await self._crawl(store)
+            except Exception:
+                log.exception("recrawl of %s failed", store.url)
+            finally:
+                self._in_flight.discard(store.url)
+                self._finished.append(time.time())
+
+    async def _crawl(self, store: TrackedStore) -> None:
+        try:
+            await self._visit(store)
+        finally:
+            # whatever failed above, the store stays scheduled
+            if self.stores.get(store.url) is store:
+                self._push(store)
+                await asyncio.to_thread(self.db.save, store)
+
+    async def _visit(self, store: TrackedStore) -> None:
+        try:
+            ctx = await self.runner(store.url)
+        except Exception as e:  # noqa: BLE001
+            self.failed += 1
+            store.failures += 1
+            log.warning("recrawl of %s failed: %s", store.url, e)
+            backoff = store.interval * 2 ** min(store.failures, 6)
+            store.next_due = time.time() + min(self.max_interval, backoff)
+            return
+        self.crawled += 1
+        digest = context_digest(ctx)
+        if store.last_digest is not None:
+            changed = digest != store.last_digest
+            self.changed += changed
+            store.change_rate = CHANGE_ALPHA * changed + (1 - CHANGE_ALPHA) * store.change_rate
+        store.last_digest = digest
+        store.failures = 0
+        store.last_crawled = time.time()
+        store.interval = self._interval(store.change_rate)
+        store.next_due = store.last_crawled + store.interval
+        if self.on_result is not None:
+            try:
+                await self.on_result(ctx)
+            except Exception:
+                # the crawl itself succeeded; a failing hook (cache, index, database) must not unschedule it
+                log.exception("recrawl hook for %s failed", store.url)
+
+    def stats(self) -> dict[str, float]:
+        now = time.time()
+        while self._finished and self._finished[0] < now - THROUGHPUT_WINDOW:
+            self._finished.popleft()
+        waiting = [s.next_due for s in self.stores.values() if s.url not in self._in_flight]
+        due = [d for d in waiting if d <= now]
+        return {
+            "tracked": len(self.stores),
+            "due": len(due),
+            "in_flight": len(self._in_flight),
+            "lag_seconds": round(now - min(due), 1) if due else 0.0,
+            "crawls_per_minute": round(len(self._finished) * 60 / THROUGHPUT_WINDOW, 2),
+            "crawled": self.crawled,
+            "changed": self.changed,
+            "failed": self.failed,
+        }
+
+
+_scheduler: RecrawlScheduler | None = None
+
+
+def get_recrawl_scheduler() -> RecrawlScheduler | None:
+    """The scheduler started with the app, or None when RECRAWL_ENABLED is off."""
+    return _scheduler
+
+
+async def start_recrawl_scheduler(on_result: ResultHook | None = None) -> RecrawlScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RecrawlScheduler(TrackedStoreDB(settings.recrawl_db_path), on_result=on_result)
+        await _scheduler.start()
+    return _scheduler
+
+
+async def stop_recrawl_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        scheduler, _scheduler = _scheduler, None
+        await scheduler.stop()
+
+
+async def _run_forever(workers: int | None) -> None:
+    on_result: ResultHook | None = None
+    if settings.persist_enabled and settings.database_url:
+        from .persistence.db import Base, get_engine
+        from .persistence.save import save_brand_context
+
+        # as the app does at startup: the tables may not exist yet
+        await asyncio.to_thread(Base.metadata.create_all, bind=get_engine())
+
+        async def on_result(ctx: BrandContext) -> None:
+            await save_brand_context(ctx)
+
+    scheduler = RecrawlScheduler(TrackedStoreDB(settings.recrawl_db_path), on_result=on_result, workers=workers)
+    await scheduler.start()
+    try:
+        while True:
+            await asyncio.sleep(60)
+            log.info("recrawl %s", scheduler.stats())
+    finally:
+        await scheduler.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recrawl tracked stores")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("add", help="track stores").add_argument("urls", nargs="+")
+    commands.add_parser("remove", help="stop tracking stores").add_argument("urls", nargs="+")
+    commands.add_parser("list", help="show tracked stores and when they are due")
+    run = commands.add_parser("run", help="recrawl stores as they fall due until interrupted")
+    run.add_argument("--workers", type=int)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    db = TrackedStoreDB(settings.recrawl_db_path)
+    if args.command == "add":
+        known = {s.url for s in db.load()}
+        for url in args.urls:
+            key = normalize_url(url).rstrip("/")
+            if key not in known:
+                interval = recrawl_interval(
+                    0.5, settings.recrawl_min_interval_seconds, settings.recrawl_max_interval_seconds
+                )
+                db.save(TrackedStore(url=key, next_due=time.time(), interval=interval))
+    elif args.command == "remove":
+        for url in args.urls:
+            db.delete(normalize_url(url).rstrip("/"))
+    elif args.command == "list":
+        for store in sorted(db.load(), key=lambda s: s.next_due):
+            due = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(store.next_due))
+            print(f"{store.url}  due {due}  every {store.interval / 3600:.1f}h  change rate {store.change_rate:.2f}")
+    else:
+        asyncio.run(_run_forever(args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,24 @@
 from __future__ import annotations
 
+from typing import Literal, get_args
+
 from pydantic import AnyHttpUrl, BaseModel, Field
 
+Section = Literal[
+    "products",
+    "hero_products",
+    "policies",
+    "faqs",
+    "social_handles",
+    "contact",
+    "about",
+    "important_links",
+    "catalog_stats",
+]
+ALL_SECTIONS: frozenset[str] = frozenset(get_args(Section))
+JobState = Literal["queued", "running", "done", "cancelled"]
+SearchKind = Literal["product", "faq", "policy"]
+
 
 class Link(BaseModel):
     title: str
@@ -40,6 +57,137 @@ class Product(BaseModel):
     product_type: str | None = None
 
 
+class PriceStats(BaseModel):
+    min: float | None = None
+    p25: float | None = None
+    median: float | None = None
+    p75: float | None = None
+    p90: float | None = None
+    max: float | None = None
+    mean: float | None = None
+
+
+class DiscountStats(BaseModel):
+    # fraction off compare_at_price, over discounted variants only
+    mean: float | None = None
+    median: float | None = None
+    max: float | None = None
+
+
+class GroupStats(BaseModel):
+    products: int = 0
+    variants: int = 0
+    median_price: float | None = None
+    in_stock_ratio: float | None = None
+    discounted_ratio: float | None = None
+
+
+class CatalogStats(BaseModel):
+    """Aggregates over every variant walked (so over ``max_products`` products at most)."""
+
+    currency: str | None = None
+    products: int = 0
+    variants: int = 0
+    price: PriceStats = Field(default_factory=PriceStats)
+    # over variants whose availability is known / that have a price
+    in_stock_ratio: float | None = None
+    discounted_ratio: float | None = None
+    discount_depth: DiscountStats = Field(default_factory=DiscountStats)
+    by_vendor: dict[str, GroupStats] = Field(default_factory=dict)
+    by_product_type: dict[str, GroupStats] = Field(default_factory=dict)
+
+
+class StoreComparison(BaseModel):
+    store: str
+    products: int = 0
+    price: PriceStats = Field(default_factory=PriceStats)
+    # median price over the baseline store's median
+    relative_median_price: float | None = None
+    # distinct normalized titles and tags
+    catalog_features: int = 0
+    product_types: int = 0
+    policies: list[str] = Field(default_factory=list)
+
+
+class ComparisonMatrix(BaseModel):
+    """A brand against its competitors; matrices are indexed like ``stores``."""
+
+    # the brand, which relative prices are measured against; None when it could not be scraped
+    baseline: str | None = None
+    baseline_error: str | None = None
+    stores: list[StoreComparison] = Field(default_factory=list)
+    # estimated Jaccard similarity of normalized titles and tags (MinHash)
+    catalog_overlap: list[list[float]] = Field(default_factory=list)
+    # exact Jaccard similarity of product types
+    product_type_overlap: list[list[float]] = Field(default_factory=list)
+    # product types carried by more than one store -> number of stores
+    shared_product_types: dict[str, int] = Field(default_factory=dict)
+    # policy -> share of stores publishing it
+    policy_coverage: dict[str, float] = Field(default_factory=dict)
+
+
+class CatalogFetchStats(BaseModel):
+    mode: str
+    pages_fetched: int = 0
+    products: int = 0
+    elapsed_ms: float = 0.0
+    # walked to the catalog's end: no page failed, no product cap, not cut at the deadline
+    complete: bool = False
+
+
+class CatalogDiff(BaseModel):
+    site_url: str
+    mode: str  # "full" or "updated_at"
+    # the whole catalog was read, so ``removed`` is authoritative
+    complete: bool = False
+    added: list[Product] = Field(default_factory=list)
+    changed: list[Product] = Field(default_factory=list)
+    removed: list[str] = Field(default_factory=list)
+    unchanged: int = 0
+    pages_fetched: int = 0
+    elapsed_ms: float = 0.0
+    errors: list[str] = Field(default_factory=list)
+
+
+class FetchCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+    # served without a request: the sitemap's lastmod predates the cached copy
+    skipped: int = 0
+
+
+class FetchTiming(BaseModel):
+    url: str
+    kind: str
+    status: int
+    bytes: int = 0
+    ms: float
+    retries: int = 0
+    revalidated: bool = False
+    # why the body was not read in full: "content_type", "max_bytes" or "excerpt"
+    cut: str | None = None
+
+
+class ParseTiming(BaseModel):
+    fn: str
+    bytes: int
+    ms: float
+
+
+class ScrapeTimings(BaseModel):
+    total_ms: float
+    requests: int = 0
+    bytes: int = 0
+    stages: dict[str, float] = Field(default_factory=dict)
+    fetches: list[FetchTiming] = Field(default_factory=list)
+    parses: list[ParseTiming] = Field(default_factory=list)
+
+
+# errors of a scrape whose sections were cut at the deadline or failed: missing, not empty
+PARTIAL_ERRORS = ("deadline_exceeded:", "products_error:", "policies_error:", "faqs_error:", "about_error:", "contact_error:")
+
+
 class BrandContext(BaseModel):
     site_url: AnyHttpUrl | str
     site_name: str | None = None
@@ -48,6 +196,8 @@ class BrandContext(BaseModel):
     catalog_count: int | None = None
     products: list[Product] = Field(default_factory=list)
     hero_products: list[str] = Field(default_factory=list)
+    catalog_fetch: CatalogFetchStats | None = None
+    catalog_stats: CatalogStats | None = None
 
     policies: list[Policy] = Field(default_factory=list)
     faqs: list[FAQItem] = Field(default_factory=list)
@@ -58,12 +208,89 @@ class BrandContext(BaseModel):
     about_text: str | None = None
     important_links: list[Link] = Field(default_factory=list)
 
+    fetch_cache: FetchCacheStats | None = None
+    timings: ScrapeTimings | None = None
     errors: list[str] = Field(default_factory=list)
 
+    def partial(self) -> bool:
+        """Whether some section was cut at the deadline or failed, rather than found empty."""
+        return any(e.startswith(PARTIAL_ERRORS) for e in self.errors)
+
+    def full_catalog(self) -> bool:
+        """Whether ``products`` is the store's whole catalog, so a product missing from it is gone."""
+        return self.catalog_fetch is not None and self.catalog_fetch.complete and not self.partial()
+
 
 class InsightsRequest(BaseModel):
     website_url: AnyHttpUrl | str
+    # overall budget for the scrape; unfinished sections are listed in errors
+    deadline_seconds: float | None = Field(default=None, gt=0)
+    # only scrape these sections (all when omitted); products can be capped
+    sections: set[Section] | None = None
+    max_products: int | None = Field(default=None, ge=1)
+    include_timings: bool = False
 
 
 class InsightsResponse(BaseModel):
     data: BrandContext
+
+
+class CatalogSyncRequest(BaseModel):
+    website_url: AnyHttpUrl | str
+    # ignore the previous snapshot and read the whole catalog (detects removals)
+    full: bool = False
+
+
+class CatalogSyncResponse(BaseModel):
+    data: CatalogDiff
+
+
+class BatchRequest(BaseModel):
+    urls: list[AnyHttpUrl | str] = Field(min_length=1)
+    # applied to every store in the batch, as in InsightsRequest
+    deadline_seconds: float | None = Field(default=None, gt=0)
+    sections: set[Section] | None = None
+    max_products: int | None = Field(default=None, ge=1)
+
+
+class SearchHit(BaseModel):
+    store: str
+    kind: SearchKind
+    title: str
+    url: str | None = None
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    # documents matching any query term, before ``limit``
+    total: int
+    took_ms: float
+    hits: list[SearchHit] = Field(default_factory=list)
+
+
+class RecrawlRequest(BaseModel):
+    urls: list[AnyHttpUrl | str] = Field(min_length=1)
+
+
+class BatchResult(BaseModel):
+    index: int
+    url: str
+    data: BrandContext | None = None
+    error: str | None = None
+    elapsed_ms: float = 0.0
+    # the scrape succeeded but its data was dropped after BATCH_RESULT_TTL_SECONDS
+    expired: bool = False
+
+
+class BatchJobStatus(BaseModel):
+    id: str
+    status: JobState
+    total: int
+    completed: int = 0
+    failed: int = 0
+    running: int = 0
+    created_at: float
+    finished_at: float | None = None
+    # completed results in URL order; omitted when polling with results=false
+    results: list[BatchResult] | None = None
@@ -1,24 +1,75 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from dataclasses import dataclass
+from typing import Any
 from urllib.parse import urljoin, urlparse
 
 import httpx
-from bs4 import BeautifulSoup
 
+from .catalog import CatalogFetcher, PageCallback
+from .catalog_stats import VariantColumns, catalog_stats
 from .config import settings
-from .schemas import BrandContext, ContactInfo, FAQItem, Link, Policy, Product
-from .utils import (
-    absolutize,
-    find_emails,
-    find_phones,
-    find_social_links,
-    normalize_url,
-    text_of,
-    unique,
+from .http_cache import ResponseCache, get_response_cache
+from .http_pool import HttpPool, get_http_pool
+from .metrics import ScrapeTrace, fetch_kind
+from .page import Page
+from .parsing import parse_excerpt, parse_faq_page, parse_home, parse_html_products
+from .ratelimit import (
+    RETRY_STATUSES,
+    THROTTLE_STATUSES,
+    HostRateLimiter,
+    backoff_seconds,
+    get_rate_limiter,
+    retry_after_seconds,
 )
+from .schemas import (
+    ALL_SECTIONS,
+    BrandContext,
+    CatalogStats,
+    ContactInfo,
+    FAQItem,
+    FetchCacheStats,
+    Link,
+    Policy,
+    Product,
+)
+from .sitemap import SitemapIndex, SitemapReader
+from .utils import normalize_url, unique
+from .workers import run_parse
+
+# sections that find pages through links (and the sitemap) rather than read the home page alone
+LINKED_SECTIONS = frozenset({"policies", "faqs", "about", "important_links", "contact"})
+
+POLICY_KEYWORDS = [
+    ("Privacy Policy", "privacy"),
+    ("Refund Policy", "refund"),
+    ("Return Policy", "return"),
+    ("Shipping Policy", "shipping"),
+    ("Terms of Service", "terms"),
+]
+
+
+# bodies the extractors can read (text/plain too: some stores mislabel JSON); a video, PDF or image is dropped unread
+READABLE_TYPES = ("text/", "html", "json")
+# where the main content of a page starts, as parse_excerpt selects it (main, article, .rte, .content)
+MAIN_CONTENT_RE = re.compile(rb"""<(?:main|article)[\s>]|\sclass\s*=\s*["'][^"']*(?<![\w-])(?:rte|content)(?![\w-])""", re.I)
+
+
+def readable(content_type: str | None) -> bool:
+    mime = (content_type or "").split(";", 1)[0].strip().lower()
+    return not mime or any(t in mime for t in READABLE_TYPES)
+
+
+def _decode(body: bytes, response: httpx.Response) -> str:
+    # as httpx's Response.text: the declared charset, else UTF-8, never raising
+    try:
+        return body.decode(response.charset_encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
 
 
 @dataclass
@@ -26,183 +77,314 @@ class FetchResult:
     url: str
     status: int
     text: str
+    # why the body was not read in full: "content_type", "max_bytes" or "excerpt"
+    cut: str | None = None
 
 
 class ShopifyScraper:
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        http: HttpPool | None = None,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: HostRateLimiter | None = None,
+        deadline: float | None = None,
+        sections: Iterable[str] | None = None,
+        max_products: int | None = None,
+        include_timings: bool = False,
+    ):
         self.base_url = normalize_url(base_url)
         self.root = self.base_url.rstrip("/")
-        self.client = httpx.AsyncClient(
-            headers={
-                "User-Agent": settings.user_agent,
-                "Accept": "text/html,application/json,application/xhtml+xml",
-            },
-            timeout=settings.request_timeout_seconds,
-            follow_redirects=True,
-        )
+        self.catalog: CatalogFetcher | None = None
+        self.sitemap: SitemapIndex | None = None
+        self.catalog_stats: CatalogStats | None = None
+        # the storefront's display currency, read from the home page
+        self.currency: str | None = None
+        self.sections = frozenset(sections) if sections else ALL_SECTIONS
+        self.max_products = max_products
+        self.include_timings = include_timings
+        self.trace = ScrapeTrace(self.root)
+        self.home_html = ""
+        self.errors: list[str] = []
+        # connections are borrowed from the process-wide pool, never owned
+        self.http = http or get_http_pool()
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.fetch_cache = FetchCacheStats() if self.response_cache is not None else None
+        # keyed by (url, excerpt): an excerpt fetch may stop early, so it never stands in for a full one
+        self._subpages: dict[tuple[str, bool], asyncio.Task[FetchResult]] = {}
+        self._subpage_slots = asyncio.Semaphore(max(1, settings.subpage_concurrency))
+        # one budget shared by every fetch and stage of this scrape
+        budget = deadline if deadline is not None else settings.scrape_deadline_seconds
+        self.deadline = time.monotonic() + budget if budget else None
 
-    async def close(self):
-        await self.client.aclose()
+    async def fetch(self, path_or_url: str, excerpt: bool = False) -> FetchResult:
+        """GET a store URL, reading at most ``FETCH_MAX_*_BYTES`` of an HTML or JSON body.
 
-    async def fetch(self, path_or_url: str) -> FetchResult:
+        Bodies of other content types are not read (status 0, like a failed
+        request); an HTML body over the cap is cut, a JSON one is dropped. With
+        ``excerpt``, reading stops ``FETCH_EXCERPT_BYTES`` into the page's main
+        content, which is all an excerpt needs.
+        """
         url = path_or_url if path_or_url.startswith("http") else urljoin(self.root + "/", path_or_url.lstrip("/"))
+        cached = self.response_cache.get(url) if self.response_cache is not None else None
+        if cached is not None and cached.partial and not excerpt:
+            cached = None  # an excerpt cannot stand in for the whole page
+        # the store's sitemap says the page has not changed since we last read it: skip the request
+        if cached is not None and self.fetch_cache is not None and self.sitemap_unchanged(url, cached.fetched_at):
+            self.fetch_cache.skipped += 1
+            self.fetch_cache.bytes_saved += cached.size
+            return FetchResult(url=url, status=200, text=cached.text)
+        bucket = self.rate_limiter.bucket(url) if self.rate_limiter is not None else None
+        started = time.perf_counter()
+        retries = 0
+        while True:
+            timeout = float(settings.request_timeout_seconds)
+            remaining = self.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    return FetchResult(url=url, status=0, text="")
+                timeout = min(timeout, remaining)
+            if bucket is not None:
+                await bucket.acquire()
+            try:
+                r, text, size, cut = await self._get(url, cached.conditional_headers() if cached else None, timeout, excerpt)
+            except httpx.RequestError:
+                self.trace.fetch(url, 0, 0, (time.perf_counter() - started) * 1000, retries=retries)
+                return FetchResult(url=url, status=0, text="")
+            if r.status_code not in RETRY_STATUSES:
+                break
+            retry_after = retry_after_seconds(r.headers.get("retry-after"))
+            if bucket is not None and r.status_code in THROTTLE_STATUSES:
+                bucket.throttled(retry_after)
+            delay = backoff_seconds(retries, retry_after)
+            remaining = self.remaining()
+            if retries >= settings.fetch_max_retries or (remaining is not None and delay >= remaining):
+                break
+            retries += 1
+            await asyncio.sleep(delay)
+        if bucket is not None and r.status_code < 400:
+            bucket.succeeded()
+        revalidated = cached is not None and r.status_code == 304
+        elapsed = (time.perf_counter() - started) * 1000
+        self.trace.fetch(url, r.status_code, size, elapsed, retries=retries, revalidated=revalidated, cut=cut)
+        if cut is not None and not text:
+            return FetchResult(url=url, status=0, text="", cut=cut)
+        if self.response_cache is None or self.fetch_cache is None:
+            return FetchResult(url=url, status=r.status_code, text=text, cut=cut)
+        if cached is not None and revalidated:
+            self.fetch_cache.hits += 1
+            self.fetch_cache.bytes_saved += cached.size
+            return FetchResult(url=url, status=200, text=cached.text)
+        self.fetch_cache.misses += 1
+        if cut is None or cut == "excerpt":
+            # an excerpt is kept, flagged, so the next excerpt fetch can revalidate it
+            self.response_cache.store(url, r, text, size, partial=cut is not None)
+        else:
+            # a body cut at the cap must not answer a later revalidation
+            self.response_cache.discard(url)
+        return FetchResult(url=url, status=r.status_code, text=text, cut=cut)
+
+    async def _get(
+        self, url: str, headers: dict[str, str] | None, timeout: float, excerpt: bool
+    ) -> tuple[httpx.Response, str, int, str | None]:
+        """Stream a GET; returns (response, decoded body, bytes read, why reading stopped early)."""
+        catalog = fetch_kind(url, self.root) == "catalog"
+        limit = settings.fetch_max_json_bytes if catalog else settings.fetch_max_html_bytes
+        async with self.http.stream("GET", url, headers=headers, timeout=timeout) as r:
+            # only 200 bodies are ever read; retries, 304s and errors are closed unread
+            if r.status_code != 200:
+                return r, "", 0, None
+            content_type = r.headers.get("content-type")
+            if not readable(content_type):
+                return r, "", 0, "content_type"
+            body = bytearray()
+            cut = None
+            main = -1  # offset of the main content, once seen
+            async for chunk in r.aiter_bytes():
+                body += chunk
+                if len(body) > limit:
+                    del body[limit:]
+                    cut = "max_bytes"
+                    break
+                if excerpt:
+                    if main < 0:
+                        # rescan a little of the previous chunk for a tag split across chunks
+                        found = MAIN_CONTENT_RE.search(body, max(0, len(body) - len(chunk) - 256))
+                        main = found.start() if found else -1
+                    if main >= 0 and len(body) - main >= settings.fetch_excerpt_bytes:
+                        cut = "excerpt"
+                        break
+        if cut == "max_bytes" and "json" in (content_type or ""):
+            # a cut JSON document cannot be decoded
+            return r, "", len(body), cut
+        return r, _decode(bytes(body), r), len(body), cut
+
+    async def fetch_into(self, url: str, feed: Callable[[bytes], bool]) -> int:
+        """GET ``url`` and hand the body to ``feed`` chunk by chunk as it arrives.
+
+        ``feed`` returns False to stop reading early. Returns the status (0 when
+        the request failed); the body is only fed on 200. Not retried or cached.
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            return 0
+        timeout = float(settings.request_timeout_seconds)
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        bucket = self.rate_limiter.bucket(url) if self.rate_limiter is not None else None
+        if bucket is not None:
+            await bucket.acquire()
+        started = time.perf_counter()
+        status = size = 0
         try:
-            r = await self.client.get(url)
-            return FetchResult(url=url, status=r.status_code, text=r.text or "")
+            async with self.http.stream("GET", url, timeout=timeout) as r:
+                status = r.status_code
+                if bucket is not None and status in THROTTLE_STATUSES:
+                    bucket.throttled(retry_after_seconds(r.headers.get("retry-after")))
+                elif bucket is not None and status < 400:
+                    bucket.succeeded()
+                if status == 200:
+                    async for chunk in r.aiter_bytes():
+                        size += len(chunk)
+                        if not feed(chunk):
+                            break
         except httpx.RequestError:
-            return FetchResult(url=url, status=0, text="")
+            status = 0
+        finally:
+            self.trace.fetch(url, status, size, (time.perf_counter() - started) * 1000)
+        return status
+
+    async def load_sitemap(self) -> SitemapIndex:
+        with self.trace.stage("sitemap"):
+            return await SitemapReader(self).load()
 
-    async def get_home(self) -> BeautifulSoup | None:
+    async def _wait_for_sitemap(self, task: asyncio.Task[SitemapIndex]) -> None:
+        """Take the sitemap if it arrives within ``SITEMAP_WAIT_SECONDS``; linked sections go without it otherwise."""
+        timeout = settings.sitemap_wait_seconds
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        try:
+            self.sitemap = await asyncio.wait_for(task, timeout)
+        except TimeoutError:
+            self.errors.append(f"sitemap_error: not read within {timeout:g}s")
+        except Exception as e:  # noqa: BLE001
+            self.errors.append(f"sitemap_error: {e}")
+
+    def sitemap_unchanged(self, url: str, since: float) -> bool:
+        return self.sitemap is not None and self.sitemap.unchanged_since(url, since)
+
+    def sitemap_pages(self, *keys: str) -> list[str]:
+        return self.sitemap.pages_matching(keys) if self.sitemap is not None else []
+
+    async def get_home(self) -> Page | None:
         res = await self.fetch(self.root)
         if res.status != 200:
             return None
-        return BeautifulSoup(res.text, "lxml")
+        self.home_html = res.text
+        page = await self.parse(parse_home, res.text, self.root)
+        self.currency = page.currency
+        return page
 
-    async def get_products_json(self) -> list[Product]:
-        products: list[Product] = []
-        page = 1
-        while True:
-            path = f"/products.json?limit=250&page={page}"
-            res = await self.fetch(path)
-            if res.status != 200:
-                break
-            try:
-                data = json.loads(res.text)
-            except json.JSONDecodeError:
-                break
-            raw_products = data.get("products") or []
-            if not raw_products:
-                break
-            for p in raw_products:
-                prod = Product(
-                    id=p.get("id"),
-                    handle=p.get("handle"),
-                    title=p.get("title") or p.get("handle") or "",
-                    url=urljoin(self.root + "/", f"/products/{p.get('handle')}") if p.get("handle") else None,
-                    images=[img.get("src") for img in (p.get("images") or []) if img.get("src")],
-                    tags=unique((p.get("tags") or "").split(", ") if isinstance(p.get("tags"), str) else (p.get("tags") or [])),
-                    vendor=p.get("vendor"),
-                    product_type=p.get("product_type"),
-                    available=None,
+    async def parse_products_from_html(self, html: str) -> list[Product]:
+        return await self.parse(parse_html_products, html, self.root)
+
+    async def parse(self, fn: Callable[..., Any], html: str, *args: Any) -> Any:
+        """``run_parse`` with the time spent (queueing included) recorded in the trace."""
+        started = time.perf_counter()
+        try:
+            return await run_parse(fn, html, *args)
+        finally:
+            self.trace.parse(fn.__name__, len(html), (time.perf_counter() - started) * 1000)
+
+    def fetch_subpage(self, url: str, excerpt: bool = False) -> asyncio.Task[FetchResult]:
+        """Fetch a sub-page once per scrape, under the per-store concurrency cap.
+
+        Extractors share the returned task, so a URL wanted by several of them
+        (say /pages/contact) costs one request. ``excerpt`` callers take a full
+        fetch when there is one, but a full fetch never takes an excerpt one.
+        """
+        task = self._subpages.get((url, False))
+        if task is None and excerpt:
+            task = self._subpages.get((url, True))
+        if task is None:
+            task = self._subpages[url, excerpt] = asyncio.create_task(self._fetch_limited(url, excerpt))
+        return task
+
+    async def _fetch_limited(self, url: str, excerpt: bool) -> FetchResult:
+        async with self._subpage_slots:
+            return await self.fetch(url, excerpt=excerpt)
+
+    def policy_links(self, page: Page) -> list[tuple[str, str]]:
+        found = []
+        for title, key in POLICY_KEYWORDS:
+            candidate = page.links.first(key)
+            if candidate and candidate.url:
+                found.append((title, candidate.url))
+            elif listed := self.sitemap_pages(key):
+                found.append((title, listed[0]))
+        return found
+
+    def faq_links(self, page: Page) -> list[str]:
+        # only crawl further when the page itself has few FAQs
+        if len(page.faqs) >= 3:
+            return []
+        anchors = page.links.matching(["faq", "help", "support"], in_text=False)
+        # pages the sitemap lists exist; an anchor's target is only a guess
+        listed = self.sitemap_pages("faq", "help", "support")
+        return unique([*listed, *(a.url for a in anchors if a.url)])[: settings.max_pages_to_scan]
+
+    def about_links(self, page: Page) -> list[Link]:
+        anchors = page.links.matching(["about", "our story", "story"], in_href=False)
+        links = {a.url: Link(title=a.text, url=a.url) for a in anchors if a.url and len(a.text) <= 30}
+        for url in self.sitemap_pages("about", "our-story", "story"):
+            slug = url.rstrip("/").rsplit("/", 1)[-1]
+            links.setdefault(url, Link(title=slug.replace("-", " ").title(), url=url))
+        return list(links.values())
+
+    def prefetch_subpages(self, home: Page) -> None:
+        """Fan-out stage: start every sub-page fetch the extractors will need."""
+        # url -> only an excerpt is read from it (policies, about); FAQ pages are parsed whole
+        urls: dict[str, bool] = {}
+        if "policies" in self.sections:
+            for _, url in self.policy_links(home):
+                urls.setdefault(url, True)
+        if "faqs" in self.sections:
+            urls.update((url, False) for url in self.faq_links(home))
+        if "about" in self.sections:
+            for link in self.about_links(home)[: settings.max_pages_to_scan]:
+                urls.setdefault(str(link.url), True)
+        for url, excerpt in urls.items():
+            self.fetch_subpage(url, excerpt)
+
+    async def extract_policies(self, page: Page) -> list[Policy]:
+        async def one(title: str, url: str) -> Policy:
+            res = await self.fetch_subpage(url, excerpt=True)
+            content_excerpt = None
+            if res.status == 200:
+                content_excerpt = await self.parse(
+                    parse_excerpt, res.text, "main, .rte, .content, article", 400, True
                 )
-                # try to extract price from variants
-                variants = p.get("variants") or []
-                if variants:
-                    try:
-                        price = float(variants[0].get("price")) if variants[0].get("price") is not None else None
-                    except (ValueError, TypeError):
-                        price = None
-                    prod.price = price
-                products.append(prod)
-            page += 1
-        return products
-
-    async def parse_products_from_html(self, soup: BeautifulSoup) -> list[Product]:
-        products: list[Product] = []
-        selectors = [
-            ".grid-product", ".product-card", ".product-item", ".product-grid-item",
-            "[data-product]", "article.product"
-        ]
-        for sel in selectors:
-            for card in soup.select(sel):
-                title_el = card.select_one(".product-title, .card__heading, .grid-product__title, a[title]")
-                title = text_of(title_el)
-                url = title_el.get("href") if title_el else (card.get("href") if card.has_attr("href") else None)
-                url = absolutize(self.root, url)
-                if not title and not url:
-                    continue
-                img_el = card.select_one("img")
-                img = img_el.get("src") or img_el.get("data-src") if img_el else None
-                products.append(Product(title=title or url or "", url=img and url, images=[img] if img else []))
-        # de-duplicate by url/title
-        seen = set()
-        deduped = []
-        for p in products:
-            key = (p.url or "", p.title)
-            if key not in seen:
-                seen.add(key)
-                deduped.append(p)
-        return deduped
-
-    async def extract_hero_products(self, soup: BeautifulSoup) -> list[str]:
-        hero = []
-        for a in soup.select("section a[href*='/products/'], .hero a[href*='/products/']"):
-            href = absolutize(self.root, a.get("href"))
-            if href:
-                hero.append(href)
-        return unique(hero)
-
-    async def extract_policies(self, soup: BeautifulSoup) -> list[Policy]:
-        policies: list[Policy] = []
-        keywords = [
-            ("Privacy Policy", "privacy"),
-            ("Refund Policy", "refund"),
-            ("Return Policy", "return"),
-            ("Shipping Policy", "shipping"),
-            ("Terms of Service", "terms"),
-        ]
-        links = soup.select("a[href]")
-        for title, key in keywords:
-            candidate = None
-            for a in links:
-                href = a.get("href", "").lower()
-                text = text_of(a)
-                if key in href or key in text.lower():
-                    candidate = a
-                    break
-            if candidate:
-                url = absolutize(self.root, candidate.get("href"))
-                if url:
-                    page = await self.fetch(url)
-                    content_excerpt = None
-                    if page.status == 200:
-                        page_soup = BeautifulSoup(page.text, "lxml")
-                        content = text_of(page_soup.select_one("main, .rte, .content, article")) or text_of(page_soup)
-                        content_excerpt = content[:400]
-                    policies.append(Policy(name=title, url=url, content_excerpt=content_excerpt))
-        return policies
-
-    async def extract_faqs(self, soup: BeautifulSoup) -> list[FAQItem]:
-        faqs: list[FAQItem] = []
-        # Common FAQ patterns: details/summary, accordions, headings followed by content
-        for d in soup.select("details"):  # native disclosure
-            q = text_of(d.select_one("summary"))
-            a = text_of(d)
-            if q:
-                faqs.append(FAQItem(question=q, answer=a))
-        # accordions
-        for qel in soup.select(".accordion__title, .faq__question, h3, h4"):
-            q = text_of(qel)
-            if not q or len(q) > 160:
-                continue
-            # answer might be the next sibling or within parent
-            ans_candidates = [qel.find_next_sibling(), qel.parent]
-            answer = None
-            for c in ans_candidates:
-                if not c:
-                    continue
-                t = text_of(c)
-                if t and len(t) > len(q) + 10:
-                    answer = t
-                    break
-            if q and answer:
-                faqs.append(FAQItem(question=q, answer=answer))
+            return Policy(name=title, url=url, content_excerpt=content_excerpt)
+
+        return list(await asyncio.gather(*(one(title, url) for title, url in self.policy_links(page))))
+
+    async def extract_faqs(self, page: Page, visited: set[str] | None = None) -> list[FAQItem]:
+        visited = visited if visited is not None else {page.url}
+        faqs = [FAQItem(question=q, answer=a) for q, a in page.faqs]
         # If few found, search potential FAQ pages
-        if len(faqs) < 3:
-            more_links = []
-            for a in soup.select("a[href]"):
-                href = a.get("href", "").lower()
-                if any(k in href for k in ["faq", "help", "support"]):
-                    u = absolutize(self.root, a.get("href"))
-                    if u:
-                        more_links.append(u)
-            more_links = unique(more_links)[: settings.max_pages_to_scan]
-            for url in more_links:
-                page = await self.fetch(url)
-                if page.status != 200:
-                    continue
-                psoup = BeautifulSoup(page.text, "lxml")
-                faqs.extend(await self.extract_faqs(psoup))
+        more_links = [u for u in self.faq_links(page) if u not in visited]
+        visited.update(more_links)
+
+        async def one(url: str) -> list[FAQItem]:
+            res = await self.fetch_subpage(url)
+            if res.status != 200:
+                return []
+            return await self.extract_faqs(await self.parse(parse_faq_page, res.text, url), visited)
+
+        for found in await asyncio.gather(*(one(u) for u in more_links)):
+            faqs.extend(found)
         # dedupe by question
         final: dict[str, FAQItem] = {}
         for f in faqs:
@@ -210,37 +392,29 @@ class ShopifyScraper:
                 final[f.question] = f
         return list(final.values())
 
-    async def extract_about_and_links(self, soup: BeautifulSoup) -> tuple[str | None, list[Link]]:
+    async def extract_about_and_links(self, page: Page, fetch_about: bool = True) -> tuple[str | None, list[Link]]:
         about = None
-        links: list[Link] = []
-        # Try footer and about page
-        for a in soup.select("a[href]"):
-            text = text_of(a)
-            href = a.get("href", "")
-            low = text.lower()
-            if any(k in low for k in ["about", "our story", "story"]) and len(text) <= 30:
-                u = absolutize(self.root, href)
-                if u:
-                    links.append(Link(title=text, url=u))
-                    page = await self.fetch(u)
-                    if page.status == 200 and not about:
-                        psoup = BeautifulSoup(page.text, "lxml")
-                        about = text_of(psoup.select_one("main, article, .rte, .content"))[:800] or None
+        links = self.about_links(page)
+        # Try footer and about pages; the first one in page order with content wins
+        to_fetch = links[: settings.max_pages_to_scan] if fetch_about else []
+        for task in [self.fetch_subpage(str(link.url), excerpt=True) for link in to_fetch]:
+            res = await task
+            if res.status == 200:
+                about = await self.parse(parse_excerpt, res.text, "main, article, .rte, .content", 800) or None
+                if about:
+                    break
         # Important links
         important_keys = {
             "Order Tracking": ["track", "order status"],
             "Contact Us": ["contact"],
             "Blog": ["blog"],
         }
-        for a in soup.select("a[href]"):
-            text = text_of(a)
-            href = a.get("href", "")
-            low = text.lower()
+        for a in page.links.matching(k for keys in important_keys.values() for k in keys):
             for title, keys in important_keys.items():
-                if any(k in low or k in href.lower() for k in keys):
-                    u = absolutize(self.root, href)
+                if any(k in a.text_lower or k in a.href_lower for k in keys):
+                    u = a.url
                     if u:
-                        links.append(Link(title=title if title != "Contact Us" else text or title, url=u))
+                        links.append(Link(title=title if title != "Contact Us" else a.text or title, url=u))
         # de-duplicate by url
         uniq: dict[str, Link] = {}
         for link in links:
@@ -248,72 +422,186 @@ class ShopifyScraper:
                 uniq[link.url] = link
         return about, list(uniq.values())
 
-    async def extract_contact(self, soup: BeautifulSoup) -> ContactInfo:
-        text = text_of(soup)
-        emails = find_emails(text)
-        phones = find_phones(text)
+    async def extract_contact(self, page: Page) -> ContactInfo:
         # try to find address or contact page
-        contact_page = None
-        for a in soup.select("a[href]"):
-            href = a.get("href", "").lower()
-            if any(k in href for k in ["contact", "support"]):
-                contact_page = absolutize(self.root, a.get("href"))
-                break
-        return ContactInfo(emails=emails, phones=phones, address=None, contact_page_url=contact_page)
+        anchors = page.links.matching(["contact", "support"], in_text=False)
+        listed = self.sitemap_pages("contact")
+        contact_page = anchors[0].url if anchors else listed[0] if listed else None
+        return ContactInfo(emails=page.emails, phones=page.phones, address=None, contact_page_url=contact_page)
 
-    async def scrape(self) -> BrandContext:
-        errors: list[str] = []
-        home = await self.get_home()
+    def remaining(self) -> float | None:
+        """Seconds left in this scrape's deadline, or None when unbounded."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    async def _products_section(self, on_page: PageCallback | None) -> None:
+        """Walk the catalog, handing pages to ``on_page`` (None: products not wanted, only stats)."""
+        variants = VariantColumns() if "catalog_stats" in self.sections else None
+        self.catalog = CatalogFetcher(
+            self, max_products=self.max_products, on_page=on_page, retain=False, variants=variants
+        )
+        if await self.catalog.walk():
+            if variants is not None:
+                # NumPy work on a six-figure variant count; off the loop all the same
+                self.catalog_stats = await asyncio.to_thread(catalog_stats, variants, self.currency)
+            return
+        if on_page is None:
+            return
+        # fallback parse homepage collections
+        try:
+            products = await self.parse_products_from_html(self.home_html)
+        except Exception as e:  # noqa: BLE001
+            self.errors.append(f"product_parse_error: {e}")
+            return
+        if products:
+            await on_page(products[: self.max_products])
+
+    async def stream(self) -> AsyncIterator[tuple[str, Any]]:
+        """Yield ``(field, value)`` events as sections finish.
+
+        Products arrive one catalog page at a time and are not retained, so memory
+        stays bounded by a page. The last event is ``done`` with the catalog count,
+        fetch statistics and errors.
+        """
+        wanted = self.sections
+        # read alongside the home page; only the sections that look pages up in it wait for it
+        sitemap = None
+        if settings.sitemap_discovery and wanted & LINKED_SECTIONS:
+            sitemap = asyncio.create_task(self.load_sitemap())
+        with self.trace.stage("home"):
+            home = await self.get_home()
         if not home:
+            if sitemap is not None:
+                sitemap.cancel()
+            self.trace.finish("unreachable")
             raise FileNotFoundError("Website not reachable")
 
-        site_name = text_of(home.select_one("title")) or None
-        domain = urlparse(self.root).netloc
+        # small queue: a slow consumer holds back the catalog walk instead of buffering it
+        queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(maxsize=settings.stream_queue_size)
+
+        emitted = 0
+
+        async def on_page(products: list[Product]) -> None:
+            nonlocal emitted
+            await queue.put(("products", products))
+            emitted += len(products)
+
+        async def about_section() -> None:
+            about_text, important_links = await self.extract_about_and_links(home, fetch_about="about" in wanted)
+            if "about" in wanted:
+                await queue.put(("about_text", about_text))
+            if "important_links" in wanted:
+                await queue.put(("important_links", important_links))
+
+        async def emit(field: str, coro: Awaitable[Any]) -> None:
+            await queue.put((field, await coro))
+
+        async def discover() -> None:
+            if sitemap is not None:
+                await self._wait_for_sitemap(sitemap)
+            self.prefetch_subpages(home)
+
+        # the linked-page sections look pages up in the sitemap; the rest of the scrape does not wait for it
+        linked = asyncio.create_task(discover())
+
+        def start(name: str, section: Callable[[], Awaitable[None]], needs_links: bool = True) -> None:
+            async def staged() -> None:
+                if needs_links:
+                    # shielded: one section cancelled at the deadline must not cancel discovery for the others
+                    await asyncio.shield(linked)
+                with self.trace.stage(name):
+                    await section()
+
+            tasks[name] = asyncio.create_task(staged())
+
+        async def supervise() -> None:
+            pending: set[asyncio.Task[Any]] = set()
+            if tasks:
+                _, pending = await asyncio.wait(tasks.values(), timeout=self.remaining())
+            # out of time: drop unfinished sections (and their sub-fetches), keep the rest
+            leftovers = pending | {t for t in [linked, *self._subpages.values()] if not t.done()}
+            for task in leftovers:
+                task.cancel()
+            if leftovers:
+                await asyncio.wait(leftovers)
+            for name, task in tasks.items():
+                if task in pending:
+                    self.errors.append(f"deadline_exceeded: {name}")
+                elif task.exception() is not None:
+                    self.errors.append(f"{name}_error: {task.exception()}")
+            await queue.put(("done", None))
 
         # Parallel tasks
-        products_task = asyncio.create_task(self.get_products_json())
-        hero_task = asyncio.create_task(self.extract_hero_products(home))
-        policies_task = asyncio.create_task(self.extract_policies(home))
-        faqs_task = asyncio.create_task(self.extract_faqs(home))
-        about_task = asyncio.create_task(self.extract_about_and_links(home))
-        contact_task = asyncio.create_task(self.extract_contact(home))
-
-        products = await products_task
-        if not products:
-            # fallback parse homepage collections
-            try:
-                products = await self.parse_products_from_html(home)
-            except Exception as e:  # noqa: BLE001
-                errors.append(f"product_parse_error: {e}")
-
-        hero = await hero_task
-        policies = await policies_task
-        faqs = await faqs_task
-        about_text, important_links = await about_task
-        contact = await contact_task
-
-        ctx = BrandContext(
-            site_url=self.root,
-            site_name=site_name,
-            domain=domain,
-            catalog_count=len(products) or None,
-            products=products,
-            hero_products=hero,
-            policies=policies,
-            faqs=faqs,
-            social_handles=find_social_links(home, self.root),
-            contact=contact,
-            about_text=about_text,
-            important_links=important_links,
-            errors=errors,
-        )
+        tasks: dict[str, asyncio.Task[Any]] = {}
+        if wanted & {"products", "catalog_stats"}:
+            start("products", lambda: self._products_section(on_page if "products" in wanted else None), False)
+        if "policies" in wanted:
+            start("policies", lambda: emit("policies", self.extract_policies(home)))
+        if "faqs" in wanted:
+            start("faqs", lambda: emit("faqs", self.extract_faqs(home)))
+        if wanted & {"about", "important_links"}:
+            start("about", about_section)
+        if "contact" in wanted:
+            start("contact", lambda: emit("contact", self.extract_contact(home)))
 
-        return ctx
+        supervisor = asyncio.create_task(supervise())
+        try:
+            yield "site", {"site_url": self.root, "site_name": home.title, "domain": urlparse(self.root).netloc}
+            if "hero_products" in wanted:
+                yield "hero_products", home.hero_products
+            if "social_handles" in wanted:
+                yield "social_handles", home.links.socials()
+            while True:
+                field, value = await queue.get()
+                if field == "done":
+                    break
+                yield field, value
+        finally:
+            # the consumer may stop early (client disconnect); stop the work too
+            for task in [supervisor, linked, *tasks.values(), *self._subpages.values()]:
+                task.cancel()
+            if sitemap is not None:
+                sitemap.cancel()
+        # products handed out (HTML fallback included); the walked count when only stats were wanted
+        count = emitted if "products" in wanted else self.catalog.count if self.catalog else 0
+        self.trace.finish("partial" if self.errors else "ok")
+        yield "done", {
+            "catalog_count": count or None,
+            "catalog_fetch": self.catalog.stats if self.catalog else None,
+            "catalog_stats": self.catalog_stats,
+            "fetch_cache": self.fetch_cache,
+            "timings": self.trace.timings() if self.include_timings else None,
+            "errors": self.errors,
+        }
 
+    async def scrape(self) -> BrandContext:
+        fields: dict[str, Any] = {}
+        products: list[Product] = []
+        async for field, value in self.stream():
+            if field == "products":
+                products.extend(value)
+            elif field in ("site", "done"):
+                fields.update(value)
+            else:
+                fields[field] = value
+        return BrandContext(products=products, **fields)
 
-async def get_insights(url: str) -> BrandContext:
-    scraper = ShopifyScraper(url)
-    try:
-        return await scraper.scrape()
-    finally:
-        await scraper.close()
+
+async def get_insights(
+    url: str,
+    http: HttpPool | None = None,
+    deadline: float | None = None,
+    sections: Iterable[str] | None = None,
+    max_products: int | None = None,
+    include_timings: bool = False,
+) -> BrandContext:
+    scraper = ShopifyScraper(
+        url,
+        http=http,
+        deadline=deadline,
+        sections=sections,
+        max_products=max_products,
+        include_timings=include_timings,
+    )
+    return await scraper.scrape()
@@ -0,0 +1,439 @@
+"""Cross-store search over scraped products, FAQs and policies.
+
+An in-memory inverted index, updated as stores are scraped and ranked with
+BM25. It is saved to ``SEARCH_INDEX_PATH`` at most every
+``SEARCH_SAVE_INTERVAL_SECONDS`` and on shutdown, and reloaded at startup;
+when that path is not writable the index lives in memory only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import numpy as np
+import numpy.typing as npt
+import orjson
+
+from .config import settings
+from .schemas import BrandContext, SearchHit, SearchKind
+
+log = logging.getLogger(__name__)
+
+KINDS: tuple[SearchKind, ...] = ("product", "faq", "policy")
+# the BrandContext section each kind of document comes from
+KIND_SECTIONS = {"product": "products", "faq": "faqs", "policy": "policies"}
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_C1 = BM25_K1 * (1 - BM25_B)
+# relative change of the average document length that rebuilds impact orders
+NORM_DRIFT = 0.1
+TITLE_WEIGHT = 2
+# documents added or removed between yields to the event loop during an update
+UPDATE_STEP = 1000
+FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    ["a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how", "i", "if", "in", "is", "it", "its", "my", "of", "on", "or", "our", "the", "this", "to", "we", "what", "when", "where", "which", "who", "will", "with", "you", "your"]
+)
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [sys.intern(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+@dataclass(slots=True)
+class _Doc:
+    store: str
+    kind: SearchKind
+    title: str
+    url: str | None
+    length: int
+    terms: dict[str, int]
+
+
+def _store_key(ctx: BrandContext) -> str:
+    return (ctx.domain or urlparse(str(ctx.site_url)).netloc or str(ctx.site_url)).lower()
+
+
+def _documents(ctx: BrandContext, kinds: Iterable[str]) -> list[tuple[SearchKind, str, str | None, list[str], list[str]]]:
+    """(kind, title, url, title tokens, body tokens) for every document of ``ctx`` of the given kinds."""
+    kinds = set(kinds)
+    docs: list[tuple[SearchKind, str, str | None, list[str], list[str]]] = []
+    if "product" in kinds:
+        for p in ctx.products:
+            body = [*p.tags, p.vendor or "", p.product_type or ""]
+            url = str(p.url) if p.url else None
+            docs.append(("product", p.title, url, tokenize(p.title), tokenize(" ".join(body))))
+    if "faq" in kinds:
+        for f in ctx.faqs:
+            docs.append(("faq", f.question, None, tokenize(f.question), tokenize(f.answer)))
+    if "policy" in kinds:
+        for pol in ctx.policies:
+            url = str(pol.url) if pol.url else None
+            docs.append(("policy", pol.name, url, tokenize(pol.name), tokenize(pol.content_excerpt)))
+    return docs
+
+
+def prepare(ctx: BrandContext, kinds: Iterable[str]) -> list[_Doc]:
+    """Tokenized documents of ``ctx``; touches no index state, so it can run in a thread."""
+    store = _store_key(ctx)
+    docs = []
+    for kind, title, url, title_tokens, body_tokens in _documents(ctx, kinds):
+        terms = Counter(body_tokens)
+        for t in title_tokens:
+            terms[t] += TITLE_WEIGHT
+        if terms:
+            docs.append(_Doc(store, kind, title, url, len(title_tokens) * TITLE_WEIGHT + len(body_tokens), dict(terms)))
+    return docs
+
+
+class SearchIndex:
+    """Postings per kind and term (``doc id -> weighted term frequency``), replaced per store and kind.
+
+    A term's impact (its BM25 score without the idf) is cached per document
+    on first use and dropped when the term's postings change or the average
+    document length drifts by more than ``NORM_DRIFT``; scores use that
+    snapshot of the average length. Cached impacts are NumPy columns, summed
+    into a dense score vector over every document id.
+    """
+
+    def __init__(self) -> None:
+        self._reset()
+        self.updates = 0
+        self.dirty = False
+        self.saved_at = time.time()
+        self._saving: asyncio.Task[None] | None = None
+        # updates are applied one at a time, in the order they were asked for
+        self._updating = asyncio.Lock()
+
+    def _reset(self) -> None:
+        self._docs: list[_Doc | None] = []
+        # per doc id, read while scoring without touching the doc (0 / "" once removed)
+        self._lengths: list[int] = []
+        self._kinds: list[str] = []
+        self._postings: dict[str, dict[str, dict[int, int]]] = {kind: {} for kind in KINDS}
+        self._by_store: dict[str, dict[str, list[int]]] = {}
+        self._columns: dict[tuple[str, str], tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]] = {}
+        self._norm = 0.0
+        self._live = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def stores(self) -> int:
+        return len(self._by_store)
+
+    def add_context(self, ctx: BrandContext, kinds: Iterable[str] = KINDS) -> int:
+        """Index a scrape, replacing what was indexed for the store in those kinds; returns docs added."""
+        kinds = tuple(kinds)
+        return self.replace(_store_key(ctx), kinds, prepare(ctx, kinds))
+
+    def replace(self, store: str, kinds: Iterable[str], docs: list[_Doc]) -> int:
+        """Swap the store's documents of ``kinds`` for ``docs`` (from ``prepare``); returns docs added."""
+        for _ in self._replace_steps(store, kinds, docs):
+            pass
+        if self._fragmented():
+            self._adopt(_built([d for d in self._docs if d is not None]))
+        return len(docs)
+
+    async def update(self, ctx: BrandContext, kinds: Iterable[str]) -> int:
+        """``add_context`` without holding the event loop.
+
+        Tokenizing and compaction run in a thread; postings are changed on the
+        loop in steps of ``UPDATE_STEP`` documents, so a search in between can
+        see the store half replaced.
+        """
+        kinds = tuple(kinds)
+        async with self._updating:
+            docs = await asyncio.to_thread(prepare, ctx, kinds)
+            for _ in self._replace_steps(_store_key(ctx), kinds, docs):
+                await asyncio.sleep(0)
+            if self._fragmented():
+                live = [d for d in self._docs if d is not None]
+                fresh = await asyncio.to_thread(_built, live)
+                # nothing else mutates the index while the update lock is held
+                self._adopt(fresh)
+        return len(docs)
+
+    def remove_store(self, store: str) -> None:
+        for kind in KINDS:
+            for _ in self._remove(store.lower(), kind):
+                pass
+        self.dirty = True
+
+    def _replace_steps(self, store: str, kinds: Iterable[str], docs: list[_Doc]) -> Iterator[None]:
+        for kind in kinds:
+            yield from self._remove(store, kind)
+        for n, doc in enumerate(docs, 1):
+            self._add(doc)
+            if n % UPDATE_STEP == 0:
+                yield
+        self.updates += 1
+        self.dirty = True
+
+    def _add(self, doc: _Doc) -> None:
+        doc_id = len(self._docs)
+        self._docs.append(doc)
+        self._lengths.append(doc.length)
+        self._kinds.append(doc.kind)
+        postings = self._postings[doc.kind]
+        for term, tf in doc.terms.items():
+            postings.setdefault(term, {})[doc_id] = tf
+            self._columns.pop((doc.kind, term), None)
+        self._by_store.setdefault(doc.store, {}).setdefault(doc.kind, []).append(doc_id)
+        self._live += 1
+        self._total_length += doc.length
+
+    def _remove(self, store: str, kind: str) -> Iterator[None]:
+        kinds = self._by_store.get(store)
+        if not kinds or kind not in kinds:
+            return
+        ids = kinds.pop(kind)
+        if not kinds:
+            del self._by_store[store]
+        by_term = self._postings[kind]
+        for n, doc_id in enumerate(ids, 1):
+            doc = self._docs[doc_id]
+            assert doc is not None
+            for term in doc.terms:
+                postings = by_term[term]
+                del postings[doc_id]
+                if not postings:
+                    del by_term[term]
+                self._columns.pop((kind, term), None)
+            self._docs[doc_id] = None
+            self._lengths[doc_id] = 0
+            self._kinds[doc_id] = ""
+            self._live -= 1
+            self._total_length -= doc.length
+            if n % UPDATE_STEP == 0:
+                yield
+
+    def _fragmented(self) -> bool:
+        # ids are list positions, so removed documents leave holes until enough pile up
+        return len(self._docs) > 1024 and self._live < len(self._docs) // 2
+
+    def _adopt(self, other: SearchIndex) -> None:
+        for name in _STATE:
+            setattr(self, name, getattr(other, name))
+        self.dirty = True
+
+    def _normalization(self) -> float:
+        # BM25 length normalization k1 * (1 - b + b * len / avg) is split into BM25_C1 + c2 * len
+        current = BM25_K1 * BM25_B * self._live / max(1, self._total_length)
+        if not self._norm or abs(current - self._norm) > NORM_DRIFT * self._norm:
+            self._norm = current
+            self._columns.clear()
+        return self._norm
+
+    def _impact_columns(self, kind: str, term: str) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]:
+        key = (kind, term)
+        columns = self._columns.get(key)
+        if columns is None:
+            postings = self._postings[kind][term]
+            ids = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            lengths = np.fromiter((self._lengths[d] for d in postings), dtype=np.float64, count=len(postings))
+            columns = self._columns[key] = (ids, tf / (tf + BM25_C1 + self._norm * lengths))
+        return columns
+
+    def search(self, query: str, *, kind: str | None = None, store: str | None = None, limit: int = 20) -> tuple[int, list[SearchHit]]:
+        """BM25-ranked documents matching any query term; returns (matches, top ``limit`` hits)."""
+        terms = set(tokenize(query))
+        kinds = KINDS if kind is None else (kind,)
+        if not terms or not self._live or not set(kinds) <= set(KINDS) or limit < 1:
+            return 0, []
+        c2 = self._normalization()
+        weights: dict[str, float] = {}
+        for term in terms:
+            df = sum(len(self._postings[k].get(term, ())) for k in KINDS)
+            if df:
+                weights[term] = math.log(1 + (self._live - df + 0.5) / (df + 0.5)) * (BM25_K1 + 1)
+        # per kind, the (weight, postings) of every query term present in it
+        by_kind = {k: [(w, self._postings[k][t]) for t, w in weights.items() if t in self._postings[k]] for k in kinds}
+        lengths, doc_kinds = self._lengths, self._kinds
+
+        def score(doc_id: int) -> float:
+            norm = BM25_C1 + c2 * lengths[doc_id]
+            total = 0.0
+            for weight, postings in by_kind[doc_kinds[doc_id]]:
+                tf = postings.get(doc_id)
+                if tf:
+                    total += weight * tf / (tf + norm)
+            return total
+
+        if store is not None:
+            # a single store is small: score its documents directly
+            owned = self._by_store.get(store, {})
+            scored = [(s, doc_id) for k in kinds for doc_id in owned.get(k, ()) if (s := score(doc_id)) > 0]
+            matches = len(scored)
+            top = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        else:
+            lists = [(weights[t], *self._impact_columns(k, t)) for k in kinds for t in weights if t in self._postings[k]]
+            matches, top = self._top(lists, limit)
+        hits = []
+        for s, doc_id in top:
+            doc = self._docs[doc_id]
+            assert doc is not None
+            hits.append(SearchHit(store=doc.store, kind=doc.kind, title=doc.title, url=doc.url, score=round(s, 4)))
+        return matches, hits
+
+    def _top(
+        self, lists: list[tuple[float, npt.NDArray[np.int64], npt.NDArray[np.float64]]], limit: int
+    ) -> tuple[int, list[tuple[float, int]]]:
+        scores = np.zeros(len(self._docs))
+        for weight, ids, impacts in lists:
+            scores[ids] += weight * impacts  # ids are unique within a term's postings
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(scores[matched], -limit)[-limit:]]
+        top = sorted(((float(scores[d]), int(d)) for d in matched), key=lambda item: (-item[0], item[1]))
+        return int(np.count_nonzero(scores)), top
+
+    def dumps(self) -> bytes:
+        return _encode([d for d in self._docs if d is not None])
+
+    @classmethod
+    def loads(cls, data: bytes) -> SearchIndex:
+        index = cls()
+        raw = orjson.loads(data)
+        if raw.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported search index version {raw.get('version')}")
+        for store, kind, title, url, length, terms in raw["docs"]:
+            index._add(_Doc(store, kind, title, url, length, {sys.intern(t): tf for t, tf in terms.items()}))
+        return index
+
+    async def save(self, path: str) -> None:
+        # the live documents are listed on the loop, where the index is mutated; a document
+        # never changes once added, so encoding and writing both go to a thread
+        docs = [d for d in self._docs if d is not None]
+        self.dirty = False
+        self.saved_at = time.time()
+        try:
+            await asyncio.to_thread(_write_atomic, path, docs)
+        except BaseException:
+            self.dirty = True
+            raise
+
+    def maybe_save(self, path: str) -> None:
+        """Start a background save once ``search_save_interval_seconds`` passed since the last one."""
+        if self._saving is not None and not self._saving.done():
+            return
+        if self.dirty and time.time() - self.saved_at >= settings.search_save_interval_seconds:
+            self._saving = asyncio.create_task(self._save_logged(path))
+
+    async def _save_logged(self, path: str) -> None:
+        try:
+            await self.save(path)
+        except Exception:
+            # the index stays dirty and is saved again after the interval
+            log.exception("saving the search index to %s failed", path)
+
+    async def close(self, path: str) -> None:
+        if self._saving is not None:
+            await self._saving
+        if self.dirty:
+            await self._save_logged(path)
+
+    def stats(self) -> dict[str, int]:
+        return {"documents": self._live, "stores": self.stores, "terms": len(set().union(*self._postings.values())), "updates": self.updates}
+
+
+_STATE = ("_docs", "_lengths", "_kinds", "_postings", "_by_store", "_columns", "_norm", "_live", "_total_length")
+
+
+def _built(docs: list[_Doc]) -> SearchIndex:
+    """A fresh index of ``docs`` with dense ids, to take over a fragmented one's state."""
+    index = SearchIndex()
+    for doc in docs:
+        index._add(doc)
+    return index
+
+
+def _encode(docs: list[_Doc]) -> bytes:
+    rows = [[d.store, d.kind, d.title, d.url, d.length, d.terms] for d in docs]
+    return orjson.dumps({"version": FORMAT_VERSION, "docs": rows})
+
+
+def _write_atomic(path: str, docs: list[_Doc]) -> None:
+    data = _encode(docs)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_index(path: str) -> SearchIndex:
+    try:
+        with open(path, "rb") as f:
+            return SearchIndex.loads(f.read())
+    except FileNotFoundError:
+        return SearchIndex()
+    except (ValueError, KeyError, TypeError) as e:
+        log.warning("search index at %s is unreadable (%s); starting empty", path, e)
+        return SearchIndex()
+
+
+_index: SearchIndex | None = None
+# where the index is saved; None when SEARCH_INDEX_PATH cannot be written (a read-only deployment)
+_save_path: str | None = None
+
+
+def _writable(path: str) -> bool:
+    # saves write a temporary file next to the index and rename it over
+    folder = os.path.dirname(os.path.abspath(path))
+    return os.access(folder, os.W_OK) and (not os.path.exists(path) or os.access(path, os.W_OK))
+
+
+def get_search_index() -> SearchIndex | None:
+    """The process-wide index, loaded from disk on first use; None when SEARCH_ENABLED is off."""
+    global _index, _save_path
+    if not settings.search_enabled:
+        return None
+    if _index is None:
+        path = settings.search_index_path
+        _index = load_index(path)
+        _save_path = path if _writable(path) else None
+        if _save_path is None:
+            log.warning("search index path %s is not writable; the index is kept in memory only", path)
+    return _index
+
+
+async def index_context(ctx: BrandContext, sections: Iterable[str] | None = None) -> None:
+    """Add a scrape to the index; with ``sections``, only the kinds those sections cover are replaced.
+
+    Products are replaced only by a full catalog walk, the rule persistence uses to
+    delete products: a capped or cut-short list would drop the rest of the store's.
+    """
+    index = get_search_index()
+    if index is None:
+        return
+    wanted = set(sections) if sections else None
+    kinds = [k for k in KINDS if wanted is None or KIND_SECTIONS[k] in wanted]
+    if "product" in kinds and not ctx.full_catalog():
+        kinds.remove("product")
+    if kinds:
+        await index.update(ctx, kinds)
+        if _save_path is not None:
+            index.maybe_save(_save_path)
+
+
+async def close_search_index() -> None:
+    if _index is not None and _save_path is not None:
+        await _index.close(_save_path)
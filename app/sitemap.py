@@ -0,0 +1,209 @@
+"""Sitemap discovery: the URLs a store publishes, with their lastmod.
+
+Shopify serves ``/sitemap.xml`` as an index of child sitemaps per kind
+(``sitemap_products_1.xml?from=..&to=..``, ``sitemap_pages_1.xml``,
+``sitemap_collections_1.xml``, ``sitemap_blogs_1.xml``). Bodies are parsed as
+they arrive and every ``<url>`` is released once read, so a product sitemap of
+tens of thousands of entries is never held whole.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, cast
+from urllib.parse import urlsplit
+
+from .config import settings
+
+if TYPE_CHECKING:
+    from .scraper import ShopifyScraper
+
+log = logging.getLogger(__name__)
+
+SITEMAP_KINDS = frozenset({"products", "pages", "collections", "blogs"})
+URL_KINDS = SITEMAP_KINDS | {"policies"}
+_CHILD = re.compile(r"sitemap_([a-z]+)_\d+\.xml$")
+
+
+@dataclass(frozen=True, slots=True)
+class SitemapEntry:
+    loc: str
+    lastmod: datetime | None = None
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    """A W3C datetime (``2024-01-01``, ``2024-01-01T08:00:00-05:00``) as aware UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=UTC) if parsed.tzinfo is None else parsed.astimezone(UTC)
+
+
+def sitemap_kind(url: str) -> str | None:
+    """``pages`` for ``.../sitemap_pages_1.xml``; None for anything not named like a Shopify child sitemap."""
+    match = _CHILD.search(urlsplit(url).path)
+    return match.group(1) if match and match.group(1) in SITEMAP_KINDS else None
+
+
+def url_kind(url: str) -> str | None:
+    # the first known segment, so locale prefixes (/fr/pages/...) still classify
+    for segment in urlsplit(url).path.split("/"):
+        if segment in URL_KINDS:
+            return segment
+    return None
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """Incremental parser for both ``<urlset>`` and ``<sitemapindex>`` documents.
+
+    ``feed`` bytes as they arrive; each ``<url>`` goes to ``on_url`` as soon as
+    its closing tag is read and is then dropped from the tree.
+    """
+
+    def __init__(self, on_url: Callable[[SitemapEntry], None]):
+        self.on_url = on_url
+        self.sitemaps: list[SitemapEntry] = []
+        self._parser: ET.XMLPullParser[ET.Element] = ET.XMLPullParser(events=("start", "end"))
+        self._root: ET.Element | None = None
+
+    def feed(self, data: bytes) -> None:
+        self._parser.feed(data)
+        self._drain()
+
+    def close(self) -> None:
+        self._parser.close()
+        self._drain()
+
+    def _drain(self) -> None:
+        for event in self._parser.read_events():
+            # "start" and "end", the only events asked for, come as (name, element)
+            kind, elem = cast(tuple[str, ET.Element], event)
+            if kind == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+            tag = _local(elem.tag)
+            if tag not in ("url", "sitemap"):
+                continue
+            loc = lastmod = None
+            for child in elem:
+                name = _local(child.tag)
+                if name == "loc":
+                    loc = (child.text or "").strip()
+                elif name == "lastmod":
+                    lastmod = parse_lastmod(child.text)
+            if loc:
+                entry = SitemapEntry(loc, lastmod)
+                if tag == "url":
+                    self.on_url(entry)
+                else:
+                    self.sitemaps.append(entry)
+            # completed entries are the only children the root holds
+            if self._root is not None:
+                self._root.clear()
+
+
+class SitemapIndex:
+    """Every URL read from a store's sitemaps, by kind, with its lastmod.
+
+    Lookups are by path so they match whichever host (primary domain or
+    ``*.myshopify.com``) a link or the sitemap happens to use.
+    """
+
+    def __init__(self, max_urls: int | None = None):
+        self.max_urls = max_urls if max_urls is not None else settings.sitemap_max_urls
+        self._lastmod: dict[str, datetime | None] = {}
+        self._by_kind: dict[str, list[str]] = {}
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return urlsplit(url).path.rstrip("/").lower()
+
+    @property
+    def full(self) -> bool:
+        return len(self._lastmod) >= self.max_urls
+
+    def add(self, entry: SitemapEntry) -> None:
+        key = self._key(entry.loc)
+        if key in self._lastmod or self.full:
+            return
+        self._lastmod[key] = entry.lastmod
+        self._by_kind.setdefault(url_kind(entry.loc) or "other", []).append(entry.loc)
+
+    def __len__(self) -> int:
+        return len(self._lastmod)
+
+    def __contains__(self, url: str) -> bool:
+        return self._key(url) in self._lastmod
+
+    def lastmod(self, url: str) -> datetime | None:
+        return self._lastmod.get(self._key(url))
+
+    def unchanged_since(self, url: str, when: float) -> bool:
+        """True when the sitemap dates ``url``'s last change at or before ``when`` (epoch seconds)."""
+        lastmod = self.lastmod(url)
+        return lastmod is not None and lastmod.timestamp() <= when
+
+    def urls(self, kind: str) -> list[str]:
+        return self._by_kind.get(kind, [])
+
+    def pages_matching(self, keys: Iterable[str]) -> list[str]:
+        """Pages and policies whose slug contains any of ``keys``, in sitemap order."""
+        keys = tuple(keys)
+        found = []
+        for url in self.urls("pages") + self.urls("policies"):
+            slug = self._key(url).rsplit("/", 1)[-1]
+            if any(k in slug for k in keys):
+                found.append(url)
+        return found
+
+    def stats(self) -> dict[str, int]:
+        return {kind: len(urls) for kind, urls in self._by_kind.items()}
+
+
+class SitemapReader:
+    """Reads ``/sitemap.xml`` and the child sitemaps of the wanted kinds into a ``SitemapIndex``."""
+
+    def __init__(self, scraper: ShopifyScraper, kinds: Iterable[str] | None = ("pages",)):
+        self.scraper = scraper
+        self.kinds = frozenset(kinds) if kinds is not None else SITEMAP_KINDS
+        self.index = SitemapIndex()
+        self.fetched = 0
+
+    async def load(self) -> SitemapIndex:
+        root = await self._read(self.scraper.root + "/sitemap.xml")
+        children = [s.loc for s in root if sitemap_kind(s.loc) in self.kinds]
+        await asyncio.gather(*(self._read(url) for url in children))
+        return self.index
+
+    async def _read(self, url: str) -> list[SitemapEntry]:
+        """Stream one sitemap into the index; returns the child sitemaps it lists."""
+        parser = SitemapParser(self.index.add)
+
+        def feed(chunk: bytes) -> bool:
+            parser.feed(chunk)
+            return not self.index.full
+
+        self.fetched += 1
+        try:
+            status = await self.scraper.fetch_into(url, feed)
+            if status == 200:
+                parser.close()
+        except ET.ParseError as e:
+            # keep whatever was read before the malformed part
+            log.debug("sitemap %s: %s", url, e)
+        return parser.sitemaps
+
@@ -4,8 +4,6 @@ import re
 import urllib.parse
 from collections.abc import Iterable
 
-from bs4 import BeautifulSoup
-
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 PHONE_RE = re.compile(r"\+?\d[\d\-()\s]{6,}\d")
 
@@ -27,12 +25,6 @@ def absolutize(base: str, href: str | None) -> str | None:
     return urllib.parse.urljoin(base, href)
 
 
-def text_of(el) -> str:
-    if not el:
-        return ""
-    return " ".join(el.get_text(" ", strip=True).split())
-
-
 def find_emails(text: str) -> list[str]:
     return sorted(set(EMAIL_RE.findall(text or "")))
 
@@ -41,31 +33,23 @@ def find_phones(text: str) -> list[str]:
     return sorted(set(PHONE_RE.findall(text or "")))
 
 
-def find_social_links(soup: BeautifulSoup, base: str) -> dict[str, str]:
-    socials = {}
-    for a in soup.select("a[href]"):
-        href = a.get("href", "").strip()
-        u = absolutize(base, href)
-        if not u:
-            continue
-        host = urllib.parse.urlparse(u).netloc.lower()
-        if any(k in host for k in ["instagram.com", "instagr.am"]):
-            socials.setdefault("instagram", u)
-        elif "facebook.com" in host:
-            socials.setdefault("facebook", u)
-        elif "tiktok.com" in host:
-            socials.setdefault("tiktok", u)
-        elif "twitter.com" in host or "x.com" in host:
-            socials.setdefault("twitter", u)
-        elif "youtube.com" in host or "youtu.be" in host:
-            socials.setdefault("youtube", u)
-        elif "pinterest.com" in host:
-            socials.setdefault("pinterest", u)
-        elif "linkedin.com" in host:
-            socials.setdefault("linkedin", u)
-        elif "snapchat.com" in host:
-            socials.setdefault("snapchat", u)
-    return socials
+SOCIAL_HOSTS = [
+    ("instagram", ("instagram.com", "instagr.am")),
+    ("facebook", ("facebook.com",)),
+    ("tiktok", ("tiktok.com",)),
+    ("twitter", ("twitter.com", "x.com")),
+    ("youtube", ("youtube.com", "youtu.be")),
+    ("pinterest", ("pinterest.com",)),
+    ("linkedin", ("linkedin.com",)),
+    ("snapchat", ("snapchat.com",)),
+]
+
+
+def social_network(host: str) -> str | None:
+    for name, keys in SOCIAL_HOSTS:
+        if any(k in host for k in keys):
+            return name
+    return None
 
 
 def unique(seq: Iterable[str]) -> list[str]:
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+EXECUTOR_KINDS = ("none", "thread", "process")
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor | None:
+    """The process-wide parse/extract pool, created on first use from settings."""
+    global _executor
+    kind = settings.parse_executor
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"Unknown parse executor: {kind}")
+    if kind == "none":
+        return None
+    if _executor is None:
+        workers = settings.parse_workers or min(8, os.cpu_count() or 1)
+        if kind == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_parse(fn: Callable[..., T], html: str, *args: Any) -> T:
+    """Run a parse function over ``html`` off the event loop.
+
+    Small documents are parsed inline: handing them to the pool costs more than the
+    parse itself and would queue them behind heavy pages.
+    """
+    executor = get_executor()
+    if executor is None or len(html) < settings.parse_inline_max_bytes:
+        return fn(html, *args)
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, html, *args)
@@ -0,0 +1,87 @@
+"""Memory of the paths that walk a catalog, measured under ``tracemalloc``.
+
+- ``scrape()``: what ``/api/insights``, batches and recrawls run; pages arrive
+  as ``Product`` models and the whole list ends up in the ``BrandContext``.
+- ``stream()``: ``/api/insights/stream``; each page is dropped once consumed.
+- catalog sync: ``CatalogFetcher(keep_raw=True)``, holding every decoded
+  entry (variants, options, ``body_html``) for the diff.
+
+Reports the peak, what is still held once the walk returns (the context,
+or the fetcher for sync) and the wall time.
+
+    python -m bench.catalog_memory --products 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.catalog import CatalogFetcher
+from app.config import settings
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+
+from .fakeshop import FakeShopify, StoreSpec
+
+MIB = 1024 * 1024
+
+
+async def _scrape(scraper: ShopifyScraper) -> tuple[Any, int]:
+    ctx = await scraper.scrape()
+    return ctx, len(ctx.products)
+
+
+async def _stream(scraper: ShopifyScraper) -> tuple[Any, int]:
+    count = 0
+    async for field, value in scraper.stream():
+        if field == "products":
+            count += len(value)
+    return None, count
+
+
+async def _sync(scraper: ShopifyScraper) -> tuple[Any, int]:
+    fetcher = CatalogFetcher(scraper, keep_raw=True)
+    return fetcher, await fetcher.walk()
+
+
+async def _measure(fake: FakeShopify, path: Callable[[ShopifyScraper], Awaitable[tuple[Any, int]]]) -> tuple[float, float, float, int]:
+    http = HttpPool(transport=fake.transport())
+    try:
+        scraper = ShopifyScraper("shop.test", http=http, response_cache=None, sections=["products"])
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        kept, count = await path(scraper)
+        seconds = time.perf_counter() - started
+        gc.collect()
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        return peak / MIB, held / MIB, seconds, count
+    finally:
+        await http.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # the fake store is in-process; pacing requests would only measure the limiter
+    settings.rate_limit_per_host = 0
+    fake = FakeShopify(StoreSpec(products=args.products))
+    fake.catalog(fake.default)  # generate the store's catalog outside the measurement
+    print(f"{'path':<14} {'products':>9} {'peak MiB':>10} {'held MiB':>10} {'seconds':>9}")
+    for label, path in (("scrape()", _scrape), ("stream()", _stream), ("catalog sync", _sync)):
+        peak, held, seconds, n = asyncio.run(_measure(fake, path))
+        print(f"{label:<14} {n:>9} {peak:>10.1f} {held:>10.1f} {seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
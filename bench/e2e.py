@@ -0,0 +1,166 @@
+"""End-to-end scrape benchmark against synthetic stores from ``bench.fakeshop``.
+
+Drives ``get_insights`` directly and the FastAPI endpoints in-process at several
+concurrency levels, and records throughput, latency percentiles, requests served
+by the fake stores and peak traced memory.
+
+    python -m bench.e2e --stores 32 --concurrency 1,8,32 --products 2000 --latency 0.02
+    python -m bench.e2e --scenario api --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+
+import httpx
+
+from app.http_pool import HttpPool, use_http_pool
+from app.scraper import get_insights
+
+from .fakeshop import FakeShopify, StoreSpec
+
+
+@dataclass
+class Result:
+    scenario: str
+    concurrency: int
+    scrapes: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    store_requests: int
+    errors: int
+    peak_mib: float
+
+    def line(self) -> str:
+        return (
+            f"{self.scenario:>8} c={self.concurrency:<3} n={self.scrapes:<4} "
+            f"{self.throughput:7.2f}/s  p50={self.p50_ms:8.1f}ms p95={self.p95_ms:8.1f}ms "
+            f"p99={self.p99_ms:8.1f}ms  requests={self.store_requests:<6} errors={self.errors:<3} "
+            f"peak={self.peak_mib:.1f}MiB"
+        )
+
+
+def _percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def _drive(hosts: list[str], concurrency: int, one: Callable[[str], Awaitable[None]]) -> tuple[list[float], int]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def timed(host: str) -> None:
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await one(host)
+            except Exception:  # noqa: BLE001
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(timed(h) for h in hosts))
+    return latencies, errors
+
+
+async def run_scenario(scenario: str, fake: FakeShopify, hosts: list[str], concurrency: int, memory: bool) -> Result:
+    http = HttpPool(transport=fake.transport())
+    use_http_pool(http)
+    fake.requests.clear()
+
+    if scenario == "scraper":
+
+        async def one(host: str) -> None:
+            await get_insights(f"https://{host}", http=http)
+
+        client = None
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api", timeout=None)
+        path = "/api/insights/stream" if scenario == "stream" else "/api/insights"
+
+        async def one(host: str) -> None:
+            assert client is not None
+            r = await client.post(path, json={"website_url": f"https://{host}"})
+            r.raise_for_status()
+
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    latencies, errors = await _drive(hosts, concurrency, one)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    if memory:
+        tracemalloc.stop()
+    if client is not None:
+        await client.aclose()
+    await http.aclose()
+    return Result(
+        scenario=scenario,
+        concurrency=concurrency,
+        scrapes=len(hosts),
+        seconds=round(seconds, 3),
+        throughput=round(len(hosts) / seconds, 2),
+        p50_ms=round(_percentile(latencies, 50), 1),
+        p95_ms=round(_percentile(latencies, 95), 1),
+        p99_ms=round(_percentile(latencies, 99), 1),
+        store_requests=sum(fake.requests.values()),
+        errors=errors,
+        peak_mib=round(peak / 2**20, 1),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", default="scraper", help="comma list of scraper, api, stream")
+    parser.add_argument("--stores", type=int, default=16, help="distinct stores scraped per run")
+    parser.add_argument("--concurrency", default="1,8")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--anchors", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows the run)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    spec = StoreSpec(
+        products=args.products,
+        anchors=args.anchors,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+    )
+    fake = FakeShopify(spec)
+    results = []
+    run = 0
+    for scenario in args.scenario.split(","):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            # fresh hosts per run so no cache from a previous run answers for free
+            hosts = [f"shop-{run}-{i}.test" for i in range(args.stores)]
+            run += 1
+            result = asyncio.run(run_scenario(scenario, fake, hosts, concurrency, not args.no_memory))
+            print(result.line())
+            results.append(asdict(result))
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
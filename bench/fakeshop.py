@@ -0,0 +1,231 @@
+"""A synthetic Shopify storefront for tests and benchmarks.
+
+Every host is its own store, generated deterministically from a ``StoreSpec``:
+``/products.json`` (page and since_id pagination), a home page with a configurable
+number of anchors, policy, FAQ, about and contact pages, and a Shopify-style
+``/sitemap.xml`` index with product and page sitemaps. Latency, 5xx errors and
+429 throttling can be injected per store. Use it in-process through
+``FakeShopify.transport()`` or run it as a real server:
+
+    python -m bench.fakeshop --port 8081 --products 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response
+
+POLICIES = ("privacy-policy", "refund-policy", "shipping-policy", "terms-of-service")
+VENDORS = ("Acme", "Globex", "Initech", "Umbrella", "Hooli")
+TYPES = ("Shirts", "Shoes", "Hats", "Bags", "Socks", "Jackets")
+PAGES = ("faq", "about-us", "contact")
+EPOCH = datetime(2024, 1, 1)
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+SITEMAP_CHUNK = 5000
+
+
+@dataclass(frozen=True)
+class StoreSpec:
+    products: int = 500
+    anchors: int = 200
+    faq_items: int = 8
+    policy_paragraphs: int = 40
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 0.05
+    since_id: bool = True
+    # honour order=updated_at desc (incremental catalog sync)
+    updated_order: bool = True
+    sitemap: bool = True
+    seed: int = 0
+
+
+def _product(i: int) -> dict[str, Any]:
+    pid = 1000 + i
+    return {
+        "id": pid,
+        "handle": f"product-{pid}",
+        "title": f"Product {pid} {TYPES[i % len(TYPES)][:-1]}",
+        "body_html": "<p>" + "Soft cotton, made to last. " * 20 + "</p>",
+        "vendor": VENDORS[i % len(VENDORS)],
+        "product_type": TYPES[i % len(TYPES)],
+        "tags": [f"tag-{i % 7}", f"season-{i % 4}"],
+        "updated_at": (EPOCH + timedelta(minutes=i)).isoformat() + "Z",
+        "variants": [
+            {
+                "id": pid * 10 + v,
+                "sku": f"SKU-{pid}-{v}",
+                "price": f"{10 + (i * 7 + v) % 90}.00",
+                "compare_at_price": f"{20 + (i * 7 + v) % 90}.00" if i % 3 == 0 else None,
+                "available": (i + v) % 5 != 0,
+            }
+            for v in range(1 + i % 3)
+        ],
+        "images": [{"src": f"https://cdn.example/{pid}-{n}.jpg"} for n in range(2)],
+        "options": [{"name": "Size", "values": ["S", "M", "L"]}],
+    }
+
+
+def _home(spec: StoreSpec, host: str) -> str:
+    collections = "".join(f'<li><a href="/collections/c{i}">Collection {i}</a></li>' for i in range(spec.anchors))
+    hero = "".join(f'<a href="/products/product-{1000 + i}">Hero {i}</a>' for i in range(min(4, spec.products)))
+    footer = "".join(f'<a href="/policies/{p}">{p.replace("-", " ").title()}</a>' for p in POLICIES)
+    return (
+        f"<html><head><title>{host}</title>"
+        '<script>Shopify.currency = {"active":"USD","rate":"1.0"};</script></head><body>'
+        f"<section class='hero'>{hero}</section><nav><ul>{collections}</ul></nav>"
+        f"<footer>{footer}<a href='/pages/faq'>FAQ</a><a href='/pages/about-us'>About us</a>"
+        f"<a href='/pages/contact'>Contact</a><a href='https://instagram.com/{host}'>Instagram</a>"
+        f"<p>hello@{host} +1 (555) 010-2000</p></footer></body></html>"
+    )
+
+
+def _text_page(title: str, paragraphs: int) -> str:
+    body = "".join(f"<p>{title} paragraph {i}: plain words about how this store works.</p>" for i in range(paragraphs))
+    return f"<html><head><title>{title}</title></head><body><header>nav</header><main>{body}</main></body></html>"
+
+
+def _faq_page(items: int) -> str:
+    faqs = "".join(
+        f"<details><summary>Question {i}?</summary><p>Answer number {i} with enough detail.</p></details>"
+        for i in range(items)
+    )
+    return f"<html><body><main>{faqs}</main></body></html>"
+
+
+class FakeShopify:
+    """ASGI app serving one synthetic store per host."""
+
+    def __init__(self, default: StoreSpec | None = None, stores: dict[str, StoreSpec] | None = None):
+        self.default = default or StoreSpec()
+        self.stores = stores or {}
+        self.requests: Counter[str] = Counter()
+        self.statuses: Counter[int] = Counter()
+        self._products: dict[StoreSpec, list[dict[str, Any]]] = {}
+
+    def spec(self, host: str) -> StoreSpec:
+        return self.stores.get(host, self.default)
+
+    def transport(self) -> httpx.ASGITransport:
+        return httpx.ASGITransport(app=self)
+
+    def catalog(self, spec: StoreSpec) -> list[dict[str, Any]]:
+        """The (mutable) product list every host using ``spec`` serves."""
+        products = self._products.get(spec)
+        if products is None:
+            products = self._products[spec] = [_product(i) for i in range(spec.products)]
+        return products
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            return
+        request = Request(scope, receive)
+        response = await self.handle(request)
+        self.statuses[response.status_code] += 1
+        await response(scope, receive, send)
+
+    async def handle(self, request: Request) -> Response:
+        host = (request.url.hostname or "localhost").lower()
+        spec = self.spec(host)
+        path = request.url.path
+        kind = path.split("/")[1] if path != "/" else "home"
+        self.requests[kind or "home"] += 1
+        rng = random.Random(f"{spec.seed}:{host}:{request.url}:{self.requests[kind]}")
+        if spec.latency or spec.jitter:
+            await asyncio.sleep(spec.latency + rng.random() * spec.jitter)
+        if spec.throttle_rate and rng.random() < spec.throttle_rate:
+            return Response("Too Many Requests", status_code=429, headers={"Retry-After": str(spec.retry_after)})
+        if spec.error_rate and rng.random() < spec.error_rate:
+            return Response("Internal Server Error", status_code=500)
+
+        if path == "/products.json":
+            return self._products_json(request, spec)
+        if path.startswith("/sitemap") and spec.sitemap:
+            return self._sitemap(request, spec)
+        if path == "/":
+            body = _home(spec, host)
+        elif path.startswith("/policies/") and path.split("/")[-1] in POLICIES:
+            body = _text_page(path.split("/")[-1].replace("-", " ").title(), spec.policy_paragraphs)
+        elif path == "/pages/faq":
+            body = _faq_page(spec.faq_items)
+        elif path in ("/pages/about-us", "/pages/contact") or path.startswith(("/collections/", "/products/")):
+            body = _text_page(path.split("/")[-1], 5)
+        else:
+            return HTMLResponse("Not Found", status_code=404)
+        return self._cacheable(request, body)
+
+    def _cacheable(self, request: Request, body: str) -> Response:
+        etag = '"' + hashlib.md5(body.encode()).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return HTMLResponse(body, headers={"ETag": etag})
+
+    def _sitemap(self, request: Request, spec: StoreSpec) -> Response:
+        base = f"{request.url.scheme}://{request.url.netloc}"
+        path = request.url.path
+        if path == "/sitemap.xml":
+            children = [f"{base}/sitemap_pages_1.xml"]
+            for n, start in enumerate(range(0, spec.products, SITEMAP_CHUNK), 1):
+                end = min(spec.products, start + SITEMAP_CHUNK)
+                children.append(f"{base}/sitemap_products_{n}.xml?from={1000 + start}&amp;to={999 + end}")
+            body = "".join(f"<sitemap><loc>{loc}</loc></sitemap>" for loc in children)
+            return Response(f'<?xml version="1.0"?><sitemapindex xmlns="{SITEMAP_NS}">{body}</sitemapindex>', media_type="application/xml")
+        if path == "/sitemap_pages_1.xml":
+            urls = [(f"{base}/pages/{page}", EPOCH.isoformat() + "Z") for page in PAGES]
+        elif path.startswith("/sitemap_products_"):
+            first = int(request.query_params.get("from", 1000)) - 1000
+            last = int(request.query_params.get("to", 999 + spec.products)) - 1000
+            products = self.catalog(spec)[max(0, first) : last + 1]
+            urls = [(f"{base}/products/{p['handle']}", p["updated_at"]) for p in products]
+        else:
+            return Response("Not Found", status_code=404)
+        body = "".join(f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in urls)
+        return Response(f'<?xml version="1.0"?><urlset xmlns="{SITEMAP_NS}">{body}</urlset>', media_type="application/xml")
+
+    def _products_json(self, request: Request, spec: StoreSpec) -> Response:
+        limit = max(1, min(250, int(request.query_params.get("limit", 30))))
+        products = self.catalog(spec)
+        if spec.updated_order and request.query_params.get("order", "").startswith("updated_at"):
+            products = sorted(products, key=lambda p: p["updated_at"], reverse=True)
+        since_id = request.query_params.get("since_id")
+        if since_id is not None and spec.since_id:
+            after = int(since_id)
+            start = next((i for i, p in enumerate(products) if p["id"] > after), len(products))
+        else:
+            start = (max(1, int(request.query_params.get("page", 1))) - 1) * limit
+        return JSONResponse({"products": products[start : start + limit]})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic Shopify stores")
+    parser.add_argument("--port", type=int, default=8081)
+    for field in ("products", "anchors", "faq_items"):
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(StoreSpec(), field))
+    for field in ("latency", "jitter", "error_rate", "throttle_rate"):
+        parser.add_argument(f"--{field.replace('_', '-')}", type=float, default=getattr(StoreSpec(), field))
+    args = parser.parse_args()
+    spec = replace(
+        StoreSpec(),
+        **{k: v for k, v in vars(args).items() if k != "port"},
+    )
+    import uvicorn
+
+    print(json.dumps(vars(args)))
+    uvicorn.run(FakeShopify(spec), port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Parse throughput of the HTML backends (HTML_PARSER=lxml vs bs4).
+
+Runs each extractor of ``app/parsing.py`` over the saved fixtures and over
+heavy synthetic pages (a home page with thousands of anchors, a long policy
+page) with each backend, and reports documents/s, MB/s and the speedup.
+
+    python -m bench.parse_backends --rounds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from app.config import settings
+from app.parsing import parse_excerpt, parse_faq_page, parse_home, parse_html_products
+
+from .parse_executor import _heavy_home, _text_page
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+URL = "https://shop.test/"
+
+
+def _cases() -> list[tuple[str, Callable[[str], object], str]]:
+    def fixture(name: str) -> str:
+        return (FIXTURES / name).read_text(encoding="utf-8")
+
+    heavy = _heavy_home(3000)
+    policy = _text_page(3000)
+    return [
+        ("home fixture", lambda html: parse_home(html, URL), fixture("home.html")),
+        ("faq fixture", lambda html: parse_faq_page(html, URL), fixture("faq.html")),
+        ("policy excerpt", lambda html: parse_excerpt(html, "main, .rte, .content, article", 400, True), fixture("policy.html")),
+        ("collection cards", lambda html: parse_html_products(html, URL), fixture("collection.html")),
+        ("home 3000 anchors", lambda html: parse_home(html, URL), heavy),
+        ("policy 3000 paragraphs", lambda html: parse_excerpt(html, "main, .rte, .content, article", 400, True), policy),
+    ]
+
+
+def _rate(fn: Callable[[str], object], html: str, rounds: int) -> float:
+    fn(html)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(html)
+    return rounds / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'case':<24} {'KiB':>7} {'bs4 docs/s':>11} {'lxml docs/s':>12} {'lxml MB/s':>10} {'speedup':>8}")
+    for label, fn, html in _cases():
+        rates = {}
+        for backend in ("bs4", "lxml"):
+            settings.html_parser = backend
+            rates[backend] = _rate(fn, html, args.rounds)
+        mb = len(html.encode()) / 1e6
+        print(
+            f"{label:<24} {len(html.encode()) / 1024:>7.1f} {rates['bs4']:>11.1f} {rates['lxml']:>12.1f}"
+            f" {rates['lxml'] * mb:>10.1f} {rates['lxml'] / rates['bs4']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Latency of concurrent scrapes with HTML parsing on vs off the event loop.
+
+Heavy storefronts (thousands of anchors, large policy pages) are scraped next to
+small ones; the small stores' latency shows how much the parse work blocks the loop.
+
+    python -m bench.parse_executor --heavy 4 --light 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from app.config import settings
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+from app.workers import shutdown_executor
+
+
+def _heavy_home(anchors: int) -> str:
+    links = "".join(f'<li><a href="/collections/c{i}">Collection number {i}</a></li>' for i in range(anchors))
+    footer = "".join(
+        f'<a href="/policies/{p}">{p.title()} policy</a>'
+        for p in ("privacy-policy", "refund-policy", "shipping-policy", "terms-of-service")
+    )
+    return f"<html><head><title>Heavy</title></head><body><ul>{links}</ul><footer>{footer}</footer></body></html>"
+
+
+def _text_page(paragraphs: int) -> str:
+    body = "".join(f"<p>Paragraph {i} with some policy wording to parse.</p>" for i in range(paragraphs))
+    return f"<html><body><main>{body}</main></body></html>"
+
+
+def make_transport(anchors: int, latency: float) -> httpx.AsyncBaseTransport:
+    heavy_home = _heavy_home(anchors)
+    heavy_page = _text_page(anchors)
+    light_home = "<html><head><title>Light</title></head><body><a href='/pages/contact'>Contact</a></body></html>"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        host = request.url.host
+        path = request.url.path
+        if path == "/products.json":
+            return httpx.Response(200, text=json.dumps({"products": []}))
+        if host.startswith("heavy"):
+            return httpx.Response(200, text=heavy_home if path == "/" else heavy_page)
+        return httpx.Response(200, text=light_home if path == "/" else "<html><body>ok</body></html>")
+
+    return httpx.MockTransport(handler)
+
+
+async def _timed_scrape(url: str, http: HttpPool) -> float:
+    started = time.perf_counter()
+    await ShopifyScraper(url, http=http).scrape()
+    return (time.perf_counter() - started) * 1000
+
+
+async def run(heavy: int, light: int, anchors: int, latency: float) -> dict[str, float]:
+    http = HttpPool(transport=make_transport(anchors, latency))
+    heavy_tasks = [asyncio.create_task(_timed_scrape(f"https://heavy{i}.example", http)) for i in range(heavy)]
+    light_tasks = []
+    for i in range(light):
+        light_tasks.append(asyncio.create_task(_timed_scrape(f"https://light{i}.example", http)))
+        await asyncio.sleep(0.002)
+    light_ms = sorted(await asyncio.gather(*light_tasks))
+    heavy_ms = await asyncio.gather(*heavy_tasks)
+    await http.aclose()
+    q = statistics.quantiles(light_ms, n=100)
+    return {"light_p50_ms": q[49], "light_p99_ms": q[98], "heavy_mean_ms": statistics.mean(heavy_ms)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heavy", type=int, default=4)
+    parser.add_argument("--light", type=int, default=40)
+    parser.add_argument("--anchors", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated network latency (s)")
+    parser.add_argument("--modes", default="none,thread,process")
+    args = parser.parse_args()
+    for mode in args.modes.split(","):
+        settings.parse_executor = mode
+        shutdown_executor()
+        result = asyncio.run(run(args.heavy, args.light, args.anchors, args.latency))
+        print(f"{mode:>8}: " + "  ".join(f"{k}={v:.1f}" for k, v in result.items()))
+    shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Persistence throughput against SQLite: rows/sec for the batched upsert writer.
+
+Compares ``save_brand_context_sync`` with the previous strategy (delete every
+product row of the store, then one ORM ``add`` per product) on a first write,
+an unchanged rewrite and a rewrite with a fraction of the products changed.
+
+    python -m bench.persist --products 10000 --changed 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.catalog import product_from_json
+from app.persistence.db import Base
+from app.persistence.models import ProductORM, Store
+from app.persistence.save import save_brand_context_sync
+from app.schemas import BrandContext, CatalogFetchStats
+
+from .fakeshop import _product
+
+
+def _context(products: int, changed: float = 0.0) -> BrandContext:
+    every = int(1 / changed) if changed else 0
+    items = []
+    for i in range(products):
+        raw = _product(i)
+        if every and i % every == 0:
+            raw = {**raw, "title": raw["title"] + " (new)"}
+        items.append(product_from_json(raw, "https://shop.test"))
+    fetch = CatalogFetchStats(mode="page", products=products, complete=True)
+    return BrandContext(site_url="https://shop.test", site_name="Shop", products=items, catalog_fetch=fetch)
+
+
+def _naive_save(ctx: BrandContext, engine: Engine) -> None:
+    with Session(engine) as session:
+        store = session.execute(select(Store).where(Store.site_url == str(ctx.site_url))).scalar_one_or_none()
+        if not store:
+            store = Store(site_url=str(ctx.site_url), site_name=ctx.site_name)
+            session.add(store)
+            session.flush()
+        session.query(ProductORM).filter(ProductORM.store_id == store.id).delete()
+        for p in ctx.products:
+            session.add(
+                ProductORM(
+                    store_id=store.id,
+                    external_id=str(p.id),
+                    handle=p.handle,
+                    title=p.title,
+                    url=str(p.url) if p.url else None,
+                    price=p.price,
+                    vendor=p.vendor,
+                    product_type=p.product_type,
+                )
+            )
+        session.commit()
+
+
+def _timed(label: str, rows: int, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+    print(f"{label:<28} {rows:>7} rows  {seconds * 1000:9.1f}ms  {rows / seconds:12,.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--changed", type=float, default=0.05, help="fraction of products changed on the rewrite")
+    args = parser.parse_args()
+
+    first = _context(args.products)
+    changed = _context(args.products, args.changed)
+    n = args.products
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (("naive", _naive_save), ("upsert", save_brand_context_sync)):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name + '.sqlite3')}")
+            Base.metadata.create_all(engine)
+            _timed(f"{name} first write", n, lambda s=save, e=engine: s(first, e))
+            _timed(f"{name} unchanged rewrite", n, lambda s=save, e=engine: s(first, e))
+            _timed(f"{name} {args.changed:.0%} changed", n, lambda s=save, e=engine: s(changed, e))
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
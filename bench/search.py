@@ -0,0 +1,70 @@
+"""Query latency of the cross-store search index.
+
+Indexes synthetic stores (products with titles drawn from a small vocabulary,
+so common words have long postings, plus FAQs and policies) and reports
+build time, index size and query latency: the first query (which builds
+the terms' impact columns) and p50/p99 after it.
+
+    python -m bench.search --stores 300 --products 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from app.schemas import BrandContext, FAQItem, Policy, Product
+from app.search import SearchIndex
+
+ADJECTIVES = ["linen", "organic", "vintage", "waterproof", "merino", "leather", "recycled", "classic", "slim", "oversized"]
+NOUNS = ["shirt", "jacket", "sneaker", "hat", "bag", "sock", "dress", "scarf", "belt", "hoodie"]
+QUERIES = ["linen shirt", "waterproof jacket", "free returns", "merino", "leather bag belt", "shipping international"]
+
+
+def _store(i: int, products: int, rng: random.Random) -> BrandContext:
+    items = [
+        Product(
+            id=n,
+            title=f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}",
+            tags=[rng.choice(ADJECTIVES), f"tag{n % 50}"],
+            vendor=f"vendor{i % 40}",
+            product_type=rng.choice(NOUNS),
+        )
+        for n in range(products)
+    ]
+    faqs = [FAQItem(question="Do you offer free returns?", answer=f"Returns are free within {rng.randint(14, 60)} days.")]
+    policies = [Policy(name="Shipping Policy", content_excerpt="We ship international orders in 5 business days.")]
+    return BrandContext(site_url=f"https://store{i}.test", domain=f"store{i}.test", products=items, faqs=faqs, policies=policies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stores", type=int, default=300)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    contexts = [_store(i, args.products, rng) for i in range(args.stores)]
+    index = SearchIndex()
+    started = time.perf_counter()
+    for ctx in contexts:
+        index.add_context(ctx)
+    build = time.perf_counter() - started
+    print(f"indexed {len(index)} documents from {index.stores} stores in {build:.2f}s ({index.stats()['terms']} terms)")
+    print(f"{'query':<26} {'matches':>8} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.rounds):
+            t = time.perf_counter()
+            total, _ = index.search(query, limit=20)
+            samples.append((time.perf_counter() - t) * 1000)
+        # the first run builds the terms' impact columns
+        first, samples = samples[0], sorted(samples[1:])
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{query:<26} {total:>8} {first:>9.2f} {statistics.median(samples):>8.2f} {p99:>8.2f}")
+
+if __name__ == "__main__":
+    main()
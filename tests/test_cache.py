@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from app.cache import CacheEntry, MemoryBackend, ResultCache, SQLiteBackend, cache_key
+from app.schemas import BrandContext
+
+
+def _ctx(name: str) -> BrandContext:
+    return BrandContext(site_url="https://shop.example", site_name=name)
+
+
+def test_concurrent_misses_share_one_load():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return _ctx("fresh")
+
+    async def go():
+        cache = ResultCache(MemoryBackend(8, 60), ttl=30, stale=30)
+        results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+        again = await cache.get_or_load("k", loader)
+        return cache, results, again
+
+    cache, results, again = asyncio.run(go())
+    assert calls == 1
+    assert {r.site_name for r in results} == {"fresh"} and again.site_name == "fresh"
+    assert cache.stats()["coalesced"] == 4 and cache.stats()["hits"] == 1
+
+
+def test_stale_entry_served_while_refreshing():
+    async def loader():
+        return _ctx("new")
+
+    async def go():
+        backend = MemoryBackend(8, 60)
+        await backend.set("k", CacheEntry(_ctx("old"), stored_at=time.time() - 20))
+        cache = ResultCache(backend, ttl=10, stale=30)
+        served = await cache.get_or_load("k", loader)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return served, (await backend.get("k")).value
+
+    served, refreshed = asyncio.run(go())
+    assert served.site_name == "old"
+    assert refreshed.site_name == "new"
+
+
+def test_partial_results_are_not_cached():
+    async def go():
+        cache = ResultCache(MemoryBackend(8, 60), ttl=30, stale=30)
+        for i, error in enumerate(["deadline_exceeded: products", "policies_error: boom", "catalog_incomplete: HTTP 503 for page=3"]):
+            await cache.put(f"partial-{i}", BrandContext(site_url="https://shop.example", errors=[error]))
+        await cache.put("whole", BrandContext(site_url="https://shop.example", errors=["sitemap_error: not read within 1s"]))
+        return [await cache.backend.get(k) for k in ("partial-0", "partial-1", "partial-2", "whole")]
+
+    *partial, whole = asyncio.run(go())
+    assert partial == [None, None, None] and whole is not None
+
+
+def test_memory_backend_lru_eviction():
+    async def go():
+        backend = MemoryBackend(2, 60)
+        for key in "abc":
+            await backend.set(key, CacheEntry(_ctx(key), time.time()))
+        return await backend.get("a"), await backend.get("c")
+
+    evicted, kept = asyncio.run(go())
+    assert evicted is None and kept.value.site_name == "c"
+
+
+def test_sqlite_backend_roundtrip(tmp_path):
+    async def go():
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), 1, 60)
+        await backend.set("a", CacheEntry(_ctx("a"), time.time()))
+        await backend.set("b", CacheEntry(_ctx("b"), time.time()))
+        return await backend.get("a"), await backend.get("b"), len(backend)
+
+    a, b, size = asyncio.run(go())
+    assert a is None and b.value.site_name == "b" and size == 1
+
+
+def test_cache_key_normalizes_url():
+    assert cache_key("shop.example/") == cache_key("https://shop.example#top") == "https://shop.example"
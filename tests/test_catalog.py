@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+
+from app.catalog import CatalogFetcher, ProductRecord
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+
+
+def _store(total: int, honour_since_id: bool = True):
+    products = [{"id": i + 1, "handle": f"p{i + 1}", "title": f"P{i + 1}", "variants": [{"price": "9.50"}]} for i in range(total)]
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        q = request.url.params
+        limit = int(q.get("limit", 250))
+        if honour_since_id and "since_id" in q:
+            after = int(q["since_id"])
+            page = [p for p in products if p["id"] > after][:limit]
+        else:
+            n = int(q.get("page", 1))
+            page = products[(n - 1) * limit : n * limit]
+        return httpx.Response(200, text=json.dumps({"products": page}))
+
+    return handler, seen
+
+
+def _run(handler, **kwargs):
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        scraper = ShopifyScraper("shop.example", http=http)
+        try:
+            fetcher = CatalogFetcher(scraper, **kwargs)
+            return await fetcher.fetch_all(), fetcher.stats
+        finally:
+            await http.aclose()
+
+    return asyncio.run(go())
+
+
+def test_page_mode_stops_on_short_page():
+    handler, seen = _store(23)
+    products, stats = _run(handler, page_size=5, concurrency=3)
+    assert [p.id for p in products] == list(range(1, 24))
+    assert products[0].price == 9.5
+    assert stats.mode == "page"
+    # page 1 alone, then a window of pages 2-4, then 5-7 where page 5 is short
+    assert stats.pages_fetched == len(seen) == 7
+
+
+def test_since_id_mode_walks_cursor():
+    handler, seen = _store(12)
+    products, stats = _run(handler, page_size=5, mode="since_id")
+    assert [p.id for p in products] == list(range(1, 13))
+    assert stats.mode == "since_id"
+    assert stats.pages_fetched == 3
+
+
+def test_since_id_falls_back_to_pages_when_ignored():
+    handler, _ = _store(12, honour_since_id=False)
+    products, stats = _run(handler, page_size=5, concurrency=2, mode="since_id")
+    assert [p.id for p in products] == list(range(1, 13))
+    assert stats.mode == "page"
+
+
+def test_max_products_caps_requests():
+    handler, seen = _store(100)
+    products, stats = _run(handler, page_size=10, concurrency=8, max_products=25)
+    assert [p.id for p in products] == list(range(1, 26))
+    # page 1, then a window of just the two pages still needed
+    assert stats.pages_fetched == len(seen) == 3
+
+
+def test_records_keep_only_product_fields():
+    raw = {
+        "id": 7,
+        "handle": "tee",
+        "title": "Tee",
+        "body_html": "<p>long</p>" * 100,
+        "vendor": "Acme",
+        "tags": "a, b, a",
+        "images": [{"src": "https://cdn.test/1.jpg"}, {}],
+        "variants": [{"price": "12.50", "sku": "T-1"}],
+        "options": [{"name": "Size"}],
+    }
+    record = ProductRecord.from_json(raw)
+    assert not hasattr(record, "__dict__")
+    product = record.to_product("https://shop.example")
+    assert (product.price, product.tags, product.images) == (12.5, ["a", "b"], ["https://cdn.test/1.jpg"])
+    assert product.url == "https://shop.example/products/tee" and product.vendor == "Acme"
+
+
+def test_failed_later_page_is_reported():
+    handler, _ = _store(30)
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("page") == "3":
+            raise httpx.ReadTimeout("timed out", request=request)
+        if request.url.params.get("page") == "4":
+            return httpx.Response(200, text='{"products": [')
+        return handler(request)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(flaky))
+        scraper = ShopifyScraper("shop.example", http=http, response_cache=None)
+        try:
+            fetcher = CatalogFetcher(scraper, page_size=5, concurrency=3)
+            return await fetcher.fetch_all(), fetcher, scraper.errors
+        finally:
+            await http.aclose()
+
+    products, fetcher, errors = asyncio.run(go())
+    assert [p.id for p in products] == list(range(1, 11))
+    assert fetcher.incomplete
+    assert errors == ["catalog_incomplete: request failed for page=3", "catalog_incomplete: invalid JSON for page=4"]
+
+
+def test_missing_catalog_is_not_incomplete():
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(lambda _: httpx.Response(404)))
+        scraper = ShopifyScraper("shop.example", http=http, response_cache=None)
+        try:
+            fetcher = CatalogFetcher(scraper)
+            return await fetcher.fetch_all(), fetcher, scraper.errors
+        finally:
+            await http.aclose()
+
+    products, fetcher, errors = asyncio.run(go())
+    assert products == [] and fetcher.failed and not fetcher.incomplete and errors == []
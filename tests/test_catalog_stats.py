@@ -0,0 +1,77 @@
+import asyncio
+
+from app.catalog_stats import VariantColumns, catalog_stats, price_stats
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+from bench.fakeshop import FakeShopify, StoreSpec, _product
+
+CATALOG = [
+    {
+        "vendor": "Acme",
+        "product_type": "Shirts",
+        "variants": [
+            {"price": "10.00", "compare_at_price": "20.00", "available": True, "sku": "A1"},
+            {"price": "20.00", "compare_at_price": None, "available": False, "sku": "A2"},
+        ],
+    },
+    {"vendor": "Acme", "product_type": "Hats", "variants": [{"price": "30.00", "compare_at_price": "40.00"}]},
+    {"vendor": "Globex", "product_type": "", "variants": [{"price": "oops", "available": True}]},
+    {"vendor": None, "variants": [{"price": "40.00", "available": True}]},
+]
+
+
+def _columns(products):
+    cols = VariantColumns()
+    for p in products:
+        cols.add(p)
+    return cols
+
+
+def test_stats_over_variant_columns():
+    cols = _columns(CATALOG)
+    assert (cols.products, len(cols), cols.sku[:2]) == (4, 5, ["A1", "A2"])
+    stats = catalog_stats(cols, "USD")
+    assert stats.currency == "USD"
+    assert stats.price.model_dump() == {
+        "min": 10.0, "p25": 17.5, "median": 25.0, "p75": 32.5, "p90": 37.0, "max": 40.0, "mean": 25.0
+    }
+    # availability is known for 4 of 5 variants; 2 of the 4 priced variants are discounted
+    assert stats.in_stock_ratio == 0.75
+    assert stats.discounted_ratio == 0.5
+    assert stats.discount_depth.model_dump() == {"mean": 0.375, "median": 0.375, "max": 0.5}
+    acme = stats.by_vendor["Acme"]
+    assert (acme.products, acme.variants, acme.median_price) == (2, 3, 20.0)
+    assert (acme.in_stock_ratio, acme.discounted_ratio) == (0.5, 0.6667)
+    assert stats.by_vendor["Globex"].median_price is None
+    assert set(stats.by_product_type) == {"Shirts", "Hats"}
+
+
+def test_large_catalog_and_empty_columns():
+    cols = _columns(_product(i) for i in range(60_000))
+    assert len(cols) > 100_000
+    stats = catalog_stats(cols)
+    assert stats.variants == len(cols) and sum(g.variants for g in stats.by_vendor.values()) <= len(cols)
+    assert stats.price.min <= stats.price.median <= stats.price.max
+    empty = catalog_stats(VariantColumns())
+    assert (empty.variants, empty.price, empty.by_vendor) == (0, price_stats([]), {})
+
+
+def test_scrape_can_return_stats_without_the_product_list():
+    fake = FakeShopify(StoreSpec(products=60, anchors=5))
+
+    async def go(sections):
+        http = HttpPool(transport=fake.transport())
+        try:
+            return await ShopifyScraper("shop.test", http=http, sections=sections).scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go({"catalog_stats"}))
+    assert ctx.products == [] and ctx.catalog_count == 60
+    assert ctx.catalog_stats.products == 60 and ctx.catalog_stats.currency == "USD"
+    assert sum(g.products for g in ctx.catalog_stats.by_vendor.values()) == 60
+
+    ctx = asyncio.run(go({"products"}))
+    assert ctx.catalog_stats is None
+    assert {p.currency for p in ctx.products} == {"USD"}
+    assert {p.available for p in ctx.products} == {True, False}
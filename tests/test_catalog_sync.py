@@ -0,0 +1,111 @@
+import asyncio
+from dataclasses import replace
+
+from app.catalog_sync import (
+    CatalogSnapshot,
+    CatalogSync,
+    MemorySnapshotStore,
+    SQLiteSnapshotStore,
+    content_hash,
+)
+from app.http_pool import HttpPool
+from app.ratelimit import HostRateLimiter
+from app.scraper import ShopifyScraper
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def _sync(fake, store, full=False):
+    async def go():
+        http = HttpPool(transport=fake.transport())
+        try:
+            scraper = ShopifyScraper("shop.test", http=http, rate_limiter=HostRateLimiter(rate=1000, burst=100))
+            return await CatalogSync(scraper, store, full=full).run()
+        finally:
+            await http.aclose()
+
+    fake.requests.clear()
+    return asyncio.run(go())
+
+
+def test_incremental_sync_reads_only_recent_pages():
+    spec = StoreSpec(products=2100)
+    fake = FakeShopify(spec)
+    store = MemorySnapshotStore()
+
+    first = _sync(fake, store)
+    assert first.mode == "full" and first.complete and len(first.added) == 2100
+    assert fake.requests["products.json"] == first.pages_fetched >= 9
+
+    # unchanged store: one newest-first page
+    again = _sync(fake, store)
+    assert again.mode == "updated_at" and not again.complete
+    assert (again.added, again.changed, again.removed) == ([], [], [])
+    assert again.unchanged == 2100 and fake.requests["products.json"] == 1
+
+    products = fake.catalog(spec)
+    products[10] = {**products[10], "title": "Renamed", "updated_at": "2030-01-01T00:00:00Z"}
+    products.append({**products[0], "id": 99999, "handle": "new", "updated_at": "2030-01-02T00:00:00Z"})
+    # touched without a content change: not reported as changed
+    products[20] = {**products[20], "updated_at": "2030-01-01T00:00:00Z"}
+    removed = products.pop(5)
+
+    delta = _sync(fake, store)
+    assert [p.title for p in delta.changed] == ["Renamed"]
+    assert [p.id for p in delta.added] == [99999]
+    assert delta.removed == [] and fake.requests["products.json"] == 1
+
+    full = _sync(fake, store, full=True)
+    assert full.removed == [str(removed["id"])] and full.added == [] and full.changed == []
+
+
+def test_store_ignoring_order_falls_back_to_full_reads():
+    fake = FakeShopify(StoreSpec(products=300, updated_order=False))
+    store = MemorySnapshotStore()
+    first = _sync(fake, store)
+    probe = _sync(fake, store)
+    assert probe.mode == "full" and probe.complete and probe.unchanged == 300
+    assert probe.pages_fetched == first.pages_fetched + 1
+    # the probe result is remembered; no wasted ordered request next time
+    assert _sync(fake, store).pages_fetched == first.pages_fetched
+
+
+def test_failed_sync_keeps_previous_snapshot():
+    spec = StoreSpec(products=600)
+    fake = FakeShopify(spec)
+    store = MemorySnapshotStore()
+    _sync(fake, store)
+    fake.default = replace(spec, error_rate=1.0)
+    failed = _sync(fake, store)
+    assert failed.removed == [] and "catalog_sync_failed: snapshot not updated" in failed.errors
+    fake.default = spec
+    assert _sync(fake, store).unchanged == 600
+
+
+def test_sqlite_snapshot_roundtrip(tmp_path):
+    snapshot = CatalogSnapshot(items={"1": ("2024-01-01T00:00:00Z", "abc")}, high_water="2024-01-01T00:00:00Z")
+
+    async def go():
+        store = SQLiteSnapshotStore(str(tmp_path / "snap.sqlite3"))
+        await store.set("https://shop.test", snapshot)
+        return await store.get("https://shop.test")
+
+    assert asyncio.run(go()) == snapshot
+
+
+def test_content_hash_ignores_nested_updated_at():
+    product = {
+        "id": 1,
+        "title": "Tee",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "variants": [{"id": 2, "price": "10.00", "updated_at": "2024-01-01T00:00:00Z"}],
+        "images": [{"src": "a.jpg", "updated_at": "2024-01-01T00:00:00Z"}],
+    }
+    touched = {
+        **product,
+        "updated_at": "2024-02-01T00:00:00Z",
+        "variants": [{**product["variants"][0], "updated_at": "2024-02-01T00:00:00Z"}],
+        "images": [{**product["images"][0], "updated_at": "2024-02-01T00:00:00Z"}],
+    }
+    repriced = {**product, "variants": [{**product["variants"][0], "price": "12.00"}]}
+    assert content_hash(touched) == content_hash(product)
+    assert content_hash(repriced) != content_hash(product)
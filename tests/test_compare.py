@@ -0,0 +1,147 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app import compare as compare_module
+from app.compare import SKETCH_BINS, compare_stores, minhash, normalize_title
+from app.http_pool import HttpPool, use_http_pool
+from app.schemas import BrandContext, Policy, Product
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def _store(domain, products, policies=()):
+    return BrandContext(
+        site_url=f"https://{domain}",
+        domain=domain,
+        products=[Product(title=t, price=price, product_type=kind, tags=tags) for t, price, kind, tags in products],
+        policies=[Policy(name=name) for name in policies],
+    )
+
+
+def test_normalize_title_ignores_order_sizes_and_numbers():
+    assert normalize_title("Shirt - Linen (M) 2024") == normalize_title("linen shirt") == "linen shirt"
+
+
+def test_matrix():
+    brand = _store(
+        "brand.test",
+        [("Linen Shirt", 40.0, "Shirts", ["summer"]), ("Wool Hat", 20.0, "Hats", []), ("Silk Scarf", 60.0, "Scarves", [])],
+        policies=["Refund policy", "Shipping Policy"],
+    )
+    twin = _store("twin.test", [("Shirt, Linen (L)", 80.0, "shirts", ["Summer"]), ("Wool hat", 80.0, "Hats", []), ("Scarf silk", 80.0, "Scarves", [])])
+    other = _store("other.test", [("Steel Kettle", 10.0, "Kitchen", []), ("Wool Hat", 10.0, "Hats", [])], policies=["Privacy Policy"])
+    empty = _store("empty.test", [])
+    m = compare_stores([brand, twin, other, empty])
+    assert m.baseline == "brand.test"
+    assert [s.store for s in m.stores] == ["brand.test", "twin.test", "other.test", "empty.test"]
+    assert [s.relative_median_price for s in m.stores] == [1.0, 2.0, 0.25, None]
+    assert m.stores[0].price.median == 40.0 and m.stores[0].catalog_features == 4
+
+    # the same catalog under other spellings, half of it, nothing in common, nothing at all
+    overlap = m.catalog_overlap
+    assert overlap[0][1] == overlap[1][0] == 1.0
+    assert overlap[0][2] == pytest.approx(1 / 5)
+    assert overlap[0][3] == 0.0 and overlap[3][3] == 0.0 and overlap[2][2] == 1.0
+    assert m.product_type_overlap[0][1] == 1.0 and m.product_type_overlap[0][2] == 0.25
+    assert m.shared_product_types == {"hats": 3, "scarves": 2, "shirts": 2}
+    assert m.stores[0].policies == ["Refund Policy", "Shipping Policy"]
+    assert m.policy_coverage["Refund Policy"] == 0.25 and m.policy_coverage["Terms of Service"] == 0.0
+
+
+def test_minhash_estimates_jaccard():
+    shared = {f"t:item {i}" for i in range(4000)}
+    a = shared | {f"t:a {i}" for i in range(4000)}
+    b = shared | {f"t:b {i}" for i in range(4000)}
+    sa, sb = minhash(a), minhash(b)
+    either = sum(1 for x, y in zip(sa, sb, strict=True) if x != compare_module.EMPTY or y != compare_module.EMPTY)
+    same = sum(1 for x, y in zip(sa, sb, strict=True) if x == y)
+    assert either == SKETCH_BINS
+    assert same / either == pytest.approx(1 / 3, abs=0.08)
+
+
+def test_fifty_stores():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(60)]
+    kinds = ["Shirts", "Hats", "Bags", "Shoes", "Socks"]
+    contexts = [
+        _store(
+            f"s{s}.test",
+            [(f"{rng.choice(words)} {rng.choice(words)}", rng.uniform(5, 200), rng.choice(kinds), [rng.choice(words)]) for _ in range(rng.randint(0, 300))],
+            policies=rng.sample(["Privacy Policy", "Refund Policy", "Terms of Service"], rng.randint(0, 3)),
+        )
+        for s in range(50)
+    ]
+    m = compare_stores(contexts)
+    overlap = m.catalog_overlap
+    assert all(overlap[i][j] == overlap[j][i] for i in range(50) for j in range(50))
+    assert all(overlap[i][i] == (1.0 if contexts[i].products else 0.0) for i in range(50))
+    assert m.product_type_overlap[1][1] in (0.0, 1.0) and max(map(max, m.product_type_overlap)) <= 1.0
+
+
+def test_no_baseline_gives_no_relative_prices():
+    a = _store("a.test", [("Linen Shirt", 40.0, "Shirts", [])])
+    b = _store("b.test", [("Wool Hat", 20.0, "Hats", [])])
+    m = compare_stores([a, b], baseline=None)
+    assert m.baseline is None
+    assert [s.relative_median_price for s in m.stores] == [None, None]
+    assert [s.price.median for s in m.stores] == [40.0, 20.0]
+
+
+class _Unreachable(httpx.AsyncBaseTransport):
+    def __init__(self, inner, host):
+        self.inner, self.host = inner, host
+
+    async def handle_async_request(self, request):
+        if request.url.host == self.host:
+            raise httpx.ConnectError("unreachable", request=request)
+        return await self.inner.handle_async_request(request)
+
+
+def test_failed_brand_is_not_replaced_as_baseline():
+    fake = FakeShopify(StoreSpec(products=20, anchors=5))
+
+    async def go():
+        from app.main import app
+
+        http = HttpPool(transport=_Unreachable(fake.transport(), "brand.test"))
+        use_http_pool(http)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                body = {"website_url": "https://brand.test", "competitor_urls": ["https://rival.test", "https://other.test"], "compare": True}
+                return (await client.post("/api/insights/competitors", json=body)).json()
+        finally:
+            await http.aclose()
+
+    m = asyncio.run(go())["comparison"]
+    assert [s["store"] for s in m["stores"]] == ["rival.test", "other.test"]
+    assert m["baseline"] is None and m["baseline_error"]
+    assert [s["relative_median_price"] for s in m["stores"]] == [None, None]
+
+
+def test_competitors_api_adds_the_comparison():
+    fake = FakeShopify(StoreSpec(products=20, anchors=5), stores={"small.test": StoreSpec(products=4, anchors=5)})
+
+    async def go():
+        from app.main import app
+
+        http = HttpPool(transport=fake.transport())
+        use_http_pool(http)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                body = {"website_url": "https://brand.test", "competitor_urls": ["https://rival.test", "https://small.test"]}
+                plain = (await client.post("/api/insights/competitors", json=body)).json()
+                compared = (await client.post("/api/insights/competitors", json={**body, "compare": True})).json()
+        finally:
+            await http.aclose()
+        return plain, compared
+
+    plain, compared = asyncio.run(go())
+    assert "comparison" not in plain and len(plain["competitors"]) == 2
+    assert [c["url"] for c in compared["competitors"]] == ["https://rival.test", "https://small.test"]
+    m = compared["comparison"]
+    assert m["baseline"] == "brand.test" and m["baseline_error"] is None
+    assert [s["store"] for s in m["stores"]] == ["brand.test", "rival.test", "small.test"]
+    assert m["catalog_overlap"][0][1] == 1.0 and 0 < m["catalog_overlap"][0][2] < 1
+    assert m["stores"][2]["products"] == 4
@@ -0,0 +1,74 @@
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.dom import XPATH, Bs4Document, LxmlDocument, parse_document
+from app.parsing import parse_excerpt, parse_faq_page, parse_home, parse_html_products
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGES = sorted(p.name for p in FIXTURES.glob("*.html"))
+URL = "https://northwind.example/pages/x"
+
+
+def _html(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _page(page):
+    return {**{k: v for k, v in asdict(page).items() if k != "links"}, "anchors": page.links.anchors, "socials": page.links.socials()}
+
+
+def _extract(html):
+    return {
+        "home": _page(parse_home(html, URL)),
+        "faq": _page(parse_faq_page(html, URL)),
+        "policy": parse_excerpt(html, "main, .rte, .content, article", 400, True),
+        "about": parse_excerpt(html, "main, article, .rte, .content", 800),
+        "products": [p.model_dump() for p in parse_html_products(html, URL)],
+    }
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_backends_agree_on_fixtures(name, monkeypatch):
+    html = _html(name)
+    monkeypatch.setattr(settings, "html_parser", "bs4")
+    expected = _extract(html)
+    monkeypatch.setattr(settings, "html_parser", "lxml")
+    assert isinstance(parse_document(html), LxmlDocument)
+    assert _extract(html) == expected
+
+
+@pytest.mark.parametrize("css", sorted(XPATH))
+def test_selectors_match_the_same_elements(css):
+    html = "".join(_html(name) for name in PAGES)
+    lx, bs = LxmlDocument(html), Bs4Document(html)
+    assert [lx.text(n) for n in lx.select(css)] == [bs.text(n) for n in bs.select(css)]
+
+
+def test_fixture_extraction():
+    page = parse_home(_html("home.html"), "https://northwind.example")
+    assert page.title == "Northwind Goods – Everyday essentials" and page.currency == "GBP"
+    assert page.hero_products == [
+        "https://northwind.example/products/linen-shirt?variant=1",
+        "https://northwind.example/products/wool-hat",
+        "https://northwind.example/products/silk-scarf",
+    ]
+    # script, comment and template text stays out
+    assert page.emails == ["care@northwind.example"]
+    assert ("Can I return a sale item?", "Can I return a sale item? Sale items can be returned within 14 days for store credit.") in page.faqs
+    assert page.links.socials()["instagram"] == "https://www.instagram.com/northwind"
+    assert parse_excerpt(_html("about.html"), "main, article, .rte, .content", 800).startswith("Our story Northwind started")
+    policy = parse_excerpt(_html("policy.html"), "main, .rte, .content, article", 400, True)
+    assert len(policy) == 400 and policy.startswith("We have a 30-day return policy")
+
+
+def test_fallbacks_to_beautifulsoup():
+    assert isinstance(parse_document(""), Bs4Document)
+    assert isinstance(parse_document('<?xml version="1.0" encoding="utf-8"?><p>x</p>'), Bs4Document)
+    assert isinstance(parse_document("<p>x</p>", ["p > span"]), Bs4Document)
+    assert parse_excerpt("<div><p>Only <b>this</b></p></div>", "div > p", 100) == "Only this"
+    assert parse_excerpt("", "main", 100, True) == ""
+    with pytest.raises(ValueError):
+        parse_document("<p>x</p>", backend="html5lib")
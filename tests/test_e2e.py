@@ -0,0 +1,31 @@
+import asyncio
+
+from app.http_cache import ResponseCache
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def test_scrape_synthetic_store_end_to_end():
+    fake = FakeShopify(StoreSpec(products=620, anchors=50, faq_items=4))
+    cache = ResponseCache(max_bytes=1 << 20)
+
+    async def go():
+        http = HttpPool(transport=fake.transport())
+        try:
+            first = await ShopifyScraper("shop.test", http=http, response_cache=cache).scrape()
+            second = await ShopifyScraper("shop.test", http=http, response_cache=cache).scrape()
+        finally:
+            await http.aclose()
+        return first, second
+
+    first, second = asyncio.run(go())
+    assert first.catalog_count == 620 and first.errors == []
+    assert first.full_catalog() and first.catalog_fetch.complete
+    assert len({p.id for p in first.products}) == 620
+    assert {p.name for p in first.policies} >= {"Privacy Policy", "Refund Policy", "Terms of Service"}
+    assert len(first.faqs) == 4
+    assert first.contact.emails == ["hello@shop.test"]
+    # the recrawl revalidates every HTML page instead of downloading it again
+    assert second.fetch_cache.hits > 0 and second.fetch_cache.bytes_saved > 0
+    assert fake.statuses[304] == second.fetch_cache.hits
@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import httpx
+
+from app.config import settings
+from app.http_cache import ResponseCache
+from app.http_pool import HttpPool
+from app.parsing import parse_excerpt
+from app.scraper import ShopifyScraper
+
+POLICY = (
+    "<html><head><title>Refund policy</title>" + "<link rel='preload' href='/x.css'>" * 200 + "</head><body>"
+    "<nav>" + "<a href='/collections/all'>Shop</a>" * 200 + "</nav>"
+    "<div class='shopify-policy__body'><div class=\"rte\"><p>We have a 30-day return policy.</p>"
+    + "<p>Items must be unused and in their original packaging.</p>" * 4000
+    + "</div></div></body></html>"
+)
+
+
+def _streamed(body: bytes, sent: list[int], content_type: str, chunk: int = 4096) -> httpx.Response:
+    async def chunks():
+        for i in range(0, len(body), chunk):
+            sent.append(min(chunk, len(body) - i))
+            yield body[i : i + chunk]
+
+    return httpx.Response(200, content=chunks(), headers={"Content-Type": content_type, "ETag": '"v1"'})
+
+
+def _fetch(routes, path, excerpt=False, cache=None):
+    sent: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body, content_type = routes[request.url.path]
+        return _streamed(body, sent, content_type)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        scraper = ShopifyScraper("shop.example", http=http, response_cache=cache)
+        try:
+            return await scraper.fetch(path, excerpt=excerpt), scraper.trace.fetches[-1]
+        finally:
+            await http.aclose()
+
+    res, timing = asyncio.run(go())
+    return res, timing, sum(sent)
+
+
+def test_unreadable_content_type_is_not_downloaded():
+    pdf = b"%PDF-1.7" + b"\0" * 1_000_000
+    res, timing, sent = _fetch({"/pages/lookbook": (pdf, "application/pdf")}, "/pages/lookbook")
+    assert (res.status, res.text, res.cut) == (0, "", "content_type")
+    assert (timing.bytes, timing.cut) == (0, "content_type")
+    assert sent < len(pdf)
+
+
+def test_html_is_cut_at_the_cap_and_json_dropped(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_max_html_bytes", 10_000)
+    monkeypatch.setattr(settings, "fetch_max_json_bytes", 10_000)
+    html = b"<p>" + b"x" * 50_000 + b"</p>"
+    res, timing, sent = _fetch({"/pages/about": (html, "text/html; charset=utf-8")}, "/pages/about")
+    assert (res.status, res.cut, timing.bytes) == (200, "max_bytes", 10_000)
+    assert res.text == html[:10_000].decode()
+    assert sent < len(html)
+
+    catalog = json.dumps({"products": [{"id": i, "title": "x" * 100} for i in range(500)]}).encode()
+    res, timing, _ = _fetch({"/products.json": (catalog, "application/json")}, "/products.json?limit=250")
+    assert (res.status, res.text, res.cut, timing.kind) == (0, "", "max_bytes", "catalog")
+
+
+def test_excerpt_stops_after_the_main_content_starts(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_excerpt_bytes", 8192)
+    body = POLICY.encode()
+    routes = {"/policies/refund-policy": (body, "text/html; charset=utf-8")}
+    full, _, _ = _fetch(routes, "/policies/refund-policy")
+    res, timing, sent = _fetch(routes, "/policies/refund-policy", excerpt=True)
+    assert (res.status, res.cut, timing.cut) == (200, "excerpt", "excerpt")
+    assert sent < len(body) // 4
+    selector = "main, .rte, .content, article"
+    assert parse_excerpt(res.text, selector, 400, True) == parse_excerpt(full.text, selector, 400, True)
+
+
+def test_cut_bodies_are_not_cached(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_max_html_bytes", 1000)
+    cache = ResponseCache(max_bytes=1 << 20)
+    routes = {"/pages/big": (b"y" * 5000, "text/html"), "/pages/small": (b"<p>ok</p>", "text/html")}
+    _fetch(routes, "/pages/big", cache=cache)
+    _fetch(routes, "/pages/small", cache=cache)
+    assert cache.get("https://shop.example/pages/big") is None
+    assert cache.get("https://shop.example/pages/small").text == "<p>ok</p>"
+
+
+def test_excerpts_are_cached_as_partial_and_revalidated(monkeypatch):
+    monkeypatch.setattr(settings, "fetch_excerpt_bytes", 8192)
+    cache = ResponseCache(max_bytes=1 << 20)
+    body = POLICY.encode()
+    seen: list[str | None] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return _streamed(body, [], "text/html")
+
+    async def go(excerpt):
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        scraper = ShopifyScraper("shop.example", http=http, response_cache=cache)
+        try:
+            return await scraper.fetch("/policies/refund-policy", excerpt=excerpt), scraper.trace.fetches[-1]
+        finally:
+            await http.aclose()
+
+    first, _ = asyncio.run(go(True))
+    assert first.cut == "excerpt" and cache.get("https://shop.example/policies/refund-policy").partial
+    again, timing = asyncio.run(go(True))
+    assert (again.status, again.text, timing.revalidated) == (200, first.text, True)
+    # a full fetch never revalidates against an excerpt, and replaces it with the whole page
+    full, _ = asyncio.run(go(False))
+    assert (full.text, seen[-1]) == (POLICY, None)
+    assert not cache.get("https://shop.example/policies/refund-policy").partial
@@ -0,0 +1,39 @@
+import asyncio
+
+import httpx
+
+from app.http_cache import ResponseCache
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.headers.get("if-none-match") == '"v1"':
+        return httpx.Response(304)
+    return httpx.Response(200, text="<p>policy</p>", headers={"ETag": '"v1"'})
+
+
+def test_revalidated_body_is_reused():
+    cache = ResponseCache(max_bytes=1024)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(_handler))
+        first = ShopifyScraper("shop.example", http=http, response_cache=cache)
+        await first.fetch("/policies/refund-policy")
+        second = ShopifyScraper("shop.example", http=http, response_cache=cache)
+        res = await second.fetch("/policies/refund-policy")
+        await http.aclose()
+        return first.fetch_cache, second.fetch_cache, res
+
+    first, second, res = asyncio.run(go())
+    assert (res.status, res.text) == (200, "<p>policy</p>")
+    assert (first.hits, first.misses) == (0, 1)
+    assert (second.hits, second.misses, second.bytes_saved) == (1, 0, len("<p>policy</p>"))
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=10)
+    for url in ("a", "b", "c"):
+        cache.store(url, httpx.Response(200, content=b"12345", headers={"ETag": url}))
+    assert cache.get("a") is None and cache.get("c") is not None
+    assert cache.bytes == 10
@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+
+from app.http_pool import HttpPool
+
+
+def test_per_host_limit_and_stats():
+    peak = {"a.example": 0, "b.example": 0}
+    active = {"a.example": 0, "b.example": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200, text="ok")
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        http.per_host = 2
+        urls = [f"https://{h}/{i}" for h in peak for i in range(6)]
+        await asyncio.gather(*(http.get(u) for u in urls))
+        await http.aclose()
+        return http.stats()
+
+    stats = asyncio.run(go())
+    assert peak == {"a.example": 2, "b.example": 2}
+    assert stats["requests"] == 12
+    assert stats["active_hosts"] == 0 and stats["in_flight"] == 0
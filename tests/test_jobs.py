@@ -0,0 +1,103 @@
+import asyncio
+from collections import Counter
+
+import httpx
+import orjson
+
+from app.http_pool import HttpPool, use_http_pool
+from app.jobs import JobScheduler
+from app.schemas import BrandContext
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def test_scheduler_bounds_concurrency_per_pool_and_host():
+    active: Counter[str] = Counter()
+    peak = {"total": 0, "a.test": 0}
+    order = []
+
+    async def runner(url):
+        host = url.split("//")[1]
+        active[host] += 1
+        peak["total"] = max(peak["total"], sum(active.values()))
+        peak["a.test"] = max(peak["a.test"], active["a.test"])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        order.append(url)
+        if "broken" in url:
+            raise FileNotFoundError
+        return BrandContext(site_url=url)
+
+    async def go():
+        scheduler = JobScheduler(concurrency=3, per_host=1)
+        big = await scheduler.submit(["https://a.test"] * 6 + [f"https://s{i}.test" for i in range(6)], runner)
+        small = await scheduler.submit(["https://small.test", "https://broken.test"], runner)
+        results = await small.wait()
+        big_done_before_small = len(big.completed)
+        await big.wait()
+        await scheduler.aclose()
+        return big.status(), results, big_done_before_small
+
+    status, small_results, big_done = asyncio.run(go())
+    assert peak["total"] == 3 and peak["a.test"] == 1
+    assert status.status == "done" and status.completed == 12 and status.failed == 0
+    assert [r.url for r in status.results] == ["https://a.test"] * 6 + [f"https://s{i}.test" for i in range(6)]
+    # the small batch is served alongside the big one, not after it
+    assert big_done < 12
+    assert small_results[1].error == "website not found or unreachable"
+
+
+def test_batch_api_polls_and_streams_results():
+    fake = FakeShopify(StoreSpec(products=30, anchors=5))
+
+    async def go():
+        from app.main import app
+
+        http = HttpPool(transport=fake.transport())
+        use_http_pool(http)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                urls = [f"https://batch-{i}.test" for i in range(5)]
+                r = await client.post("/api/batch", json={"urls": urls, "sections": ["products"]})
+                assert r.status_code == 202
+                job_id = r.json()["id"]
+                streamed = await client.get(f"/api/batch/{job_id}/stream")
+                status = (await client.get(f"/api/batch/{job_id}")).json()
+                missing = await client.get("/api/batch/nope")
+        finally:
+            await http.aclose()
+        return streamed, status, missing
+
+    streamed, status, missing = asyncio.run(go())
+    events = [orjson.loads(line) for line in streamed.text.splitlines()]
+    assert [e["event"] for e in events] == ["result"] * 5 + ["done"]
+    assert all(e["data"]["data"]["catalog_count"] == 30 for e in events[:5])
+    assert status["status"] == "done" and status["completed"] == 5
+    assert [r["index"] for r in status["results"]] == list(range(5))
+    assert missing.status_code == 404
+
+
+def test_invalid_urls_fail_without_stopping_the_workers(monkeypatch):
+    from app.config import settings
+
+    async def runner(url):
+        return BrandContext(site_url=url)
+
+    async def go():
+        scheduler = JobScheduler(concurrency=2)
+        bad = await scheduler.submit([" ", "https://", "good.example"], runner)
+        await bad.wait()
+        later = await scheduler.submit(["https://later.example"], runner)
+        await asyncio.wait_for(later.wait(), 1)
+        polled = later.status()
+        only_bad = await scheduler.submit([" "], runner)
+        monkeypatch.setattr(settings, "batch_result_ttl_seconds", 0)
+        expired = scheduler.get(later.id).status()
+        await scheduler.aclose()
+        return bad.status(), polled, only_bad.status(), expired
+
+    bad, later, only_bad, expired = asyncio.run(go())
+    assert [r.error for r in bad.results] == ["invalid URL", "invalid URL", None]
+    assert bad.status == "done" and bad.failed == 2
+    assert later.status == "done" and later.results[0].data is not None
+    assert only_bad.status == "done" and only_bad.failed == 1
+    assert expired.results[0].data is None and expired.results[0].expired
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.http_pool import HttpPool
+from app.metrics import Registry
+from app.scraper import ShopifyScraper
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "Demo.", ("kind",))
+    hist.buckets = (0.1, 1.0)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, kind="page")
+    text = registry.render({"demo_gauge": 2})
+    assert 'demo_seconds_bucket{kind="page",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{kind="page",le="1"} 3' in text
+    assert 'demo_seconds_bucket{kind="page",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{kind="page"} 4' in text
+    assert "demo_gauge 2" in text
+
+
+def test_scrape_reports_timings_when_asked():
+    fake = FakeShopify(StoreSpec(products=40, anchors=10))
+
+    async def go(include_timings):
+        http = HttpPool(transport=fake.transport())
+        try:
+            return await ShopifyScraper("shop.test", http=http, include_timings=include_timings).scrape()
+        finally:
+            await http.aclose()
+
+    assert asyncio.run(go(False)).timings is None
+    fake.requests.clear()
+    timings = asyncio.run(go(True)).timings
+    assert timings.requests == len(timings.fetches) == sum(fake.requests.values())
+    assert {f.kind for f in timings.fetches} == {"home", "catalog", "sitemap", "page"}
+    assert {"home", "products", "policies", "faqs", "about", "contact"} <= timings.stages.keys()
+    assert "parse_home" in {p.fn for p in timings.parses}
+    assert timings.bytes > 0 and timings.total_ms > 0
@@ -0,0 +1,33 @@
+import urllib.parse
+
+from app.dom import Bs4Document
+from app.page import LinkIndex
+
+HTML = """
+<html><body>
+  <a href="/policies/privacy-policy">Privacy</a>
+  <a href="/pages/faq">Help centre</a>
+  <a href="/pages/about-us">Our Story</a>
+  <a href=" https://instagram.com/brand ">IG</a>
+  <a href="https://x.com/brand">X</a>
+</body></html>
+"""
+
+
+def test_link_index_lookups():
+    links = LinkIndex.from_document(Bs4Document(HTML), "https://shop.example")
+    assert len(links) == 5
+    assert links.first("privacy").url == "https://shop.example/policies/privacy-policy"
+    assert [a.href for a in links.candidates("faq", in_text=False)] == ["/pages/faq"]
+    assert links.candidates("faq", in_href=False) == []
+    assert [a.text for a in links.matching(["story", "about"], in_href=False)] == ["Our Story"]
+    assert links.socials() == {"instagram": "https://instagram.com/brand", "twitter": "https://x.com/brand"}
+
+
+def test_root_relative_links_resolve_like_urljoin():
+    hrefs = ["/a?b=c#d", "/a/../b", "/./x", "//cdn.example/x", "/a\tb", "relative", "https://other.example/y", "/a b"]
+    html = "".join(f'<a href="{h}">{i}</a>' for i, h in enumerate(hrefs))
+    base = "https://Shop.Example/pages/x?y=1"
+    links = LinkIndex.from_document(Bs4Document(html), base)
+    assert [a.url for a in links.anchors] == [urllib.parse.urljoin(base, h.strip()) for h in hrefs]
+    assert [a.host for a in links.anchors] == ["shop.example"] * 3 + ["cdn.example"] + ["shop.example"] * 2 + ["other.example", "shop.example"]
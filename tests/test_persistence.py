@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.persistence.db import Base
+from app.persistence.load import load_brand_context_sync, query_products_sync
+from app.persistence.models import ProductORM
+from app.persistence.save import save_brand_context_sync, upsert
+from app.persistence.writer import PersistWriter
+from app.schemas import BrandContext, CatalogFetchStats, ContactInfo, FAQItem, Link, Policy, Product
+
+
+def _ctx(n, complete=True, errors=(), **overrides):
+    products = [Product(id=i, handle=f"p{i}", title=f"Product {i}", price=10.0 + i) for i in range(n)]
+    for i, title in overrides.items():
+        products[int(i)] = products[int(i)].model_copy(update={"title": title})
+    fetch = CatalogFetchStats(mode="page", products=n, complete=complete)
+    return BrandContext(site_url="https://shop.test", site_name="Shop", products=products, catalog_fetch=fetch, errors=list(errors))
+
+
+def test_upsert_writes_only_changed_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(engine)
+
+    first = save_brand_context_sync(_ctx(1200), engine)
+    assert first == {"inserted": 1200, "updated": 0, "unchanged": 0, "deleted": 0, "sections_written": 1}
+    assert save_brand_context_sync(_ctx(1200), engine)["unchanged"] == 1200
+    counts = save_brand_context_sync(_ctx(1100, **{"3": "Renamed"}), engine)
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 1099, "deleted": 100, "sections_written": 0}
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(ProductORM)) == 1100
+        assert session.scalar(select(ProductORM.title).where(ProductORM.external_id == "3")) == "Renamed"
+
+
+def test_partial_results_keep_stored_products(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(engine)
+    save_brand_context_sync(_ctx(50), engine)
+
+    # an interrupted or capped walk upserts what it read and deletes nothing
+    errors = ["catalog_incomplete: request failed for page=3"]
+    counts = save_brand_context_sync(_ctx(20, complete=False, errors=errors, **{"0": "Renamed"}), engine)
+    assert (counts["updated"], counts["deleted"]) == (1, 0)
+    # sections cut at the deadline are missing, not empty: nothing is written
+    assert save_brand_context_sync(_ctx(5, errors=["deadline_exceeded: products"]), engine) == {"skipped": 1}
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(ProductORM)) == 50
+
+
+def test_writer_coalesces_per_store_and_drops_when_full():
+    saved = []
+
+    async def saver(ctx):
+        await asyncio.sleep(0.01)
+        saved.append((str(ctx.site_url), ctx.site_name))
+        return {"inserted": len(ctx.products)}
+
+    async def go():
+        writer = PersistWriter(maxsize=2, saver=saver)
+        assert writer.submit(BrandContext(site_url="https://a.test", site_name="old"))
+        assert writer.submit(BrandContext(site_url="https://a.test", site_name="new"))
+        assert writer.submit(BrandContext(site_url="https://b.test"))
+        assert not writer.submit(BrandContext(site_url="https://c.test"))
+        await writer.close()
+        return writer.stats()
+
+    stats = asyncio.run(go())
+    assert saved == [("https://a.test", "new"), ("https://b.test", None)]
+    assert (stats["written"], stats["coalesced"], stats["dropped"], stats["queued"]) == (2, 1, 1, 0)
+
+
+def test_full_context_roundtrip_and_indexed_queries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(engine)
+    ctx = BrandContext(
+        site_url="https://shop.test",
+        site_name="Shop",
+        domain="shop.test",
+        catalog_count=3,
+        products=[
+            Product(id=1, title="Tee", price=19.99, vendor="Acme", product_type="Shirts", tags=["a"], images=["https://i/1.jpg"]),
+            Product(id=2, title="Cap", price=9.5, vendor="Acme", product_type="Hats"),
+            Product(id=3, title="Boot", price=120.0, vendor="Globex", product_type="Shoes"),
+        ],
+        hero_products=["https://shop.test/products/tee"],
+        policies=[Policy(name="Refund Policy", url="https://shop.test/policies/refund-policy", content_excerpt="30 days")],
+        faqs=[FAQItem(question="Ship abroad?", answer="Yes"), FAQItem(question="Returns?")],
+        social_handles={"instagram": "https://instagram.com/shop"},
+        contact=ContactInfo(emails=["hi@shop.test"], phones=["+1 555"], contact_page_url="https://shop.test/pages/contact"),
+        about_text="We make things.",
+        important_links=[Link(title="Blog", url="https://shop.test/blogs/news")],
+    )
+    save_brand_context_sync(ctx, engine)
+
+    loaded = load_brand_context_sync("SHOP.test", engine)
+    assert loaded is not None
+    assert loaded.model_dump(mode="json") == {
+        **ctx.model_dump(mode="json"),
+        "products": [p.model_dump(mode="json") | {"id": str(p.id)} for p in ctx.products],
+    }
+    assert load_brand_context_sync("other.test", engine) is None
+
+    cheap = query_products_sync("shop.test", vendor="Acme", max_price=15, engine=engine)
+    assert [p.title for p in cheap] == ["Cap"]
+    assert [p.title for p in query_products_sync("shop.test", min_price=10, engine=engine)] == ["Tee", "Boot"]
+    assert query_products_sync("other.test", engine=engine) is None
+
+
+def test_upsert_rejects_unknown_dialects():
+    engine = create_engine("sqlite://")
+    engine.dialect.name = "oracle"
+    with Session(engine) as session, pytest.raises(ValueError, match="oracle"):
+        upsert(session, ProductORM.__table__, [{"store_id": 1, "external_id": "1"}], ("store_id", "external_id"), 10)
+
+
+def test_domain_lookup_takes_the_latest_scrape(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    Base.metadata.create_all(engine)
+    for scheme, title in (("http", "Old"), ("https", "New")):
+        ctx = BrandContext(site_url=f"{scheme}://x.test", site_name=title, domain="x.test", products=[Product(id=1, title=title)])
+        save_brand_context_sync(ctx, engine)
+
+    assert load_brand_context_sync("x.test", engine).site_name == "New"
+    assert [p.title for p in query_products_sync("x.test", engine=engine)] == ["New"]
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.http_pool import HttpPool
+from app.ratelimit import HostRateLimiter, TokenBucket, retry_after_seconds
+from app.scraper import ShopifyScraper
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds("2.5") == 2.5
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
+
+
+def test_bucket_backs_off_and_recovers():
+    async def go():
+        bucket = TokenBucket(rate=100, burst=2, min_rate=10, max_rate=200, increase=5)
+        bucket.throttled()
+        bucket.throttled()
+        assert bucket.rate == 25
+        bucket.throttled()
+        bucket.throttled()
+        assert bucket.rate == 10
+        bucket.succeeded()
+        assert bucket.rate == 15
+        bucket.throttled(retry_after=0.05)
+        started = asyncio.get_running_loop().time()
+        await bucket.acquire()
+        return asyncio.get_running_loop().time() - started
+
+    assert asyncio.run(go()) >= 0.04
+
+
+def test_throttled_store_still_yields_complete_catalog():
+    fake = FakeShopify(StoreSpec(products=700, throttle_rate=0.3, retry_after=0.01))
+    limiter = HostRateLimiter(rate=50, burst=10, min_rate=20)
+
+    async def go():
+        http = HttpPool(transport=fake.transport())
+        try:
+            scraper = ShopifyScraper("shop.test", http=http, rate_limiter=limiter, include_timings=True)
+            return await scraper.scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    assert fake.statuses[429] > 0
+    assert ctx.catalog_count == 700 and not any(e.startswith("catalog") for e in ctx.errors)
+    assert limiter.stats()["throttled"] == fake.statuses[429]
+    assert sum(f.retries for f in ctx.timings.fetches) == fake.statuses[429]
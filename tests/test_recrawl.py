@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import Counter
+
+from app.recrawl import RecrawlScheduler, TrackedStore, TrackedStoreDB
+from app.schemas import BrandContext
+
+
+def test_changing_stores_are_recrawled_more_often(tmp_path):
+    visits: Counter[str] = Counter()
+    results = []
+
+    async def runner(url):
+        visits[url] += 1
+        if "broken" in url:
+            raise FileNotFoundError
+        # the hot store looks different on every visit, the cold one never does
+        name = f"v{visits[url]}" if "hot" in url else "same"
+        return BrandContext(site_url=url, site_name=name)
+
+    async def on_result(ctx):
+        results.append(str(ctx.site_url))
+
+    async def go():
+        db = TrackedStoreDB(str(tmp_path / "recrawl.sqlite3"))
+        scheduler = RecrawlScheduler(db, runner, on_result, workers=2, min_interval=0.02, max_interval=2)
+        await scheduler.start()
+        for url in ("https://hot.test", "https://cold.test", "https://broken.test"):
+            await scheduler.track(url)
+        await asyncio.sleep(0.8)
+        stats = scheduler.stats()
+        await scheduler.stop()
+        return scheduler, stats
+
+    scheduler, stats = asyncio.run(go())
+    hot, cold, broken = (scheduler.stores[f"https://{h}.test"] for h in ("hot", "cold", "broken"))
+    assert visits["https://hot.test"] > visits["https://cold.test"] >= 2
+    assert hot.change_rate > 0.5 > cold.change_rate
+    assert hot.interval < cold.interval
+    assert broken.failures >= 1 and broken.last_crawled is None
+    assert "https://broken.test" not in results
+    assert stats["tracked"] == 3 and stats["crawled"] == len(results)
+    assert stats["failed"] == visits["https://broken.test"]
+    assert stats["changed"] == visits["https://hot.test"] - 1
+    assert stats["crawls_per_minute"] > 0
+
+    # schedules survive a restart
+    reloaded = {s.url: s for s in TrackedStoreDB(str(tmp_path / "recrawl.sqlite3")).load()}
+    assert reloaded["https://hot.test"].change_rate == hot.change_rate
+    assert reloaded["https://cold.test"].last_digest == cold.last_digest
+
+
+def test_overdue_stores_go_by_due_time_then_change_rate(tmp_path):
+    db = TrackedStoreDB(str(tmp_path / "recrawl.sqlite3"))
+    now = time.time()
+    db.save(TrackedStore(url="https://stable.test", next_due=now - 10, interval=60, change_rate=0.1))
+    db.save(TrackedStore(url="https://busy.test", next_due=now - 10, interval=60, change_rate=0.9))
+    db.save(TrackedStore(url="https://oldest.test", next_due=now - 20, interval=60, change_rate=0.0))
+    db.save(TrackedStore(url="https://later.test", next_due=now + 60, interval=60))
+    order = []
+
+    async def runner(url):
+        order.append(url)
+        return BrandContext(site_url=url)
+
+    async def go():
+        scheduler = RecrawlScheduler(db, runner, workers=1, min_interval=30, max_interval=60)
+        await scheduler.start()
+        lag = scheduler.stats()["lag_seconds"]
+        await asyncio.sleep(0.1)
+        await scheduler.untrack("https://later.test")
+        stats = scheduler.stats()
+        await scheduler.stop()
+        return lag, stats
+
+    lag, stats = asyncio.run(go())
+    assert order == ["https://oldest.test", "https://busy.test", "https://stable.test"]
+    assert lag >= 20
+    assert stats["due"] == 0 and stats["tracked"] == 3
+    assert {s.url for s in db.load()} == {"https://oldest.test", "https://busy.test", "https://stable.test"}
+
+
+def test_failing_hook_keeps_the_store_scheduled(tmp_path):
+    db = TrackedStoreDB(str(tmp_path / "recrawl.sqlite3"))
+    visits = []
+
+    async def runner(url):
+        visits.append(url)
+        return BrandContext(site_url=url)
+
+    async def on_result(ctx):
+        raise OSError(f"index not writable for {ctx.site_url}")
+
+    async def go():
+        scheduler = RecrawlScheduler(db, runner, on_result, workers=1, min_interval=0.02, max_interval=0.05)
+        await scheduler.start()
+        await scheduler.track("https://shop.test")
+        await asyncio.sleep(0.3)
+        await scheduler.stop()
+        return scheduler
+
+    scheduler = asyncio.run(go())
+    assert len(visits) >= 2 and scheduler._heap
+    assert db.load()[0].last_crawled is not None
@@ -0,0 +1,150 @@
+import asyncio
+import json
+
+import httpx
+
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+
+PAGES = {
+    "/": """<html><head><title>Demo Store</title></head><body>
+        <section><a href="/products/hero-tee">Hero tee</a></section>
+        <a href="/policies/privacy-policy">Privacy</a>
+        <a href="/pages/about-us">About us</a>
+        <a href="/pages/contact">Contact</a>
+        <a href="https://instagram.com/demo">IG</a>
+        <p>Write to hello@demo.example</p>
+        <details><summary>Do you ship abroad?</summary>Yes, worldwide.</details>
+    </body></html>""",
+    "/policies/privacy-policy": "<html><body><main>We respect your privacy.</main></body></html>",
+    "/pages/about-us": "<html><body><main>Founded in 2020 by two friends.</main></body></html>",
+}
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/products.json":
+        page = int(request.url.params.get("page", 1))
+        products = [{"id": 1, "handle": "hero-tee", "title": "Hero tee", "variants": [{"price": "20.00"}]}]
+        return httpx.Response(200, text=json.dumps({"products": products if page == 1 else []}))
+    html = PAGES.get(request.url.path)
+    return httpx.Response(200, text=html) if html else httpx.Response(404)
+
+
+def test_scrape_against_mock_store():
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(_handler))
+        scraper = ShopifyScraper("demo.example", http=http)
+        try:
+            return await scraper.scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    assert ctx.site_name == "Demo Store"
+    assert [p.title for p in ctx.products] == ["Hero tee"]
+    assert ctx.hero_products == ["https://demo.example/products/hero-tee"]
+    assert ctx.policies[0].content_excerpt == "We respect your privacy."
+    assert ctx.about_text == "Founded in 2020 by two friends."
+    assert ctx.faqs[0].question == "Do you ship abroad?"
+    assert ctx.contact.emails == ["hello@demo.example"]
+    assert ctx.contact.contact_page_url == "https://demo.example/pages/contact"
+    assert ctx.social_handles == {"instagram": "https://instagram.com/demo"}
+
+
+def test_subpages_shared_between_extractors_are_fetched_once():
+    hits: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hits[request.url.path] = hits.get(request.url.path, 0) + 1
+        if request.url.path == "/":
+            return httpx.Response(200, text='<a href="/pages/help">Shipping help</a>')
+        if request.url.path == "/pages/help":
+            return httpx.Response(200, text='<main>Ships in 2 days.</main><a href="/pages/help">Help</a>')
+        return httpx.Response(404)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            return await ShopifyScraper("demo.example", http=http).scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    assert ctx.policies[0].name == "Shipping Policy"
+    assert ctx.policies[0].content_excerpt.startswith("Ships in 2 days.")
+    assert hits["/pages/help"] == 1
+
+
+def test_deadline_returns_partial_results():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/products.json":
+            await asyncio.sleep(5)
+        return _handler(request)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            return await ShopifyScraper("demo.example", http=http, deadline=0.3).scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    assert ctx.errors == ["deadline_exceeded: products"]
+    assert ctx.products == []
+    assert ctx.policies[0].content_excerpt == "We respect your privacy."
+
+
+def test_contact_only_scrape_fetches_home_page_and_sitemap_only():
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        return _handler(request)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            return await ShopifyScraper("demo.example", http=http, sections={"contact"}).scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    # the sitemap may list a contact page the home page does not link
+    assert paths == ["/", "/sitemap.xml"]
+    assert ctx.contact.emails == ["hello@demo.example"]
+    assert ctx.products == [] and ctx.policies == [] and ctx.social_handles == {}
+
+
+def test_stream_emits_sections_then_done():
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(_handler))
+        try:
+            scraper = ShopifyScraper("demo.example", http=http, sections={"products", "policies"})
+            return [event async for event in scraper.stream()]
+        finally:
+            await http.aclose()
+
+    events = asyncio.run(go())
+    names = [name for name, _ in events]
+    assert names[0] == "site" and names[-1] == "done"
+    assert sorted(names[1:-1]) == ["policies", "products"]
+    assert events[-1][1]["catalog_count"] == 1
+
+
+def test_html_fallback_products_are_counted():
+    cards = "".join(f'<div class="product-card"><a class="product-title" href="/products/p{i}">P{i}</a></div>' for i in range(3))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/":
+            return httpx.Response(200, text=f"<html><body>{cards}</body></html>")
+        return httpx.Response(404)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            return await ShopifyScraper("demo.example", http=http, sections={"products"}).scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    assert len(ctx.products) == 3 and ctx.catalog_count == 3
@@ -0,0 +1,157 @@
+import asyncio
+
+import httpx
+
+from app import search as search_module
+from app.config import settings
+from app.http_pool import HttpPool, use_http_pool
+from app.schemas import BrandContext, FAQItem, Policy, Product
+from app.search import SearchIndex, load_index, tokenize
+from bench.fakeshop import FakeShopify, StoreSpec
+
+
+def _store(domain, titles, faqs=(), policies=()):
+    return BrandContext(
+        site_url=f"https://{domain}",
+        domain=domain,
+        products=[Product(id=i, title=t, url=f"https://{domain}/products/{i}") for i, t in enumerate(titles)],
+        faqs=[FAQItem(question=q, answer=a) for q, a in faqs],
+        policies=[Policy(name=n, content_excerpt=c) for n, c in policies],
+    )
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("Do you ship to the UK?") == ["ship", "uk"]
+
+
+def test_ranking_filters_and_replacement():
+    index = SearchIndex()
+    index.add_context(
+        _store(
+            "a.test",
+            ["Linen Shirt", "Wool Sweater", "Linen linen trousers and shirt"],
+            faqs=[("Do you ship internationally?", "Yes, we ship to 40 countries.")],
+        )
+    )
+    index.add_context(_store("b.test", ["Cotton Shirt"], policies=[("Shipping Policy", "Free shipping over $50")]))
+    assert (len(index), index.stores) == (6, 2)
+
+    total, hits = index.search("linen shirt")
+    assert total == 3
+    # both terms in a short title beat repeated terms in a longer one
+    assert [h.title for h in hits] == ["Linen Shirt", "Linen linen trousers and shirt", "Cotton Shirt"]
+    assert hits[0].url == "https://a.test/products/0" and hits[0].score > hits[1].score
+
+    assert [h.store for h in index.search("shirt", store="b.test")[1]] == ["b.test"]
+    assert [h.kind for h in index.search("ship shipping", kind="faq")[1]] == ["faq"]
+    assert index.search("nothing matches")[0] == 0
+
+    # a re-scrape replaces the store's documents; limiting it to products keeps its FAQs
+    index.add_context(_store("a.test", ["Silk Scarf"]), kinds=["product"])
+    assert index.search("linen")[0] == 0
+    assert index.search("silk")[1][0].store == "a.test"
+    assert index.search("internationally")[0] == 1
+    index.remove_store("a.test")
+    assert (len(index), index.stores) == (2, 1)
+
+
+def test_store_filter_scores_like_the_whole_index():
+    words = ["red", "blue", "linen", "wool", "shirt", "hat", "sock", "scarf"]
+    index = SearchIndex()
+    for s in range(40):
+        titles = [" ".join(words[(s + i * k) % len(words)] for k in range(1, 2 + i % 4)) for i in range(50)]
+        index.add_context(_store(f"s{s}.test", titles))
+    for query in ["red shirt", "wool", "blue linen sock", "scarf hat"]:
+        total, hits = index.search(query, limit=2000)
+        assert total == len(hits) and [h.score for h in hits] == sorted((h.score for h in hits), reverse=True)
+        scoped = index.search(query, store="s7.test", limit=2000)[1]
+        assert [(h.title, h.score) for h in scoped] == [(h.title, h.score) for h in hits if h.store == "s7.test"]
+
+
+def test_index_round_trips_through_disk(tmp_path):
+    index = SearchIndex()
+    index.add_context(_store("a.test", ["Linen Shirt"], faqs=[("Returns?", "Free returns within 30 days")]))
+    path = str(tmp_path / "index.json")
+    asyncio.run(index.save(path))
+    assert not index.dirty
+
+    loaded = load_index(path)
+    assert loaded.stats() == {**index.stats(), "updates": 0}
+    assert loaded.search("free returns")[1] == index.search("free returns")[1]
+    (tmp_path / "broken.json").write_bytes(b'{"version": 99}')
+    assert len(load_index(str(tmp_path / "broken.json"))) == 0
+    assert len(load_index(str(tmp_path / "missing.json"))) == 0
+
+
+def test_search_api_indexes_scrapes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "search_index_path", str(tmp_path / "index.json"))
+    monkeypatch.setattr(search_module, "_index", None)
+    fake = FakeShopify(StoreSpec(products=20, anchors=5))
+
+    async def go():
+        from app.main import app
+
+        http = HttpPool(transport=fake.transport())
+        use_http_pool(http)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                r = await client.post("/api/insights", json={"website_url": "https://search-a.test", "sections": ["products"]})
+                assert r.status_code == 200
+                title = r.json()["data"]["products"][0]["title"]
+                found = (await client.get("/api/search", params={"q": title, "kind": "product", "limit": 5})).json()
+                scoped = (await client.get("/api/search", params={"q": title, "store": "elsewhere.test"})).json()
+                stats = (await client.get("/api/stats")).json()["search"]
+        finally:
+            await http.aclose()
+        return title, found, scoped, stats
+
+    title, found, scoped, stats = asyncio.run(go())
+    assert found["hits"][0]["title"] == title and found["hits"][0]["store"] == "search-a.test"
+    assert found["total"] >= 1 and found["took_ms"] >= 0
+    assert scoped["total"] == 0 and scoped["hits"] == []
+    assert stats["documents"] == 20 and stats["stores"] == 1
+
+
+def test_capped_scrape_keeps_products_and_unwritable_path_is_skipped(tmp_path, monkeypatch, caplog):
+    # the directory does not exist, so the index cannot be saved
+    monkeypatch.setattr(settings, "search_index_path", str(tmp_path / "missing" / "index.json"))
+    monkeypatch.setattr(settings, "search_save_interval_seconds", 0)
+    monkeypatch.setattr(search_module, "_index", None)
+    fake = FakeShopify(StoreSpec(products=20, anchors=5))
+
+    async def go():
+        from app.main import app
+
+        http = HttpPool(transport=fake.transport())
+        use_http_pool(http)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                full = await client.post("/api/insights", json={"website_url": "https://search-b.test", "sections": ["products"]})
+                assert search_module._index._saving is None
+                capped = await client.post("/api/insights", json={"website_url": "https://search-b.test", "max_products": 3})
+        finally:
+            await http.aclose()
+        return full.status_code, capped.status_code
+
+    assert asyncio.run(go()) == (200, 200)
+    index = search_module._index
+    assert len(index._by_store["search-b.test"]["product"]) == 20
+    assert index.dirty
+    assert "is not writable" in caplog.text
+
+
+def test_update_in_steps_matches_add_context(monkeypatch):
+    monkeypatch.setattr(search_module, "UPDATE_STEP", 100)
+    sync, stepped = SearchIndex(), SearchIndex()
+
+    async def go():
+        for round in range(4):
+            ctx = _store("a.test", [f"Linen Shirt {round} {i}" for i in range(1500)], faqs=[("Returns?", f"Within {round} days")])
+            sync.add_context(ctx)
+            await stepped.update(ctx, search_module.KINDS)
+
+    asyncio.run(go())
+    assert stepped.stats() == sync.stats()
+    # replaced documents were compacted away rather than left as holes
+    assert len(stepped._docs) == len(sync._docs) < 3 * len(stepped)
+    assert stepped.search("linen shirt 3", limit=5) == sync.search("linen shirt 3", limit=5)
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from datetime import UTC, datetime
+
+import httpx
+
+from app.config import settings
+from app.http_cache import ResponseCache
+from app.http_pool import HttpPool
+from app.scraper import ShopifyScraper
+from app.sitemap import SitemapParser, SitemapReader, parse_lastmod, sitemap_kind
+from bench.fakeshop import FakeShopify, StoreSpec
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"'
+
+
+def test_parser_reads_entries_as_they_arrive():
+    body = (
+        f"<?xml version='1.0'?><urlset {NS}>"
+        + "".join(
+            f"<url><loc>https://s.test/products/p{i}</loc><lastmod>2024-03-0{i + 1}T10:00:00-05:00</lastmod>"
+            f"<image:image><image:loc>https://cdn.test/{i}.jpg</image:loc></image:image></url>"
+            for i in range(3)
+        )
+        + "</urlset>"
+    ).encode()
+    seen = []
+    parser = SitemapParser(seen.append)
+    for i in range(0, len(body), 7):
+        parser.feed(body[i : i + 7])
+    parser.close()
+    assert [e.loc for e in seen] == [f"https://s.test/products/p{i}" for i in range(3)]
+    assert seen[0].lastmod == datetime(2024, 3, 1, 15, tzinfo=UTC)
+    assert parse_lastmod("2024-01-01") == datetime(2024, 1, 1, tzinfo=UTC)
+    assert parse_lastmod("soon") is None
+    assert sitemap_kind("https://s.test/sitemap_products_2.xml?from=1&to=9") == "products"
+    assert sitemap_kind("https://s.test/sitemap.xml") is None
+
+
+def test_index_covers_every_product_sitemap():
+    fake = FakeShopify(StoreSpec(products=12_000))
+
+    async def go():
+        http = HttpPool(transport=fake.transport())
+        try:
+            return await SitemapReader(ShopifyScraper("shop.test", http=http), kinds=None).load()
+        finally:
+            await http.aclose()
+
+    index = asyncio.run(go())
+    assert fake.requests["sitemap.xml"] == 1
+    assert sum(n for kind, n in fake.requests.items() if kind.startswith("sitemap_products_")) == 3
+    assert index.stats() == {"pages": 3, "products": 12_000}
+    assert index.lastmod("https://www.shop.test/products/product-1010/") == datetime(2024, 1, 1, 0, 10, tzinfo=UTC)
+    assert index.pages_matching(["about"]) == ["https://shop.test/pages/about-us"]
+
+
+def test_scrape_finds_pages_the_home_page_does_not_link():
+    pages = {
+        "/": "<html><head><title>Bare</title></head><body><p>hi@bare.test</p></body></html>",
+        "/sitemap.xml": f"<sitemapindex {NS}><sitemap><loc>https://bare.test/sitemap_pages_1.xml</loc></sitemap>"
+        "<sitemap><loc>https://bare.test/sitemap_products_1.xml</loc></sitemap></sitemapindex>",
+        "/sitemap_pages_1.xml": f"<urlset {NS}>"
+        + "".join(f"<url><loc>https://bare.test/pages/{p}</loc></url>" for p in ("help-center", "our-story", "contact"))
+        + "</urlset>",
+        "/pages/help-center": "<html><body><details><summary>Returns?</summary>30 days.</details></body></html>",
+        "/pages/our-story": "<html><body><main>Started in a garage.</main></body></html>",
+    }
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        html = pages.get(request.url.path)
+        return httpx.Response(200, text=html) if html else httpx.Response(404)
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            sections = {"faqs", "about", "contact"}
+            return await ShopifyScraper("bare.test", http=http, response_cache=None, sections=sections).scrape()
+        finally:
+            await http.aclose()
+
+    ctx = asyncio.run(go())
+    assert [f.question for f in ctx.faqs] == ["Returns?"]
+    assert ctx.about_text == "Started in a garage."
+    assert ctx.contact.contact_page_url == "https://bare.test/pages/contact"
+    # only the wanted kinds are read
+    assert "/sitemap_products_1.xml" not in paths
+
+
+def test_contact_page_from_the_sitemap_does_not_depend_on_the_sections_asked_for():
+    pages = {
+        "/": "<html><head><title>Bare</title></head><body><p>hi@bare.test</p></body></html>",
+        "/sitemap.xml": f"<sitemapindex {NS}><sitemap><loc>https://bare.test/sitemap_pages_1.xml</loc></sitemap></sitemapindex>",
+        "/sitemap_pages_1.xml": f"<urlset {NS}><url><loc>https://bare.test/pages/contact-us</loc></url></urlset>",
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        html = pages.get(request.url.path)
+        return httpx.Response(200, text=html) if html else httpx.Response(404)
+
+    async def go(sections):
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            return await ShopifyScraper("bare.test", http=http, response_cache=None, sections=sections).scrape()
+        finally:
+            await http.aclose()
+
+    alone, full = asyncio.run(go({"contact"})), asyncio.run(go(None))
+    assert alone.contact.contact_page_url == full.contact.contact_page_url == "https://bare.test/pages/contact-us"
+
+
+def test_recrawl_skips_pages_unchanged_since_cached():
+    fake = FakeShopify(StoreSpec(products=10, anchors=5))
+    cache = ResponseCache(max_bytes=1 << 20)
+
+    async def go():
+        http = HttpPool(transport=fake.transport())
+        try:
+            first = ShopifyScraper("shop.test", http=http, response_cache=cache, sections={"faqs", "about"})
+            await first.scrape()
+            before = fake.requests["pages"]
+            second = ShopifyScraper("shop.test", http=http, response_cache=cache, sections={"faqs", "about"})
+            ctx = await second.scrape()
+            return before, ctx
+        finally:
+            await http.aclose()
+
+    before, ctx = asyncio.run(go())
+    # /pages/faq and /pages/about-us were fetched once and then served on the sitemap's word
+    assert before == 2 and fake.requests["pages"] == 2
+    assert ctx.fetch_cache.skipped == 2 and ctx.about_text
+
+
+def test_slow_sitemap_holds_back_neither_first_event_nor_catalog(monkeypatch):
+    monkeypatch.setattr(settings, "sitemap_wait_seconds", 0.2)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/sitemap.xml":
+            await asyncio.sleep(3)
+            return httpx.Response(404)
+        if request.url.path == "/products.json":
+            return httpx.Response(200, json={"products": [{"id": 1, "title": "Tee", "variants": []}]})
+        return httpx.Response(200, text='<html><body><a href="/policies/refund-policy">Refunds</a></body></html>')
+
+    async def go():
+        http = HttpPool(transport=httpx.MockTransport(handler))
+        try:
+            started = time.perf_counter()
+            events = []
+            async for field, value in ShopifyScraper("slow.test", http=http, response_cache=None).stream():
+                events.append((field, value, time.perf_counter() - started))
+            return events
+        finally:
+            await http.aclose()
+
+    events = asyncio.run(go())
+    at = {field: elapsed for field, _, elapsed in events}
+    assert at["site"] < 0.15 and at["products"] < 0.15
+    assert at["done"] < 1
+    done = events[-1][1]
+    assert done["catalog_count"] == 1 and "sitemap_error: not read within 0.2s" in done["errors"]
+    policies = next(value for field, value, _ in events if field == "policies")
+    assert [p.name for p in policies] == ["Refund Policy"]